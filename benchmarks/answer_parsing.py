@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.answer_parsing
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+    Compare parsing GetAssignmentsForHIT responses through boto's result
+    objects against turkleton's streaming parser.
+
+    Usage: python -m benchmarks.answer_parsing [num_assignments] [repeat]
+
+"""
+import io
+import sys
+import timeit
+import uuid
+from xml.sax import saxutils
+
+from boto.mturk import connection as boto_connection
+
+from turkleton.assignment import parser
+
+from benchmarks.data import BenchmarkAssignment
+
+
+def make_response(num_assignments):
+    """Create a synthetic GetAssignmentsForHIT response body.
+
+    :param num_assignments: The number of assignments in the response
+    :type num_assignments: int
+    :rtype: bytes
+    """
+    answer_xml = saxutils.escape(
+        '<?xml version="1.0" encoding="UTF-8"?><QuestionFormAnswers>'
+        '<Answer><QuestionIdentifier>Age</QuestionIdentifier>'
+        '<FreeText>29</FreeText></Answer>'
+        '<Answer><QuestionIdentifier>Categories</QuestionIdentifier>'
+        '<FreeText>Front|WaistUp</FreeText></Answer>'
+        '<Answer><QuestionIdentifier>IsOld</QuestionIdentifier>'
+        '<FreeText>0</FreeText></Answer>'
+        '<Answer><QuestionIdentifier>Notes</QuestionIdentifier>'
+        '<FreeText>Nothing to add</FreeText></Answer>'
+        '</QuestionFormAnswers>'
+    )
+    assignments = ''.join(
+        '<Assignment><AssignmentId>{}</AssignmentId><WorkerId>W</WorkerId>'
+        '<HITId>H</HITId><AssignmentStatus>Submitted</AssignmentStatus>'
+        '<Answer>{}</Answer></Assignment>'.format(uuid.uuid4(), answer_xml)
+        for _ in range(num_assignments)
+    )
+    return (
+        '<GetAssignmentsForHITResponse><GetAssignmentsForHITResult>'
+        '<Request><IsValid>True</IsValid></Request>{}'
+        '</GetAssignmentsForHITResult></GetAssignmentsForHITResponse>'.format(
+            assignments
+        )
+    ).encode('utf-8')
+
+
+class FakeResponse(object):
+    """Minimal stand-in for an HTTP response"""
+
+    status = 200
+    reason = 'OK'
+
+    def __init__(self, body):
+        self.body = body
+
+    def read(self):
+        return self.body
+
+
+def parse_with_boto(mturk_connection, body):
+    result_set = mturk_connection._process_response(
+        FakeResponse(body), [('Assignment', boto_connection.Assignment)]
+    )
+    return [BenchmarkAssignment(each) for each in result_set]
+
+
+def parse_with_turkleton(body):
+    return [
+        BenchmarkAssignment(each)
+        for each in parser.iter_assignments(io.BytesIO(body))
+    ]
+
+
+def main(num_assignments=1000, repeat=5):
+    mturk_connection = boto_connection.MTurkConnection(
+        aws_access_key_id='benchmark', aws_secret_access_key='benchmark'
+    )
+    body = make_response(num_assignments)
+
+    boto_time = min(timeit.repeat(
+        lambda: parse_with_boto(mturk_connection, body),
+        number=1, repeat=repeat
+    ))
+    turkleton_time = min(timeit.repeat(
+        lambda: parse_with_turkleton(body), number=1, repeat=repeat
+    ))
+
+    print('assignments: {}'.format(num_assignments))
+    print('boto:        {:.4f}s'.format(boto_time))
+    print('streaming:   {:.4f}s'.format(turkleton_time))
+    print('speedup:     {:.2f}x'.format(boto_time / turkleton_time))
+
+
+if __name__ == '__main__':
+    main(*[int(each) for each in sys.argv[1:]])
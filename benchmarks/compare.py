@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.compare
+    ~~~~~~~~~~~~~~~~~~
+    Compare two benchmark reports produced by benchmarks.suite and exit with
+    a non-zero status if any benchmark regressed beyond the threshold.
+
+    Usage: python -m benchmarks.compare BASELINE CURRENT [--threshold 0.1]
+
+"""
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    """Load benchmark results keyed by name and scale.
+
+    :rtype: dict
+    """
+    with open(path) as report_file:
+        report = json.load(report_file)
+    return dict(
+        ((each['name'], each['scale']), each['seconds'])
+        for each in report['results']
+    )
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('baseline')
+    arg_parser.add_argument('current')
+    arg_parser.add_argument('--threshold', type=float, default=0.1)
+    args = arg_parser.parse_args(argv)
+
+    baseline = load_results(args.baseline)
+    current = load_results(args.current)
+
+    regressions = 0
+    for key in sorted(set(baseline) & set(current)):
+        change = (current[key] - baseline[key]) / baseline[key]
+        regressed = change > args.threshold
+        regressions += regressed
+        print('{:<30} {:>8} {:>10.4f}s {:>10.4f}s {:>+8.1%}{}'.format(
+            key[0], key[1], baseline[key], current[key], change,
+            '  REGRESSION' if regressed else ''
+        ))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.data
+    ~~~~~~~~~~~~~~~
+    Synthetic data for benchmarks.
+
+"""
+import datetime
+
+from turkleton import budget
+from turkleton import fake
+from turkleton.assignment import answer
+from turkleton.assignment import assignment
+from turkleton.assignment import task
+
+
+#: The number of batches synthetic HITs are spread across
+NUM_BATCHES = 10
+
+
+class BenchmarkTask(task.BaseTask):
+    """Task with representative settings"""
+    __layout_id__ = '3MCDHXBQ4Z7SJ2ZT2XZACNE142JWKX'
+    __reward__ = 0.05
+    __title__ = 'Categorize An Image'
+    __description__ = 'Categorize this image.'
+    __keywords__ = ['image', 'categorize']
+
+
+class BenchmarkAssignment(assignment.BaseAssignment):
+    """Assignment with a representative mix of answer types"""
+    age = answer.IntegerAnswer('Age', None)
+    categories = answer.MultiChoiceAnswer('Categories')
+    is_old = answer.BooleanAnswer('IsOld', False)
+    notes = answer.TextAnswer('Notes', '')
+
+
+def make_layout_params(index):
+    """Create layout parameters for a single task.
+
+    :rtype: dict
+    """
+    return {
+        'image_url': 'http://example.com/images/{}.png'.format(index),
+        'first_guess': str(index % 90),
+        'item_id': str(index),
+        'category_hint': 'portrait',
+        'locale': 'en_US'
+    }
+
+
+def make_answer_values(index):
+    """Create the answers of a single assignment.
+
+    :rtype: dict
+    """
+    return {
+        'Age': str(index % 90),
+        'Categories': 'Front|WaistUp',
+        'IsOld': '1' if index % 3 else '0',
+        'Notes': 'Nothing to add'
+    }
+
+
+def make_hits(scale):
+    """Create HITs spread evenly across NUM_BATCHES batches.
+
+    :rtype: list of turkleton.fake.FakeHIT
+    """
+    return [
+        fake.FakeHIT(
+            hit_id='HIT{}'.format(each),
+            max_assignments=1,
+            annotation='batch-{}'.format(each % NUM_BATCHES)
+        )
+        for each in range(scale)
+    ]
+
+
+def make_assignments(scale):
+    """Create submitted assignments.
+
+    :rtype: list of turkleton.fake.FakeAssignment
+    """
+    submit_time = datetime.datetime(2015, 6, 15, 12)
+    accept_time = submit_time - datetime.timedelta(minutes=1)
+    return [
+        fake.FakeAssignment(
+            assignment_id='A{}'.format(each),
+            hit_id='HIT{}'.format(each),
+            worker_id='W{}'.format(each % 100),
+            answer_values=make_answer_values(each),
+            accept_time=accept_time,
+            submit_time=submit_time
+        )
+        for each in range(scale)
+    ]
+
+
+def make_connection_with_hits(scale, uploads=0):
+    """Create a fake connection already holding HITs, with a balance that
+    pays for the given number of BenchmarkTask uploads.
+
+    :rtype: turkleton.fake.FakeMTurkConnection
+    """
+    cost = budget.hit_cost(
+        BenchmarkTask.__reward__, BenchmarkTask.__assignments_per_hit__
+    )
+    fake_connection = fake.FakeMTurkConnection(balance=cost * uploads)
+    for each in make_hits(scale):
+        fake_connection.add_hit(each)
+    return fake_connection
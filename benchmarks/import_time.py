@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.import_time
+    ~~~~~~~~~~~~~~~~~~~~~~
+    Measure how long importing turkleton modules takes in a fresh interpreter,
+    and whether doing so pulls in boto.
+
+    Usage: python -m benchmarks.import_time [repeat]
+
+"""
+import subprocess
+import sys
+
+
+#: Modules imported by short-lived jobs
+MODULES = [
+    'turkleton.connection',
+    'turkleton.assignment.assignment',
+    'turkleton.assignment.task',
+    'boto.mturk.connection'
+]
+#: Script printing the seconds taken by an import and whether boto loaded
+SCRIPT = (
+    'import sys, time; start = time.time(); import {}; '
+    'print(time.time() - start); print("boto" in sys.modules)'
+)
+
+
+def time_import(module_name):
+    """Import a module in a fresh interpreter.
+
+    :param module_name: A module name
+    :type module_name: str
+    :rtype: (float, bool) with the seconds taken and whether boto was imported
+    """
+    output = subprocess.check_output(
+        [sys.executable, '-c', SCRIPT.format(module_name)]
+    ).decode('utf-8').split()
+    return float(output[0]), output[1] == 'True'
+
+
+def main(repeat=10):
+    for module_name in MODULES:
+        timings = []
+        for _ in range(repeat):
+            seconds, imported_boto = time_import(module_name)
+            timings.append(seconds)
+        timings.sort()
+        print('{}: median {:.2f}ms, boto imported: {}'.format(
+            module_name, timings[len(timings) // 2] * 1000, imported_boto
+        ))
+
+
+if __name__ == '__main__':
+    main(*[int(each) for each in sys.argv[1:]])
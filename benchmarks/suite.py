@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.suite
+    ~~~~~~~~~~~~~~~~
+    Benchmarks for turkleton's hot paths. Results are written as JSON so runs
+    from different versions can be compared with benchmarks.compare.
+
+    Usage: python -m benchmarks.suite [--scale 1k,100k] [--output FILE]
+
+"""
+import argparse
+import collections
+import gc
+import io
+import json
+import platform
+import sys
+import time
+
+import turkleton
+from turkleton import connection
+from turkleton.assignment import hit
+from turkleton.assignment import parser
+from turkleton.assignment import task
+
+from benchmarks import data
+
+
+#: Named scales for synthetic data
+SCALES = collections.OrderedDict([
+    ('1k', 1000),
+    ('100k', 100000),
+    ('1m', 1000000)
+])
+#: Benchmarks in the order they are run, each created with @benchmark
+BENCHMARKS = collections.OrderedDict()
+
+
+def benchmark(func):
+    """Register a benchmark. The function takes the number of items and
+    prepares its data, returning a function that performs the measured work.
+    """
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+@benchmark
+def task_upload(scale):
+    connection.set_connection(data.make_connection_with_hits(0, scale))
+    tasks = [
+        data.BenchmarkTask(**data.make_layout_params(each))
+        for each in range(scale)
+    ]
+
+    def run():
+        with task.batched_upload('batch-0'):
+            for each in tasks:
+                each.upload()
+    return run
+
+
+@benchmark
+def dict_to_layout_parameters(scale):
+    params = [data.make_layout_params(each) for each in range(scale)]
+
+    def run():
+        for each in params:
+            task.dict_to_layout_parameters(each)
+    return run
+
+
+@benchmark
+def transform_raw_hits(scale):
+    raw_hits = data.make_hits(scale)
+
+    def run():
+        for _ in hit.transform_raw_hits(raw_hits):
+            pass
+    return run
+
+
+@benchmark
+def get_all_by_batch_id(scale):
+    connection.set_connection(data.make_connection_with_hits(scale))
+
+    def run():
+        for _ in hit.get_all_by_batch_id('batch-0'):
+            pass
+    return run
+
+
+@benchmark
+def assignment_construction(scale):
+    raw_assignments = data.make_assignments(scale)
+
+    def run():
+        for each in raw_assignments:
+            data.BenchmarkAssignment(each)
+    return run
+
+
+@benchmark
+def assignment_stream_parsing(scale):
+    fake_connection = data.make_connection_with_hits(1)
+    fake_connection.hits['HIT0'].MaxAssignments = scale
+    for each in data.make_assignments(scale):
+        each.HITId = 'HIT0'
+        fake_connection.add_assignment(each)
+    body = fake_connection.make_request(None, {
+        'Operation': 'GetAssignmentsForHIT',
+        'HITId': 'HIT0',
+        'PageSize': scale
+    }).read()
+
+    def run():
+        for each in parser.iter_assignments(io.BytesIO(body)):
+            data.BenchmarkAssignment(each)
+    return run
+
+
+def run_benchmark(name, scale, repeat):
+    """Run a single benchmark, returning its best time over repeat runs.
+
+    :rtype: dict
+    """
+    timings = []
+    for _ in range(repeat):
+        func = BENCHMARKS[name](scale)
+        gc.collect()
+        start = time.time()
+        func()
+        timings.append(time.time() - start)
+
+    return {
+        'name': name,
+        'scale': scale,
+        'seconds': min(timings),
+        'per_item_us': min(timings) / scale * 1e6
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument(
+        '--scale', default='1k',
+        help='Comma separated scales from {}'.format(', '.join(SCALES))
+    )
+    arg_parser.add_argument(
+        '--only', default=None,
+        help='Comma separated benchmarks from {}'.format(
+            ', '.join(BENCHMARKS)
+        )
+    )
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--output', default=None)
+    args = arg_parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    results = []
+    for scale_name in args.scale.split(','):
+        for name in names:
+            result = run_benchmark(name, SCALES[scale_name], args.repeat)
+            sys.stderr.write('{name} @ {scale}: {seconds:.4f}s\n'.format(
+                **result
+            ))
+            results.append(result)
+
+    report = {
+        'turkleton_version': turkleton.__version__,
+        'python_version': platform.python_version(),
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -33,12 +33,18 @@ setup(
     url='https://github.com/etscrivner/turkleton',
     packages=[
         'turkleton',
-        'turkleton.assignment'
+        'turkleton.assignment',
+        'turkleton.backends'
     ],
     package_dir={
         'turkleton': 'turkleton'
     },
     include_package_data=True,
+    entry_points={
+        'console_scripts': [
+            'turkleton = turkleton.cli:main'
+        ]
+    },
     install_requires=requirements,
     license="BSD",
     zip_safe=False,
@@ -6,6 +6,7 @@
 
 """
 import uuid
+from xml.sax import saxutils
 
 import mock
 
@@ -70,3 +71,54 @@ def make_boto_hit(hit_id=None, batch_id=None):
     hit.HITId = (hit_id if hit_id else str(uuid.uuid4()))
     hit.RequesterAnnotation = (batch_id if batch_id else str(uuid.uuid4()))
     return hit
+
+
+def make_answer_xml(values):
+    """Create a QuestionFormAnswers document answering each question with the
+    given value.
+
+    :param values: A dictionary mapping question names to values
+    :type values: dict
+    :rtype: str
+    """
+    answers = ''.join(
+        '<Answer><QuestionIdentifier>{}</QuestionIdentifier>'
+        '<FreeText>{}</FreeText></Answer>'.format(
+            saxutils.escape(key), saxutils.escape(value)
+        )
+        for key, value in values.items()
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<QuestionFormAnswers xmlns="http://mechanicalturk.amazonaws.com/'
+        'AWSMechanicalTurkDataSchemas/2005-10-01/QuestionFormAnswers.xsd">'
+        '{}</QuestionFormAnswers>'.format(answers)
+    )
+
+
+def make_assignments_response(all_values):
+    """Create the body of a GetAssignmentsForHIT response containing one
+    assignment for each of the given answer dictionaries.
+
+    :param all_values: A list of dictionaries mapping question names to values
+    :type all_values: list of dict
+    :rtype: bytes
+    """
+    assignments = ''.join(
+        '<Assignment><AssignmentId>{}</AssignmentId><WorkerId>{}</WorkerId>'
+        '<HITId>{}</HITId><AssignmentStatus>Submitted</AssignmentStatus>'
+        '<Answer>{}</Answer></Assignment>'.format(
+            uuid.uuid4(), uuid.uuid4(), uuid.uuid4(),
+            saxutils.escape(make_answer_xml(values))
+        )
+        for values in all_values
+    )
+    return (
+        '<GetAssignmentsForHITResponse><GetAssignmentsForHITResult>'
+        '<Request><IsValid>True</IsValid></Request>'
+        '<NumResults>{0}</NumResults><TotalNumResults>{0}</TotalNumResults>'
+        '<PageNumber>1</PageNumber>{1}'
+        '</GetAssignmentsForHITResult></GetAssignmentsForHITResponse>'.format(
+            len(all_values), assignments
+        )
+    ).encode('utf-8')
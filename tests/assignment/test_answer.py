@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import decimal
+import pickle
 import unittest
 
 from turkleton.assignment import answer
@@ -40,6 +41,16 @@ class TestBaseAnswer(unittest.TestCase):
         inst.prop = 123
         self.assertEqual(123, inst.prop)
 
+    def test_should_return_descriptor_from_class(self):
+        self.assertIsInstance(
+            self.DescriptorTestClass.prop, answer.BaseAnswer
+        )
+
+    def test_should_store_values_on_object(self):
+        inst = self.DescriptorTestClass()
+        inst.prop = 123
+        self.assertIn(123, vars(inst).values())
+
     def test_should_preserve_values_across_separate_instances(self):
         inst1 = self.DescriptorTestClass()
         inst1.prop = '1'
@@ -49,6 +60,64 @@ class TestBaseAnswer(unittest.TestCase):
         self.assertEqual('2', inst2.prop)
 
 
+class TestPickle(unittest.TestCase):
+
+    def test_should_keep_empty_marker_identity(self):
+        self.assertIs(
+            answer.BaseAnswer._EMPTY,
+            pickle.loads(pickle.dumps(answer.BaseAnswer._EMPTY))
+        )
+
+    def test_should_pickle_descriptor_reading_values_of_objects(self):
+        class DescriptorTestClass(object):
+            choices = answer.MultiChoiceAnswer('Derp')
+
+        inst = DescriptorTestClass()
+        inst.choices = 'Hand|Foot'
+        result = pickle.loads(
+            pickle.dumps(DescriptorTestClass.__dict__['choices'])
+        )
+        self.assertEqual(
+            ['Hand', 'Foot'], result.__get__(inst, DescriptorTestClass)
+        )
+        self.assertIs(answer.BaseAnswer._EMPTY, result.convert(''))
+
+
+class TestSetRaw(unittest.TestCase):
+
+    class DescriptorTestClass(object):
+        """Class for testing deferred conversion of raw values"""
+        prop = answer.IntegerAnswer('Herp', 0)
+        choices = answer.MultiChoiceAnswer('Derp')
+
+    def setUp(self):
+        super(TestSetRaw, self).setUp()
+        self.descriptor_class = self.DescriptorTestClass()
+        self.prop = self.DescriptorTestClass.__dict__['prop']
+        self.choices = self.DescriptorTestClass.__dict__['choices']
+
+    def test_should_not_convert_raw_value_until_accessed(self):
+        self.prop.set_raw(self.descriptor_class, '123')
+        self.assertIs(
+            answer.BaseAnswer._EMPTY,
+            self.prop.value_store[self.descriptor_class]
+        )
+
+    def test_should_convert_raw_value_when_accessed(self):
+        self.prop.set_raw(self.descriptor_class, '123')
+        self.assertEqual(123, self.descriptor_class.prop)
+        self.assertNotIn(self.descriptor_class, self.prop.raw_store)
+
+    def test_should_convert_raw_multi_choice_value_when_accessed(self):
+        self.choices.set_raw(self.descriptor_class, 'Hand|Foot')
+        self.assertEqual(['Hand', 'Foot'], self.descriptor_class.choices)
+
+    def test_should_prefer_explicitly_set_value_over_raw_value(self):
+        self.prop.set_raw(self.descriptor_class, '123')
+        self.descriptor_class.prop = 456
+        self.assertEqual(456, self.descriptor_class.prop)
+
+
 class TestBooleanAnswer(unittest.TestCase):
 
     class DescriptorTestClass(object):
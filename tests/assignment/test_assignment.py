@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import io
 import unittest
 
 import mock
@@ -7,6 +8,8 @@ from tests.assignment import factories
 from turkleton import connection
 from turkleton.assignment import answer
 from turkleton.assignment import assignment
+from turkleton.assignment import parser
+from turkleton.backends import boto2
 
 
 class FakeAssignment(assignment.BaseAssignment):
@@ -94,6 +97,32 @@ class TestGetAnswerToQuestion(unittest.TestCase):
         self.assertEqual(self.assignment_fixture['Age'], result)
 
 
+class TestGetAnswerTable(unittest.TestCase):
+
+    def setUp(self):
+        super(TestGetAnswerTable, self).setUp()
+        self.assignment_fixture = {'Age': '29', 'IsOld': '1'}
+
+    def test_should_return_empty_dictionary_if_none_given(self):
+        self.assertEqual({}, assignment.get_answer_table(None))
+
+    def test_should_return_answers_from_boto_assignment(self):
+        self.assertEqual(
+            self.assignment_fixture,
+            assignment.get_answer_table(
+                factories.make_boto_assignment(self.assignment_fixture)
+            )
+        )
+
+    def test_should_return_answers_from_parsed_assignment(self):
+        parsed = parser.ParsedAssignment(
+            answer_table=self.assignment_fixture
+        )
+        self.assertEqual(
+            self.assignment_fixture, assignment.get_answer_table(parsed)
+        )
+
+
 class TestBaseAssignment(BaseAssignmentTestCase):
 
     def test_should_correctly_initialize_is_old(self):
@@ -124,6 +153,32 @@ class TestBaseAssignment(BaseAssignmentTestCase):
         )
 
 
+class TestLazyAnswers(BaseAssignmentTestCase):
+
+    def setUp(self):
+        super(TestLazyAnswers, self).setUp()
+        self.lazy_assignment = FakeAssignment(
+            self.boto_assignment_fixture, lazy=True
+        )
+
+    def test_should_defer_conversion_of_answers(self):
+        self.assertIn(
+            self.lazy_assignment, FakeAssignment.__dict__['is_old'].raw_store
+        )
+
+    def test_should_convert_answers_when_accessed(self):
+        self.assertFalse(self.lazy_assignment.is_old)
+        self.assertEqual(
+            self.assignment_fixture['Categories'].split('|'),
+            self.lazy_assignment.categories
+        )
+
+    def test_should_use_class_default_when_not_given(self):
+        with mock.patch.object(FakeAssignment, '__lazy_answers__', True):
+            result = FakeAssignment(self.boto_assignment_fixture)
+        self.assertIn(result, FakeAssignment.__dict__['age'].raw_store)
+
+
 class TestApprove(BaseAssignmentTestCase):
 
     def test_should_pass_correct_information_to_boto_connection(self):
@@ -148,6 +203,143 @@ class TestReject(BaseAssignmentTestCase):
         )
 
 
+class TestApproveMany(BaseAssignmentTestCase):
+
+    def setUp(self):
+        super(TestApproveMany, self).setUp()
+        self.mock_connection = mock.MagicMock()
+        connection.set_connection(self.mock_connection)
+        self.assignments = [
+            FakeAssignment(factories.make_boto_assignment(
+                self.assignment_fixture
+            ))
+            for _ in range(5)
+        ]
+
+    def test_should_approve_each_assignment(self):
+        FakeAssignment.approve_many(
+            [(each, 'Good job!') for each in self.assignments]
+        )
+        self.assertEqual(
+            set(each.assignment_id for each in self.assignments),
+            set(
+                each[0][0] for each
+                in self.mock_connection.approve_assignment.call_args_list
+            )
+        )
+
+    def test_should_report_per_item_failures(self):
+        self.mock_connection.approve_assignment.side_effect = [
+            None, ValueError('Herp'), None, None, None
+        ]
+        result = FakeAssignment.approve_many(
+            [(each, 'Good job!') for each in self.assignments], max_workers=1
+        )
+        self.assertEqual(
+            [True, False, True, True, True],
+            [each.succeeded for each in result]
+        )
+        self.assertIs(self.assignments[1], result[1].item[0])
+
+
+class TestRejectMany(BaseAssignmentTestCase):
+
+    def test_should_reject_each_assignment_with_message(self):
+        mock_connection = mock.MagicMock()
+        connection.set_connection(mock_connection)
+        result = FakeAssignment.reject_many([(self.fake_assignment, 'Bad')])
+        self.assertTrue(result[0].succeeded)
+        mock_connection.reject_assignment.assert_called_once_with(
+            self.fake_assignment.assignment_id, 'Bad'
+        )
+
+
+class TestGetBonusToken(unittest.TestCase):
+
+    def test_should_return_same_token_for_same_assignment(self):
+        self.assertEqual(
+            assignment.get_bonus_token('1234'),
+            assignment.get_bonus_token('1234')
+        )
+
+    def test_should_return_different_tokens_for_different_keys(self):
+        self.assertNotEqual(
+            assignment.get_bonus_token('1234'),
+            assignment.get_bonus_token('1234', 'second')
+        )
+
+    def test_should_fit_within_token_length_limit(self):
+        self.assertLessEqual(len(assignment.get_bonus_token('1' * 100)), 64)
+
+
+class TestGrantBonus(BaseAssignmentTestCase):
+
+    def setUp(self):
+        super(TestGrantBonus, self).setUp()
+        self.mock_connection = mock.MagicMock()
+        connection.set_connection(self.mock_connection)
+
+    def test_should_pass_correct_information_to_connection(self):
+        self.fake_assignment.grant_bonus(0.25, 'Great work!')
+        args = self.mock_connection.grant_bonus.call_args[0]
+        self.assertEqual(self.fake_assignment.worker_id, args[0])
+        self.assertEqual(self.fake_assignment.assignment_id, args[1])
+        self.assertEqual(0.25, args[2].amount)
+        self.assertEqual('USD', args[2].currency_code)
+        self.assertEqual('Great work!', args[3])
+
+    def test_should_pass_unique_request_token(self):
+        self.fake_assignment.grant_bonus(0.25, 'Great work!', key='second')
+        self.assertEqual(
+            assignment.get_bonus_token(
+                self.fake_assignment.assignment_id, 'second'
+            ),
+            self.mock_connection.grant_bonus.call_args[1][
+                'unique_request_token'
+            ]
+        )
+
+
+class TestGrantBonusMany(BaseAssignmentTestCase):
+
+    def test_should_report_per_item_outcomes(self):
+        mock_connection = mock.MagicMock()
+        mock_connection.grant_bonus.side_effect = [
+            None, ValueError('Herp')
+        ]
+        connection.set_connection(mock_connection)
+        result = FakeAssignment.grant_bonus_many([
+            (self.fake_assignment, 0.25, 'Great work!', 'first'),
+            (self.fake_assignment, 0.50, 'Great work!', 'second')
+        ], max_workers=1)
+        self.assertEqual([True, False], [each.succeeded for each in result])
+
+    def test_should_pay_distinct_bonuses_for_same_assignment(self):
+        mock_connection = mock.MagicMock()
+        connection.set_connection(mock_connection)
+        result = FakeAssignment.grant_bonus_many([
+            (self.fake_assignment, 0.25, 'Great work!'),
+            (self.fake_assignment, 0.50, 'Even better!', 'second')
+        ], max_workers=1)
+        self.assertEqual([True, True], [each.succeeded for each in result])
+        tokens = set(
+            each[1]['unique_request_token']
+            for each in mock_connection.grant_bonus.call_args_list
+        )
+        self.assertEqual(2, len(tokens))
+
+    def test_should_fail_repeated_bonus_without_distinct_key(self):
+        mock_connection = mock.MagicMock()
+        connection.set_connection(mock_connection)
+        result = FakeAssignment.grant_bonus_many([
+            (self.fake_assignment, 0.25, 'Great work!'),
+            (self.fake_assignment, 0.50, 'Even better!')
+        ], max_workers=1)
+        self.assertEqual([True, False], [each.succeeded for each in result])
+        self.assertIsInstance(result[1].error, ValueError)
+        self.assertEqual(1, mock_connection.grant_bonus.call_count)
+
+
 class TestGetByHitId(BaseAssignmentTestCase):
 
     def setUp(self):
@@ -171,3 +363,104 @@ class TestGetByHitId(BaseAssignmentTestCase):
         self.assertTrue(
             all([isinstance(each, FakeAssignment) for each in result])
         )
+
+
+class TestStreamByHitId(BaseAssignmentTestCase):
+
+    def setUp(self):
+        super(TestStreamByHitId, self).setUp()
+        self.mock_connection = mock.MagicMock()
+        self.mock_connection.make_request.side_effect = [
+            io.BytesIO(factories.make_assignments_response(
+                [self.assignment_fixture, self.assignment_fixture]
+            )),
+            io.BytesIO(factories.make_assignments_response(
+                [self.assignment_fixture]
+            ))
+        ]
+        connection.set_connection(boto2.Boto2Backend(self.mock_connection))
+
+    def test_should_request_pages_until_a_partial_page_is_returned(self):
+        list(FakeAssignment.stream_by_hit_id('1234', page_size=2))
+        self.assertEqual(2, self.mock_connection.make_request.call_count)
+
+    def test_should_request_assignments_for_hit(self):
+        list(FakeAssignment.stream_by_hit_id('1234', page_size=2))
+        params = self.mock_connection.make_request.call_args[0][1]
+        self.assertEqual('GetAssignmentsForHIT', params['Operation'])
+        self.assertEqual('1234', params['HITId'])
+        self.assertEqual(2, params['PageNumber'])
+
+    def test_should_parse_answers_of_each_assignment(self):
+        result = list(FakeAssignment.stream_by_hit_id('1234', page_size=2))
+        self.assertEqual(3, len(result))
+        self.assertTrue(all(each.age == '29' for each in result))
+        self.assertTrue(all(each.is_old is False for each in result))
+
+
+class TestPoolParse(unittest.TestCase):
+
+    def test_should_wrap_assignment_class_around_each_result(self):
+        raw_assignments = [
+            ('a', 'h', 'w', factories.make_answer_xml({
+                'Age': '29', 'IsOld': '1', 'Categories': 'Front|Back'
+            }))
+        ]
+        result = list(FakeAssignment.pool_parse(raw_assignments, processes=1))
+        self.assertEqual(1, len(result))
+        self.assertEqual('a', result[0].assignment_id)
+        self.assertEqual('29', result[0].age)
+        self.assertTrue(result[0].is_old)
+        self.assertEqual(['Front', 'Back'], result[0].categories)
+
+    def test_should_not_convert_answers_converted_by_workers(self):
+        parsed = parser.ParsedAssignment(
+            answer_table={'Categories': ['Front'], 'IsOld': False}
+        )
+        parsed.converted_questions = frozenset(['Categories', 'IsOld'])
+        with mock.patch.object(
+                answer.MultiChoiceAnswer, 'convert',
+                side_effect=AssertionError):
+            result = FakeAssignment(parsed)
+        self.assertEqual(['Front'], result.categories)
+        self.assertFalse(result.is_old)
+
+    def test_should_convert_customized_answers_in_this_process(self):
+        class CustomAnswer(answer.TextAnswer):
+            def __set__(self, obj, val):
+                super(CustomAnswer, self).__set__(obj, val)
+
+        self.assertIsNone(assignment.get_converter(CustomAnswer('A', None)))
+        descriptor = answer.IntegerAnswer('A', None)
+        self.assertIs(descriptor, assignment.get_converter(descriptor))
+
+
+class TestNamedConnection(BaseAssignmentTestCase):
+
+    def setUp(self):
+        super(TestNamedConnection, self).setUp()
+        self.named_connection = mock.MagicMock()
+        self.named_connection.get_assignments.return_value = [
+            self.boto_assignment_fixture
+        ]
+        connection.set_connection(mock.MagicMock())
+        connection.set_connection(self.named_connection, 'sandbox')
+
+    def tearDown(self):
+        super(TestNamedConnection, self).tearDown()
+        connection.named_connections.clear()
+
+    def test_should_review_with_connection_assignment_came_from(self):
+        result = FakeAssignment.get_by_hit_id('1234', 'sandbox')
+        result[0].approve('Thanks')
+        self.named_connection.approve_assignment.assert_called_once_with(
+            result[0].assignment_id, 'Thanks'
+        )
+
+    def test_should_use_class_connection_by_default(self):
+        class SandboxAssignment(FakeAssignment):
+            __connection__ = 'sandbox'
+
+        result = SandboxAssignment.get_by_hit_id('1234')
+        self.assertEqual('sandbox', result[0].connection_name)
+        self.named_connection.get_assignments.assert_called_once_with('1234')
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import decimal
+import unittest
+
+from tests.assignment import factories
+from turkleton.assignment import answer
+from turkleton.assignment import assignment
+from turkleton.assignment import consensus
+
+
+class ConsensusAssignment(assignment.BaseAssignment):
+    """Assignment used for testing consensus"""
+    category = answer.SingleChoiceAnswer('Category', None)
+    is_blurry = answer.BooleanAnswer('IsBlurry', None)
+    tags = answer.MultiChoiceAnswer('Tags')
+    age = answer.IntegerAnswer('Age', None)
+    notes = answer.TextAnswer('Notes', None)
+
+
+def make_assignment(hit_id, values):
+    boto_assignment = factories.make_boto_assignment(values)
+    boto_assignment.HITId = hit_id
+    return ConsensusAssignment(boto_assignment)
+
+
+class TestMedianAggregator(unittest.TestCase):
+
+    def test_should_return_middle_value_for_odd_count(self):
+        aggregator = consensus.MedianAggregator()
+        for each in [5, 1, 3]:
+            aggregator.add(each)
+        self.assertEqual(3, aggregator.result())
+
+    def test_should_average_middle_values_for_even_count(self):
+        aggregator = consensus.MedianAggregator()
+        for each in [decimal.Decimal('1'), decimal.Decimal('2')]:
+            aggregator.add(each)
+        self.assertEqual(decimal.Decimal('1.5'), aggregator.result())
+
+
+class TestVoteAggregator(unittest.TestCase):
+
+    def test_should_return_most_common_value(self):
+        aggregator = consensus.VoteAggregator()
+        for each in ['Cat', 'Dog', 'Cat']:
+            aggregator.add(each)
+        self.assertEqual('Cat', aggregator.result())
+
+    def test_should_not_reach_consensus_on_tie(self):
+        aggregator = consensus.VoteAggregator()
+        for each in ['Cat', 'Dog']:
+            aggregator.add(each)
+        self.assertIsNone(aggregator.result())
+
+
+class TestGetAggregatorClass(unittest.TestCase):
+
+    def test_should_not_aggregate_free_text(self):
+        self.assertIsNone(consensus.get_aggregator_class(
+            ConsensusAssignment.__dict__['notes']
+        ))
+
+    def test_should_use_requested_numeric_aggregation(self):
+        self.assertIs(
+            consensus.MeanAggregator,
+            consensus.get_aggregator_class(
+                ConsensusAssignment.__dict__['age'], 'mean'
+            )
+        )
+
+
+class TestConsensusEngine(unittest.TestCase):
+
+    def setUp(self):
+        super(TestConsensusEngine, self).setUp()
+        self.engine = consensus.ConsensusEngine(ConsensusAssignment, 3)
+        self.assignments = [
+            make_assignment('1234', {
+                'Category': 'Cat', 'IsBlurry': '1', 'Tags': 'a|b',
+                'Age': '3', 'Notes': 'x'
+            }),
+            make_assignment('1234', {
+                'Category': 'Cat', 'IsBlurry': '0', 'Tags': 'a',
+                'Age': '4', 'Notes': 'y'
+            }),
+            make_assignment('1234', {
+                'Category': 'Dog', 'IsBlurry': '1', 'Tags': 'a|b',
+                'Age': '8', 'Notes': 'z'
+            })
+        ]
+
+    def test_should_raise_error_for_unknown_numeric_aggregation(self):
+        with self.assertRaises(consensus.ConsensusEngine.ConsensusError):
+            consensus.ConsensusEngine(ConsensusAssignment, 3, 'mode')
+
+    def test_should_not_emit_result_before_target_redundancy(self):
+        self.assertIsNone(self.engine.add(self.assignments[0]))
+        self.assertIsNone(self.engine.add(self.assignments[1]))
+
+    def test_should_emit_result_when_target_redundancy_reached(self):
+        results = list(self.engine.consume(self.assignments))
+        self.assertEqual(1, len(results))
+        self.assertEqual('1234', results[0].hit_id)
+        self.assertEqual({}, self.engine.pending)
+
+    def test_should_compute_consensus_answers(self):
+        result = list(self.engine.consume(self.assignments))[0]
+        self.assertEqual('Cat', result.answers['category'])
+        self.assertTrue(result.answers['is_blurry'])
+        self.assertEqual(['a', 'b'], result.answers['tags'])
+        self.assertEqual(4, result.answers['age'])
+        self.assertNotIn('notes', result.answers)
+
+    def test_should_compute_agreement(self):
+        result = list(self.engine.consume(self.assignments))[0]
+        self.assertAlmostEqual(2.0 / 3, result.agreement['category'])
+        self.assertNotIn('age', result.agreement)
+        self.assertEqual(
+            1.0, result.worker_agreement[self.assignments[0].worker_id]
+        )
+
+    def test_should_ignore_repeated_assignments(self):
+        self.engine.add(self.assignments[0])
+        self.assertIsNone(self.engine.add(self.assignments[0]))
+        self.assertEqual(
+            1, len(self.engine.pending['1234'].assignment_ids)
+        )
+
+    def test_should_ignore_assignments_of_completed_hits(self):
+        list(self.engine.consume(self.assignments))
+        self.assertIsNone(self.engine.add(self.assignments[0]))
+        self.assertEqual({}, self.engine.pending)
+        self.assertEqual([], self.engine.flush())
+
+    def test_should_flush_incomplete_hits(self):
+        self.engine.add(self.assignments[0])
+        results = self.engine.flush()
+        self.assertEqual(1, len(results))
+        self.assertEqual('Cat', results[0].answers['category'])
+        self.assertEqual({}, self.engine.pending)
+
+    def test_should_raise_error_completing_unknown_hit(self):
+        with self.assertRaises(consensus.ConsensusEngine.ConsensusError):
+            self.engine.complete('4567')
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import csv
+import decimal
+import gc
+import json
+import unittest
+import weakref
+
+import six
+
+from tests.assignment import factories
+from turkleton.assignment import answer
+from turkleton.assignment import assignment
+from turkleton.assignment import export
+
+
+class ExportAssignment(assignment.BaseAssignment):
+    """Assignment used for testing exports"""
+    age = answer.IntegerAnswer('Age', None)
+    categories = answer.MultiChoiceAnswer('Categories')
+    weight = answer.DecimalAnswer('Weight', None)
+
+
+class BaseExportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(BaseExportTestCase, self).setUp()
+        self.assignments = [
+            ExportAssignment(factories.make_boto_assignment({
+                'Age': '29', 'Categories': 'Front|WaistUp', 'Weight': '72.5'
+            })),
+            ExportAssignment(factories.make_boto_assignment({
+                'Age': '31', 'Categories': '', 'Weight': '80'
+            }))
+        ]
+        self.output = six.StringIO()
+
+
+class TestGetColumns(unittest.TestCase):
+
+    def test_should_start_with_assignment_columns(self):
+        self.assertEqual(
+            export.ASSIGNMENT_COLUMNS,
+            export.get_columns(ExportAssignment)[:3]
+        )
+
+    def test_should_include_answer_attributes_in_sorted_order(self):
+        self.assertEqual(
+            ['age', 'categories', 'weight'],
+            export.get_columns(ExportAssignment)[3:]
+        )
+
+
+class TestWriteCsv(BaseExportTestCase):
+
+    def read_rows(self):
+        return list(csv.reader(six.StringIO(self.output.getvalue())))
+
+    def test_should_write_header_row(self):
+        export.write_csv(ExportAssignment, self.assignments, self.output)
+        self.assertEqual(
+            export.get_columns(ExportAssignment), self.read_rows()[0]
+        )
+
+    def test_should_write_row_for_each_assignment(self):
+        result = export.write_csv(
+            ExportAssignment, self.assignments, self.output
+        )
+        self.assertEqual(2, result)
+        self.assertEqual(3, len(self.read_rows()))
+
+    def test_should_format_answer_values(self):
+        export.write_csv(ExportAssignment, self.assignments, self.output)
+        row = self.read_rows()[1]
+        self.assertEqual(self.assignments[0].assignment_id, row[0])
+        self.assertEqual(['29', 'Front|WaistUp', '72.5'], row[3:])
+
+    def test_should_accept_generator_of_assignments(self):
+        result = export.write_csv(
+            ExportAssignment, (each for each in self.assignments), self.output
+        )
+        self.assertEqual(2, result)
+
+    def test_should_not_keep_exported_assignments(self):
+        references = []
+
+        def make_assignments():
+            for index in range(100):
+                assignment = ExportAssignment(factories.make_boto_assignment({
+                    'Age': str(index), 'Categories': '', 'Weight': '1'
+                }))
+                references.append(weakref.ref(assignment))
+                yield assignment
+
+        export.write_csv(ExportAssignment, make_assignments(), self.output)
+        gc.collect()
+        self.assertEqual(
+            [], [each for each in references if each() is not None]
+        )
+
+
+class TestWriteJsonl(BaseExportTestCase):
+
+    def read_rows(self):
+        return [
+            json.loads(each) for each in self.output.getvalue().splitlines()
+        ]
+
+    def test_should_write_object_for_each_assignment(self):
+        result = export.write_jsonl(
+            ExportAssignment, self.assignments, self.output
+        )
+        self.assertEqual(2, result)
+        self.assertEqual(2, len(self.read_rows()))
+
+    def test_should_format_answer_values(self):
+        export.write_jsonl(ExportAssignment, self.assignments, self.output)
+        row = self.read_rows()[0]
+        self.assertEqual(29, row['age'])
+        self.assertEqual(['Front', 'WaistUp'], row['categories'])
+        self.assertEqual('72.5', row['weight'])
+        self.assertEqual(self.assignments[0].worker_id, row['worker_id'])
+
+
+class TestExport(BaseExportTestCase):
+
+    def test_should_raise_error_for_unknown_format(self):
+        with self.assertRaisesRegexp(ValueError, 'Unknown export format'):
+            export.export(
+                ExportAssignment, self.assignments, self.output, 'xml'
+            )
+
+    def test_should_write_requested_format(self):
+        export.export(
+            ExportAssignment, self.assignments, self.output, 'jsonl'
+        )
+        self.assertEqual(
+            decimal.Decimal('80'),
+            decimal.Decimal(
+                json.loads(self.output.getvalue().splitlines()[1])['weight']
+            )
+        )
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import datetime
 import unittest
 
 import mock
@@ -6,6 +7,7 @@ import mock
 from tests.assignment import factories
 from turkleton import connection
 from turkleton import errors
+from turkleton import fake
 from turkleton.assignment import hit
 
 
@@ -50,6 +52,85 @@ class TestDispose(unittest.TestCase):
         )
 
 
+class TestExpireAndExtend(unittest.TestCase):
+
+    def setUp(self):
+        super(TestExpireAndExtend, self).setUp()
+        self.hit = hit.HIT.create_from_boto_hit(factories.make_boto_hit())
+        self.mock_connection = mock.MagicMock()
+        connection.set_connection(self.mock_connection)
+
+    def test_should_expire_hit(self):
+        self.hit.expire()
+        self.mock_connection.expire_hit.assert_called_once_with(
+            self.hit.hit_id
+        )
+
+    def test_should_extend_expiration_in_seconds(self):
+        self.hit.extend_expiration(datetime.timedelta(hours=1))
+        self.mock_connection.extend_hit.assert_called_once_with(
+            self.hit.hit_id, expiration_increment=3600
+        )
+
+    def test_should_add_assignments(self):
+        self.hit.add_assignments(2)
+        self.mock_connection.extend_hit.assert_called_once_with(
+            self.hit.hit_id, assignments_increment=2
+        )
+
+    def test_should_raise_error_if_hit_id_is_none(self):
+        self.hit.hit_id = None
+        with self.assertRaisesRegexp(
+                errors.Error, 'None HIT id for expiration.'):
+            self.hit.expire()
+
+
+class TestBatchOperations(unittest.TestCase):
+
+    def setUp(self):
+        super(TestBatchOperations, self).setUp()
+        self.fake_connection = fake.FakeMTurkConnection()
+        connection.set_connection(self.fake_connection)
+        self.hit_ids = [
+            factories.make_task().upload(batch_id=batch_id)[0].HITId
+            for batch_id in ('1234', '1234', '5678')
+        ]
+
+    def get_fake_hits(self):
+        return [self.fake_connection.hits[each] for each in self.hit_ids]
+
+    def test_should_expire_every_hit_in_batch(self):
+        result = hit.expire_batch('1234')
+        self.assertEqual(
+            self.hit_ids[:2], [each.item.hit_id for each in result]
+        )
+        self.assertEqual(
+            ['Reviewable', 'Reviewable', 'Assignable'],
+            [each.HITStatus for each in self.get_fake_hits()]
+        )
+
+    def test_should_extend_expiration_of_every_hit_in_batch(self):
+        before = [each.Expiration for each in self.get_fake_hits()]
+        hit.extend_batch_expiration('1234', datetime.timedelta(days=1))
+        after = [each.Expiration for each in self.get_fake_hits()]
+        self.assertEqual(
+            [datetime.timedelta(days=1)] * 2,
+            [after[i] - before[i] for i in range(2)]
+        )
+        self.assertEqual(before[2], after[2])
+
+    def test_should_add_assignments_to_every_hit_in_batch(self):
+        hit.add_assignments_to_batch('1234', 2)
+        self.assertEqual(
+            [3, 3, 1], [each.MaxAssignments for each in self.get_fake_hits()]
+        )
+
+    def test_should_report_per_hit_outcomes(self):
+        self.fake_connection.fail_next('expire_hit')
+        result = hit.expire_batch('1234', max_workers=1)
+        self.assertEqual([False, True], [each.succeeded for each in result])
+
+
 class TestTransformRawHits(unittest.TestCase):
 
     def test_should_return_empty_list_when_none_given(self):
@@ -141,3 +222,50 @@ class TestGetReviewableByBatchId(unittest.TestCase):
         result = hit.get_reviewable_by_batch_id('1234')
         self.assertEqual(1, len(result))
         self.assertEqual(result[0].hit_id, fake_hits[0].HITId)
+
+    def test_should_get_every_page_of_reviewable_hits(self):
+        fake_connection = fake.FakeMTurkConnection()
+        connection.set_connection(fake_connection)
+        for _ in range(25):
+            fake_connection.expire_hit(
+                fake_connection.create_hit(annotation='1234')[0].HITId
+            )
+        self.assertEqual(25, len(hit.get_reviewable_by_batch_id('1234')))
+        self.assertEqual(25, len(list(
+            hit.iter_reviewable_by_batch_id('1234', page_size=10)
+        )))
+        self.assertEqual(1 + 3, fake_connection.calls['get_reviewable_hits'])
+
+
+class TestNamedConnection(unittest.TestCase):
+
+    def setUp(self):
+        super(TestNamedConnection, self).setUp()
+        self.named_connection = fake.FakeMTurkConnection()
+        connection.set_connection(self.named_connection, 'sandbox')
+        connection.set_connection(fake.FakeMTurkConnection())
+        self.hit_id = self.named_connection.create_hit(
+            annotation='1234'
+        )[0].HITId
+
+    def tearDown(self):
+        super(TestNamedConnection, self).tearDown()
+        connection.named_connections.clear()
+
+    def test_should_get_hits_from_named_connection(self):
+        result = list(hit.get_all_by_batch_id('1234', 'sandbox'))
+        self.assertEqual([self.hit_id], [each.hit_id for each in result])
+        self.assertEqual('sandbox', result[0].connection_name)
+        self.assertEqual([], list(hit.get_all_by_batch_id('1234')))
+
+    def test_should_dispose_with_connection_of_hit(self):
+        self.named_connection.expire_hit(self.hit_id)
+        hit.get_reviewable_by_batch_id('1234', 'sandbox')[0].dispose()
+        self.assertEqual(
+            'Disposed', self.named_connection.hits[self.hit_id].HITStatus
+        )
+
+    def test_should_resolve_sharder_by_batch(self):
+        sharder = connection.BatchSharder(['sandbox'])
+        outcomes = hit.expire_batch('1234', connection_name=sharder)
+        self.assertEqual([True], [each.succeeded for each in outcomes])
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import io
+import unittest
+
+from tests.assignment import factories
+from turkleton.assignment import answer
+from turkleton.assignment import parser
+
+
+class TestParseAnswers(unittest.TestCase):
+
+    def test_should_return_empty_dictionary_for_none(self):
+        self.assertEqual({}, parser.parse_answers(None))
+
+    def test_should_return_answer_for_each_question(self):
+        fixture = {'Age': '29', 'Categories': 'Front|WaistUp'}
+        self.assertEqual(
+            fixture, parser.parse_answers(factories.make_answer_xml(fixture))
+        )
+
+    def test_should_unescape_answer_text(self):
+        fixture = {'Notes': 'Fish & <Chips>'}
+        self.assertEqual(
+            fixture, parser.parse_answers(factories.make_answer_xml(fixture))
+        )
+
+    def test_should_keep_first_selection_only(self):
+        answer_xml = (
+            '<QuestionFormAnswers><Answer>'
+            '<QuestionIdentifier>Color</QuestionIdentifier>'
+            '<SelectionIdentifier>Red</SelectionIdentifier>'
+            '<SelectionIdentifier>Blue</SelectionIdentifier>'
+            '</Answer></QuestionFormAnswers>'
+        )
+        self.assertEqual({'Color': 'Red'}, parser.parse_answers(answer_xml))
+
+
+class TestIterAssignments(unittest.TestCase):
+
+    def setUp(self):
+        super(TestIterAssignments, self).setUp()
+        self.values_fixture = [{'Age': '29'}, {'Age': '31'}]
+        self.response = io.BytesIO(
+            factories.make_assignments_response(self.values_fixture)
+        )
+
+    def test_should_return_each_assignment(self):
+        result = list(parser.iter_assignments(self.response))
+        self.assertEqual(2, len(result))
+
+    def test_should_parse_answers_of_each_assignment(self):
+        result = list(parser.iter_assignments(self.response))
+        self.assertEqual(
+            self.values_fixture, [each.answer_table for each in result]
+        )
+
+    def test_should_parse_assignment_fields(self):
+        result = next(parser.iter_assignments(self.response))
+        self.assertEqual('Submitted', result.AssignmentStatus)
+        self.assertIsNotNone(result.AssignmentId)
+        self.assertIsNone(result.ApprovalTime)
+
+    def test_should_raise_error_if_response_contains_error(self):
+        response = io.BytesIO(
+            b'<Response><Request><IsValid>False</IsValid><Errors><Error>'
+            b'<Code>AWS.BadRequest</Code><Message>Herp</Message>'
+            b'</Error></Errors></Request></Response>'
+        )
+        with self.assertRaisesRegexp(parser.ResponseError, 'Herp'):
+            list(parser.iter_assignments(response))
+
+
+class TestPoolParse(unittest.TestCase):
+
+    def setUp(self):
+        super(TestPoolParse, self).setUp()
+        self.values_fixture = [
+            {'Age': str(each), 'Notes': 'n{}'.format(each)}
+            for each in range(7)
+        ]
+        self.payloads = [
+            factories.make_answer_xml(each) for each in self.values_fixture
+        ]
+
+    def test_should_return_answer_tuples_in_order(self):
+        result = list(parser.pool_parse_answers(
+            self.payloads, ['Notes', 'Age'], processes=2, chunk_size=2
+        ))
+        self.assertEqual(
+            [(each['Notes'], each['Age']) for each in self.values_fixture],
+            result
+        )
+
+    def test_should_rebuild_assignments_with_identifiers(self):
+        raw_assignments = [
+            ('a{}'.format(i), 'h', 'w{}'.format(i), payload)
+            for i, payload in enumerate(self.payloads)
+        ]
+        result = list(parser.pool_parse_assignments(
+            raw_assignments, ['Age'], processes=2, chunk_size=3
+        ))
+        self.assertEqual(
+            ['a{}'.format(i) for i in range(7)],
+            [each.AssignmentId for each in result]
+        )
+        self.assertEqual({'Age': '6'}, result[6].answer_table)
+        self.assertEqual('w6', result[6].WorkerId)
+
+    def test_should_return_columns(self):
+        result = parser.pool_parse_columns(
+            self.payloads, ['Age'], processes=2, chunk_size=3
+        )
+        self.assertEqual({'Age': [str(each) for each in range(7)]}, result)
+
+    def test_should_convert_answers_in_workers(self):
+        result = list(parser.pool_parse_answers(
+            self.payloads, ['Age', 'Notes'], processes=2, chunk_size=2,
+            converters=[answer.IntegerAnswer('Age', None), None]
+        ))
+        self.assertEqual((6, 'n6'), result[6])
+
+    def test_should_mark_converted_questions(self):
+        raw_assignments = [('a', 'h', 'w', self.payloads[3])]
+        result = list(parser.pool_parse_assignments(
+            raw_assignments, ['Age', 'Notes'], processes=1,
+            converters=[answer.IntegerAnswer('Age', None), None]
+        ))
+        self.assertEqual({'Age': 3, 'Notes': 'n3'}, result[0].answer_table)
+        self.assertEqual(frozenset(['Age']), result[0].converted_questions)
+
+    def test_should_not_read_payloads_far_ahead_of_results(self):
+        consumed = []
+
+        def payloads():
+            for index in range(100):
+                consumed.append(index)
+                yield self.payloads[index % len(self.payloads)]
+
+        results = parser.pool_parse_answers(
+            payloads(), ['Age'], processes=1, chunk_size=1
+        )
+        next(results)
+        self.assertLessEqual(
+            len(consumed), parser.CHUNKS_IN_FLIGHT_PER_PROCESS + 1
+        )
+        results.close()
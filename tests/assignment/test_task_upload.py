@@ -6,6 +6,7 @@ import mock
 
 from tests.assignment import factories
 from turkleton import connection
+from turkleton import fake
 from turkleton.assignment import task
 
 
@@ -59,6 +60,9 @@ class TestTaskUpload(unittest.TestCase):
         }
         self.categorization_task = factories.make_task(self.params)
         self.mock_connection = mock.Mock()
+        self.mock_connection.register_hit_type.return_value = [
+            mock.Mock(HITTypeId='HITTYPE1')
+        ]
         self.expected_reward = price.Price(
             self.categorization_task.__reward__,
             self.categorization_task.__currency_code__
@@ -93,6 +97,21 @@ class TestTaskUpload(unittest.TestCase):
             self.mock_connection.create_hit.call_args[1][param_name]
         )
 
+    def assert_registered_with(self, param_name, expected_value):
+        """Assert that the HIT type was registered with the given parameter
+        set to the given value.
+
+        :param param_name: A param name
+        :type param_name: str or unicode
+        :param expected_value: The expected value
+        :type expected_value: mixed
+        """
+        self.mocked_upload()
+        self.assertEqual(
+            expected_value,
+            self.mock_connection.register_hit_type.call_args[1][param_name]
+        )
+
     def test_should_raise_validation_error_if_task_is_invalid(self):
         self.categorization_task.__layout_id__ = None
         with self.assertRaisesRegexp(
@@ -108,7 +127,7 @@ class TestTaskUpload(unittest.TestCase):
 
     def test_should_use_correct_reward_price(self):
         self.mocked_upload()
-        result = self.mock_connection.create_hit.call_args[1]['reward']
+        result = self.mock_connection.register_hit_type.call_args[1]['reward']
         self.assertEqual(self.expected_reward.amount, result.amount)
         self.assertEqual(
             self.expected_reward.currency_code,
@@ -116,17 +135,17 @@ class TestTaskUpload(unittest.TestCase):
         )
 
     def test_should_use_correct_title(self):
-        self.assert_upload_called_with(
+        self.assert_registered_with(
             'title', self.categorization_task.__title__
         )
 
     def test_should_use_correct_description(self):
-        self.assert_upload_called_with(
+        self.assert_registered_with(
             'description', self.categorization_task.__description__
         )
 
     def test_should_use_correct_keywords(self):
-        self.assert_upload_called_with(
+        self.assert_registered_with(
             'keywords', self.expected_keywords
         )
 
@@ -141,12 +160,12 @@ class TestTaskUpload(unittest.TestCase):
         )
 
     def test_should_use_correct_duration(self):
-        self.assert_upload_called_with(
+        self.assert_registered_with(
             'duration', self.categorization_task.__time_per_assignment__
         )
 
     def test_should_use_correct_approval_delay(self):
-        self.assert_upload_called_with(
+        self.assert_registered_with(
             'approval_delay', self.categorization_task.__auto_approval_delay__
         )
 
@@ -170,10 +189,96 @@ class TestTaskUpload(unittest.TestCase):
             result.get_as_params()
         )
 
+    def test_should_create_hit_with_registered_hit_type(self):
+        self.assert_upload_called_with('hit_type', 'HITTYPE1')
+
+    def test_should_register_hit_type_once_per_connection(self):
+        self.mocked_upload()
+        factories.make_task(self.params).upload()
+        self.assertEqual(1, self.mock_connection.register_hit_type.call_count)
+        self.assertEqual(2, self.mock_connection.create_hit.call_count)
+
+    def test_should_register_hit_type_again_on_new_connection(self):
+        self.mocked_upload()
+        new_connection = mock.Mock()
+        new_connection.register_hit_type.return_value = [
+            mock.Mock(HITTypeId='HITTYPE2')
+        ]
+        connection.set_connection(new_connection)
+        self.mocked_upload()
+        self.assertEqual(
+            'HITTYPE2', new_connection.create_hit.call_args[1]['hit_type']
+        )
+
+    def test_should_register_new_hit_type_if_properties_change(self):
+        self.mocked_upload()
+        self.categorization_task.__reward__ = 0.5
+        self.mocked_upload()
+        self.assertEqual(2, self.mock_connection.register_hit_type.call_count)
+
     def test_should_return_resulting_hit(self):
         result = self.mocked_upload()
         self.assertEqual(result, self.mock_connection.create_hit())
 
+    def test_should_not_hold_hit_type_lock_while_registering(self):
+        def register_hit_type(**kwargs):
+            self.assertTrue(task._hit_type_lock.acquire(False))
+            task._hit_type_lock.release()
+            return [mock.Mock(HITTypeId='HITTYPE1')]
+
+        self.mock_connection.register_hit_type.side_effect = register_hit_type
+        self.mocked_upload()
+        self.assertEqual(1, self.mock_connection.register_hit_type.call_count)
+
+    def test_should_recreate_hit_type_lock_in_new_process(self):
+        parent_lock = task._hit_type_lock
+        with parent_lock:
+            with mock.patch('os.getpid', return_value=-1):
+                connection.get_connection()
+            self.assertIsNot(parent_lock, task._hit_type_lock)
+            self.assertTrue(task._hit_type_lock.acquire(False))
+            task._hit_type_lock.release()
+
+
+class TestUploadConnection(unittest.TestCase):
+
+    def setUp(self):
+        super(TestUploadConnection, self).setUp()
+        self.connections = dict(
+            (name, fake.FakeMTurkConnection()) for name in ['a', 'b']
+        )
+        for name, each in self.connections.items():
+            connection.set_connection(each, name)
+        connection.set_connection(fake.FakeMTurkConnection())
+
+    def tearDown(self):
+        super(TestUploadConnection, self).tearDown()
+        connection.named_connections.clear()
+
+    def test_should_upload_with_task_connection(self):
+        task_inst = factories.make_task()
+        task_inst.__connection__ = 'b'
+        task_inst.upload(batch_id='1234')
+        self.assertEqual(1, len(self.connections['b'].hits))
+        self.assertEqual(0, len(connection.get_connection().hits))
+
+    def test_should_upload_with_given_connection(self):
+        factories.make_task().upload(batch_id='1234', connection_name='a')
+        self.assertEqual(1, len(self.connections['a'].hits))
+
+    def test_should_shard_uploads_by_batch(self):
+        sharder = connection.BatchSharder(['a', 'b'])
+        for batch_id in ['1', '2', '3', '4']:
+            task_inst = factories.make_task()
+            task_inst.__connection__ = sharder
+            task_inst.upload(batch_id=batch_id)
+        for name, each in self.connections.items():
+            self.assertEqual(
+                set(batch_id for batch_id in ['1', '2', '3', '4']
+                    if sharder(batch_id) == name),
+                set(hit.RequesterAnnotation for hit in each.hits.values())
+            )
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from tests.assignment import factories
+from turkleton.assignment import assignment
+from turkleton.assignment import consensus
+from turkleton.assignment import workers
+
+
+def make_assignment(worker_id, accept_time=None, submit_time=None):
+    boto_assignment = factories.make_boto_assignment({})
+    boto_assignment.WorkerId = worker_id
+    boto_assignment.AcceptTime = accept_time
+    boto_assignment.SubmitTime = submit_time
+    return assignment.BaseAssignment(boto_assignment)
+
+
+class TestGetWorkTime(unittest.TestCase):
+
+    def test_should_return_seconds_between_accept_and_submit(self):
+        result = workers.get_work_time(make_assignment(
+            '1234', '2015-06-15T12:00:00Z', '2015-06-15T12:01:30Z'
+        ))
+        self.assertEqual(90, result)
+
+    def test_should_return_none_if_times_missing(self):
+        self.assertIsNone(workers.get_work_time(make_assignment('1234')))
+
+    def test_should_return_none_if_times_invalid(self):
+        self.assertIsNone(workers.get_work_time(
+            make_assignment('1234', 'herp', 'derp')
+        ))
+
+
+class TestWorkerStats(unittest.TestCase):
+
+    def setUp(self):
+        super(TestWorkerStats, self).setUp()
+        self.stats = workers.WorkerStats('1234')
+
+    def test_should_initially_have_no_rates(self):
+        self.assertIsNone(self.stats.agreement_rate)
+        self.assertIsNone(self.stats.median_work_time)
+
+    def test_should_compute_median_work_time(self):
+        for each in [30, 10, 20, 40]:
+            self.stats.add_work_time(each)
+        self.assertEqual(25, self.stats.median_work_time)
+
+    def test_should_compute_agreement_rate(self):
+        self.stats.add_agreement(1.0)
+        self.stats.add_agreement(0.5)
+        self.assertEqual(0.75, self.stats.agreement_rate)
+
+    def test_should_keep_only_most_recent_work_times(self):
+        stats = workers.WorkerStats('1234', max_work_times=3)
+        for each in [100, 10, 20, 30]:
+            stats.add_work_time(each)
+        self.assertEqual([10, 20, 30], stats.work_times)
+        self.assertEqual(20, stats.median_work_time)
+        self.assertEqual([10, 20, 30], stats.to_dict()['work_times'])
+
+
+class TestWorkerStatsIndex(unittest.TestCase):
+
+    def setUp(self):
+        super(TestWorkerStatsIndex, self).setUp()
+        self.index = workers.WorkerStatsIndex()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(TestWorkerStatsIndex, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def test_should_return_none_for_unknown_worker(self):
+        self.assertIsNone(self.index.get('1234'))
+
+    def test_should_count_submissions(self):
+        self.index.add(make_assignment('1234'))
+        self.index.add(make_assignment('1234'))
+        self.assertEqual(2, self.index.get('1234').submissions)
+
+    def test_should_ignore_assignments_already_added(self):
+        fixture = make_assignment('1234')
+        self.assertTrue(self.index.add(fixture))
+        self.assertFalse(self.index.add(fixture))
+        self.assertEqual(1, self.index.get('1234').submissions)
+
+    def test_should_record_agreement_from_consensus(self):
+        result = mock.MagicMock(spec=consensus.ConsensusResult)
+        result.hit_id = '4567'
+        result.worker_agreement = {'1234': 0.5}
+        self.index.add_consensus(result)
+        self.assertEqual(0.5, self.index.get('1234').agreement_rate)
+
+    def test_should_ignore_consensus_already_added(self):
+        result = consensus.ConsensusResult(
+            '4567', {}, {}, {'1234': 0.5}, ['1']
+        )
+        self.assertTrue(self.index.add_consensus(result))
+        self.assertFalse(self.index.add_consensus(result))
+        self.assertEqual(1, self.index.get('1234').agreement_count)
+
+    def test_should_load_empty_index_if_file_missing(self):
+        result = workers.WorkerStatsIndex.load(
+            os.path.join(self.temp_dir, 'missing.json')
+        )
+        self.assertEqual(0, len(result))
+
+    def test_should_restore_saved_index(self):
+        path = os.path.join(self.temp_dir, 'workers.json')
+        fixture = make_assignment(
+            '1234', '2015-06-15T12:00:00Z', '2015-06-15T12:00:10Z'
+        )
+        self.index.add(fixture)
+        self.index.save(path)
+
+        result = workers.WorkerStatsIndex.load(path)
+        self.assertIn('1234', result)
+        self.assertEqual(10, result.get('1234').median_work_time)
+        self.assertFalse(result.add(fixture))
+
+    def test_should_replace_previously_saved_index(self):
+        path = os.path.join(self.temp_dir, 'workers.json')
+        self.index.save(path)
+        self.index.add(make_assignment('1234'))
+        self.index.add_consensus(consensus.ConsensusResult(
+            '4567', {}, {}, {'1234': 0.5}, ['1']
+        ))
+        self.index.save(path)
+
+        result = workers.WorkerStatsIndex.load(path)
+        self.assertIn('1234', result)
+        self.assertFalse(result.add_consensus(consensus.ConsensusResult(
+            '4567', {}, {}, {'1234': 0.5}, ['1']
+        )))
+
+    def test_should_forget_oldest_seen_ids(self):
+        index = workers.WorkerStatsIndex(max_seen_ids=2)
+        fixtures = [make_assignment('1234') for _ in range(3)]
+        for each in fixtures:
+            index.add(each)
+        self.assertEqual(2, len(index.seen_assignment_ids))
+        self.assertFalse(index.add(fixtures[-1]))
+        self.assertTrue(index.add(fixtures[0]))
+
+    def test_should_bound_saved_history(self):
+        path = os.path.join(self.temp_dir, 'workers.json')
+        index = workers.WorkerStatsIndex(max_work_times=2, max_seen_ids=2)
+        for seconds in ['10', '20', '30']:
+            index.add(make_assignment(
+                '1234', '2015-06-15T12:00:00Z',
+                '2015-06-15T12:00:{}Z'.format(seconds)
+            ))
+        index.save(path)
+
+        with open(path) as index_file:
+            data = json.load(index_file)
+        self.assertEqual(2, len(data['seen_assignment_ids']))
+        self.assertEqual([20, 30], data['workers'][0]['work_times'])
+
+        result = workers.WorkerStatsIndex.load(path)
+        self.assertEqual(25, result.get('1234').median_work_time)
+        self.assertEqual(3, result.get('1234').submissions)
+
+    def test_should_load_index_saved_with_sorted_history(self):
+        path = os.path.join(self.temp_dir, 'workers.json')
+        with open(path, 'w') as index_file:
+            json.dump({
+                'workers': [{
+                    'worker_id': '1234',
+                    'submissions': 3,
+                    'agreement_total': 0.0,
+                    'agreement_count': 0,
+                    'work_times': [10, 20, 30]
+                }],
+                'seen_assignment_ids': ['a', 'b', 'c']
+            }, index_file)
+
+        result = workers.WorkerStatsIndex.load(path, max_seen_ids=2)
+        self.assertEqual(20, result.get('1234').median_work_time)
+        self.assertEqual(['b', 'c'], list(result.seen_assignment_ids))
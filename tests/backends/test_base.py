@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import mock
+
+from turkleton import backends
+from turkleton.backends import base
+from turkleton.backends import boto2
+
+
+class TestGetBackendClass(unittest.TestCase):
+
+    def test_should_default_to_boto2_backend(self):
+        self.assertIs(boto2.Boto2Backend, backends.get_backend_class())
+
+    def test_should_import_backend_by_name(self):
+        from turkleton.backends import json_api
+        self.assertIs(
+            json_api.JSONBackend, backends.get_backend_class('json')
+        )
+
+    def test_should_return_given_class(self):
+        self.assertIs(base.Backend, backends.get_backend_class(base.Backend))
+
+    def test_should_raise_error_for_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            backends.get_backend_class('herp')
+
+
+class TestIterRawAssignments(unittest.TestCase):
+
+    def setUp(self):
+        super(TestIterRawAssignments, self).setUp()
+        self.backend = base.Backend()
+        self.pages = [['a', 'b'], ['c']]
+
+    def test_should_request_pages_until_a_partial_page_is_returned(self):
+        with mock.patch.object(
+                self.backend, 'get_assignments',
+                side_effect=self.pages) as get_assignments:
+            result = list(self.backend.iter_raw_assignments('1234', 2))
+        self.assertEqual(['a', 'b', 'c'], result)
+        get_assignments.assert_called_with('1234', page_size=2, page_number=2)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import io
+import unittest
+
+from boto.mturk import price
+import mock
+
+from tests.assignment import factories
+from turkleton.backends import boto2
+
+
+class TestBoto2Backend(unittest.TestCase):
+
+    def setUp(self):
+        super(TestBoto2Backend, self).setUp()
+        self.boto_connection = mock.MagicMock()
+        self.backend = boto2.Boto2Backend(self.boto_connection)
+
+    def test_should_delegate_operations_to_boto_connection(self):
+        result = self.backend.get_assignments('1234', page_size=2)
+        self.boto_connection.get_assignments.assert_called_once_with(
+            '1234', page_size=2
+        )
+        self.assertEqual(
+            self.boto_connection.get_assignments.return_value, result
+        )
+
+    def test_should_delegate_hit_type_registration_to_boto_connection(self):
+        reward = price.Price(0.25)
+        result = self.backend.register_hit_type(
+            'Title', 'Description', reward, 60
+        )
+        self.boto_connection.register_hit_type.assert_called_once_with(
+            'Title', 'Description', reward, 60
+        )
+        self.assertEqual(
+            self.boto_connection.register_hit_type.return_value, result
+        )
+
+    def test_should_delegate_other_attributes_to_boto_connection(self):
+        self.assertEqual(
+            self.boto_connection.host, self.backend.host
+        )
+
+    def test_should_grant_bonus_with_unique_request_token(self):
+        self.backend.grant_bonus(
+            'W', 'A', price.Price(0.25), 'Great work!',
+            unique_request_token='token'
+        )
+        request_type, params = (
+            self.boto_connection._process_request.call_args[0]
+        )
+        self.assertEqual('GrantBonus', request_type)
+        self.assertEqual('W', params['WorkerId'])
+        self.assertEqual('A', params['AssignmentId'])
+        self.assertEqual('Great work!', params['Reason'])
+        self.assertEqual('0.25', params['BonusAmount.1.Amount'])
+        self.assertEqual('token', params['UniqueRequestToken'])
+
+    def test_should_stream_assignments_from_raw_responses(self):
+        self.boto_connection.make_request.return_value = io.BytesIO(
+            factories.make_assignments_response([{'Age': '29'}])
+        )
+        result = list(self.backend.iter_raw_assignments('1234'))
+        self.assertEqual(1, len(result))
+        self.assertEqual({'Age': '29'}, result[0].answer_table)
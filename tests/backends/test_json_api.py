@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+import datetime
+import errno
+import json
+import socket
+import unittest
+
+from boto.mturk import layoutparam
+from boto.mturk import price
+import mock
+
+from six.moves import http_client
+
+from tests.assignment import factories
+from turkleton import instrumentation
+from turkleton.backends import json_api
+
+
+class FakePool(object):
+    """Pool returning canned responses and recording each request"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.retried = []
+
+    def request(self, method, path, body, headers, retry_stale=False):
+        self.retried.append(retry_stale)
+        self.requests.append((
+            headers['X-Amz-Target'].split('.')[-1],
+            json.loads(body.decode('utf-8')),
+            headers
+        ))
+        status, result = self.responses.pop(0)
+        return status, json.dumps(result).encode('utf-8')
+
+
+class BaseJSONBackendTestCase(unittest.TestCase):
+
+    def make_backend(self, *responses):
+        self.pool = FakePool(
+            each if isinstance(each, tuple) else (200, each)
+            for each in responses
+        )
+        return json_api.JSONBackend('key', 'secret', pool=self.pool)
+
+    def get_request(self, index=-1):
+        operation, payload, _ = self.pool.requests[index]
+        return operation, payload
+
+
+class TestSignRequest(unittest.TestCase):
+
+    def test_should_match_aws_signature_version_4_example(self):
+        authorization = json_api.sign_request(
+            'GET', 'iam.amazonaws.com', '/',
+            'Action=ListUsers&Version=2010-05-08',
+            {
+                'Content-Type':
+                    'application/x-www-form-urlencoded; charset=utf-8',
+                'X-Amz-Date': '20150830T123600Z'
+            },
+            b'', 'AKIDEXAMPLE', 'wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY',
+            'us-east-1', 'iam', datetime.datetime(2015, 8, 30, 12, 36)
+        )
+        self.assertEqual(
+            'AWS4-HMAC-SHA256 '
+            'Credential=AKIDEXAMPLE/20150830/us-east-1/iam/aws4_request, '
+            'SignedHeaders=content-type;host;x-amz-date, '
+            'Signature=5d672d79c15b13162d9279b0855cfba6789a8edb4c82c400e0'
+            '6b5924a6f2b5d7',
+            authorization
+        )
+
+
+class TestHTTPConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        super(TestHTTPConnectionPool, self).setUp()
+        self.connection_cls = mock.MagicMock()
+        self.connection_cls.return_value.getresponse.return_value.status = 200
+        self.pool = json_api.HTTPConnectionPool(
+            'example.com', maxsize=2, connection_cls=self.connection_cls
+        )
+
+    def test_should_reuse_returned_connections(self):
+        self.pool.request('POST', '/', b'', {})
+        self.pool.request('POST', '/', b'', {})
+        self.assertEqual(1, self.connection_cls.call_count)
+
+    def test_should_discard_failed_connections(self):
+        conn = self.connection_cls.return_value
+        conn.request.side_effect = [IOError('Herp'), None]
+        with self.assertRaises(IOError):
+            self.pool.request('POST', '/', b'', {})
+        conn.close.assert_called_once_with()
+        self.assertTrue(self.pool.idle.empty())
+
+    def test_should_open_connection_while_others_are_in_use(self):
+        self.pool._get_connection()
+        self.pool.request('POST', '/', b'', {})
+        self.assertEqual(2, self.connection_cls.call_count)
+
+    def test_should_close_connections_beyond_max_size(self):
+        self.connection_cls.side_effect = lambda *args, **kwargs: (
+            mock.MagicMock()
+        )
+        connections = [self.pool._get_connection() for _ in range(3)]
+        for each in connections:
+            self.pool._put_connection(each)
+        self.assertEqual(
+            [0, 0, 1], [each.close.call_count for each in connections]
+        )
+
+    def test_should_retry_stale_idle_connections_once(self):
+        stale = mock.MagicMock()
+        stale.request.side_effect = http_client.BadStatusLine('')
+        self.pool._put_connection(stale)
+        self.assertEqual(200, self.pool.request(
+            'POST', '/', b'', {}, retry_stale=True
+        )[0])
+        stale.close.assert_called_once_with()
+        self.assertEqual(1, self.connection_cls.call_count)
+        self.assertIs(
+            self.connection_cls.return_value, self.pool.idle.get_nowait()
+        )
+
+    def test_should_retry_reset_idle_connections(self):
+        stale = mock.MagicMock()
+        stale.getresponse.side_effect = socket.error(
+            errno.ECONNRESET, 'Connection reset by peer'
+        )
+        self.pool._put_connection(stale)
+        self.assertEqual(200, self.pool.request(
+            'POST', '/', b'', {}, retry_stale=True
+        )[0])
+
+    def test_should_not_retry_new_connections(self):
+        conn = self.connection_cls.return_value
+        conn.request.side_effect = http_client.BadStatusLine('')
+        with self.assertRaises(http_client.BadStatusLine):
+            self.pool.request('POST', '/', b'', {}, retry_stale=True)
+        self.assertEqual(1, conn.request.call_count)
+
+    def test_should_not_retry_timeouts(self):
+        stale = mock.MagicMock()
+        stale.getresponse.side_effect = socket.timeout()
+        self.pool._put_connection(stale)
+        with self.assertRaises(socket.timeout):
+            self.pool.request('POST', '/', b'', {}, retry_stale=True)
+        self.assertFalse(self.connection_cls.called)
+
+    def test_should_not_retry_requests_unsafe_to_repeat(self):
+        stale = mock.MagicMock()
+        stale.request.side_effect = http_client.BadStatusLine('')
+        self.pool._put_connection(stale)
+        with self.assertRaises(http_client.BadStatusLine):
+            self.pool.request('POST', '/', b'', {})
+        self.assertFalse(self.connection_cls.called)
+
+    def test_should_call_traffic_hooks(self):
+        hook = mock.MagicMock()
+        self.pool.traffic_hooks.append(hook)
+        response = self.connection_cls.return_value.getresponse.return_value
+        response.read.return_value = b'{"a": 1}'
+        self.pool.request('POST', '/', b'{}', {})
+        hook.assert_called_once_with(bytes_out=2, bytes_in=8)
+
+    def test_should_record_traffic_when_instrumented(self):
+        metrics = instrumentation.Instrumentation()
+        backend = json_api.JSONBackend('key', 'secret', pool=self.pool)
+        metrics.wrap(backend)
+        self.assertEqual([metrics.record_request_traffic],
+                         self.pool.traffic_hooks)
+        metrics.release()
+        self.assertEqual([], self.pool.traffic_hooks)
+
+
+class RawPool(object):
+    """Pool returning a canned raw response body"""
+
+    def __init__(self, status, data):
+        self.status = status
+        self.data = data
+
+    def request(self, method, path, body, headers, retry_stale=False):
+        return self.status, self.data
+
+
+class TestRequest(BaseJSONBackendTestCase):
+
+    def test_should_sign_requests_for_operation(self):
+        backend = self.make_backend({})
+        backend.request('GetAccountBalance', {})
+        headers = self.pool.requests[0][2]
+        self.assertEqual(
+            'MTurkRequesterServiceV20170117.GetAccountBalance',
+            headers['X-Amz-Target']
+        )
+        self.assertEqual(json_api.CONTENT_TYPE, headers['Content-Type'])
+        self.assertIn(
+            '/us-east-1/mturk-requester/aws4_request',
+            headers['Authorization']
+        )
+
+    def test_should_raise_error_for_failed_requests(self):
+        backend = self.make_backend((400, {
+            '__type': 'com.amazonaws.mturk#RequestError',
+            'Message': 'Bad HIT'
+        }))
+        with self.assertRaises(json_api.RequestError) as context:
+            backend.request('GetHIT', {'HITId': '1234'})
+        self.assertEqual('RequestError', context.exception.code)
+        self.assertEqual(400, context.exception.status)
+
+    def test_should_only_retry_requests_safe_to_repeat(self):
+        backend = self.make_backend({}, {}, {})
+        backend.request('GetHIT', {'HITId': '1234'})
+        backend.request('CreateHIT', {'Title': 'Title'})
+        backend.request('SendBonus', {'UniqueRequestToken': 'T'})
+        self.assertEqual([True, False, True], self.pool.retried)
+
+    def test_should_raise_error_for_non_json_error_bodies(self):
+        backend = json_api.JSONBackend(
+            'key', 'secret', pool=RawPool(502, b'<html>Bad Gateway</html>')
+        )
+        with self.assertRaises(json_api.RequestError) as context:
+            backend.request('GetHIT', {'HITId': '1234'})
+        self.assertEqual('HTTPError', context.exception.code)
+        self.assertEqual(502, context.exception.status)
+        self.assertEqual('<html>Bad Gateway</html>', context.exception.body)
+
+
+class TestCreateHit(BaseJSONBackendTestCase):
+
+    def test_should_create_hit_from_layout(self):
+        backend = self.make_backend({'HIT': {
+            'HITId': 'H', 'RequesterAnnotation': '1234',
+            'Expiration': 1434369600
+        }})
+        result = backend.create_hit(
+            hit_layout='L',
+            title='Title',
+            description='Description',
+            keywords='a, b',
+            reward=price.Price(0.1),
+            max_assignments=2,
+            lifetime=datetime.timedelta(hours=1),
+            duration=datetime.timedelta(minutes=5),
+            approval_delay=datetime.timedelta(days=1),
+            annotation='1234',
+            layout_params=layoutparam.LayoutParameters([
+                layoutparam.LayoutParameter('image_url', 'http://a.com')
+            ])
+        )
+        operation, payload = self.get_request()
+        self.assertEqual('CreateHIT', operation)
+        self.assertEqual({
+            'Title': 'Title',
+            'Description': 'Description',
+            'Keywords': 'a, b',
+            'Reward': '0.10',
+            'MaxAssignments': 2,
+            'LifetimeInSeconds': 3600,
+            'AssignmentDurationInSeconds': 300,
+            'AutoApprovalDelayInSeconds': 86400,
+            'RequesterAnnotation': '1234',
+            'HITLayoutId': 'L',
+            'HITLayoutParameters': [
+                {'Name': 'image_url', 'Value': 'http://a.com'}
+            ]
+        }, payload)
+        self.assertEqual('H', result[0].HITId)
+        self.assertEqual('1234', result[0].RequesterAnnotation)
+        self.assertEqual('2015-06-15T12:00:00Z', result[0].Expiration)
+
+    def test_should_create_hit_with_hit_type(self):
+        backend = self.make_backend({'HIT': {'HITId': 'H'}})
+        backend.create_hit(hit_type='T', hit_layout='L', layout_params={})
+        operation, payload = self.get_request()
+        self.assertEqual('CreateHITWithHITType', operation)
+        self.assertEqual('T', payload['HITTypeId'])
+        self.assertNotIn('Title', payload)
+
+
+class TestRegisterHitType(BaseJSONBackendTestCase):
+
+    def test_should_register_hit_type(self):
+        backend = self.make_backend({'HITTypeId': 'T'})
+        result = backend.register_hit_type(
+            title='Title',
+            description='Description',
+            reward=price.Price(0.1),
+            duration=datetime.timedelta(minutes=5),
+            keywords='a, b',
+            approval_delay=datetime.timedelta(days=1)
+        )
+        operation, payload = self.get_request()
+        self.assertEqual('CreateHITType', operation)
+        self.assertEqual({
+            'Title': 'Title',
+            'Description': 'Description',
+            'Keywords': 'a, b',
+            'Reward': '0.10',
+            'AssignmentDurationInSeconds': 300,
+            'AutoApprovalDelayInSeconds': 86400
+        }, payload)
+        self.assertEqual('T', result[0].HITTypeId)
+
+
+class TestListings(BaseJSONBackendTestCase):
+
+    def test_should_follow_next_tokens_for_all_hits(self):
+        backend = self.make_backend(
+            {'HITs': [{'HITId': 'A'}], 'NextToken': 'next'},
+            {'HITs': [{'HITId': 'B'}]}
+        )
+        result = [each.HITId for each in backend.get_all_hits()]
+        self.assertEqual(['A', 'B'], result)
+        self.assertEqual('next', self.get_request()[1]['NextToken'])
+
+    def test_should_emulate_page_numbers(self):
+        backend = self.make_backend(
+            {'HITs': [{'HITId': 'A'}, {'HITId': 'B'}], 'NextToken': 'next'},
+            {'HITs': [{'HITId': 'C'}]}
+        )
+        result = backend.get_reviewable_hits(page_size=2, page_number=2)
+        self.assertEqual(['C'], [each.HITId for each in result])
+
+    def test_should_parse_answers_of_streamed_assignments(self):
+        backend = self.make_backend({'Assignments': [{
+            'AssignmentId': 'A',
+            'HITId': 'H',
+            'WorkerId': 'W',
+            'AssignmentStatus': 'Submitted',
+            'AcceptTime': 1434369600,
+            'Answer': factories.make_answer_xml({'Age': '29'})
+        }]})
+        result = list(backend.iter_raw_assignments('H'))
+        self.assertEqual(
+            ('ListAssignmentsForHIT', {'HITId': 'H', 'MaxResults': 100}),
+            self.get_request()
+        )
+        self.assertEqual('A', result[0].AssignmentId)
+        self.assertEqual({'Age': '29'}, result[0].answer_table)
+        self.assertEqual('2015-06-15T12:00:00Z', result[0].AcceptTime)
+
+
+class TestOperations(BaseJSONBackendTestCase):
+
+    def test_should_approve_assignment(self):
+        backend = self.make_backend({})
+        backend.approve_assignment('A', 'Thanks')
+        self.assertEqual(
+            ('ApproveAssignment',
+             {'AssignmentId': 'A', 'RequesterFeedback': 'Thanks'}),
+            self.get_request()
+        )
+
+    def test_should_send_bonus_with_unique_request_token(self):
+        backend = self.make_backend({})
+        backend.grant_bonus(
+            'W', 'A', price.Price(0.25), 'Great work!',
+            unique_request_token='token'
+        )
+        self.assertEqual(
+            ('SendBonus', {
+                'WorkerId': 'W',
+                'AssignmentId': 'A',
+                'BonusAmount': '0.25',
+                'Reason': 'Great work!',
+                'UniqueRequestToken': 'token'
+            }),
+            self.get_request()
+        )
+
+    def test_should_dispose_hit(self):
+        backend = self.make_backend({})
+        backend.dispose_hit('H')
+        self.assertEqual(('DeleteHIT', {'HITId': 'H'}), self.get_request())
+
+    def test_should_extend_expiration_from_current_expiration(self):
+        backend = self.make_backend(
+            {'HIT': {'HITId': 'H', 'Expiration': 4000000000}}, {}
+        )
+        backend.extend_hit('H', expiration_increment=60)
+        self.assertEqual(
+            ('UpdateExpirationForHIT',
+             {'HITId': 'H', 'ExpireAt': 4000000060}),
+            self.get_request()
+        )
+
+    def test_should_get_account_balance(self):
+        backend = self.make_backend({'AvailableBalance': '10.50'})
+        balance = backend.get_account_balance()[0]
+        self.assertEqual('10.50', str(balance.amount))
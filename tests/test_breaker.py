@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+import socket
+import threading
+import time
+import unittest
+
+import mock
+
+from turkleton import breaker
+from turkleton import connection
+from turkleton import fake
+from turkleton.assignment import hit
+from turkleton.backends import json_api
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestIsServiceFailure(unittest.TestCase):
+
+    def test_should_count_timeouts(self):
+        self.assertTrue(breaker.is_service_failure(socket.timeout()))
+
+    def test_should_count_server_errors(self):
+        error = Exception()
+        error.status = 503
+        self.assertTrue(breaker.is_service_failure(error))
+
+    def test_should_count_server_errors_with_string_status(self):
+        error = Exception()
+        error.status = '503'
+        self.assertTrue(breaker.is_service_failure(error))
+
+    def test_should_count_server_errors_without_json_body(self):
+        self.assertTrue(breaker.is_service_failure(
+            json_api.RequestError('HTTPError', 'Bad Gateway', 502)
+        ))
+        self.assertFalse(breaker.is_service_failure(
+            json_api.RequestError('HTTPError', 'Not Found', 404)
+        ))
+
+    def test_should_count_service_error_codes(self):
+        self.assertTrue(breaker.is_service_failure(
+            fake.FakeRequestError('ServiceUnavailable')
+        ))
+
+    def test_should_not_count_invalid_requests(self):
+        self.assertFalse(breaker.is_service_failure(
+            fake.FakeRequestError('InvalidRequest')
+        ))
+        self.assertFalse(breaker.is_service_failure(ValueError()))
+
+
+class BaseBreakerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(BaseBreakerTestCase, self).setUp()
+        self.clock = FakeClock()
+        self.circuit_breaker = breaker.CircuitBreaker(
+            failure_threshold=2, reset_timeout=10, clock=self.clock
+        )
+
+    def fail(self, operation='create_hit', times=1):
+        for _ in range(times):
+            with self.assertRaises(fake.FakeRequestError):
+                self.circuit_breaker.call(
+                    operation,
+                    mock.MagicMock(
+                        side_effect=fake.FakeRequestError('InternalError')
+                    )
+                )
+
+
+class TestCircuitBreaker(BaseBreakerTestCase):
+
+    def test_should_start_closed(self):
+        self.assertEqual(
+            breaker.CLOSED, self.circuit_breaker.state('create_hit')
+        )
+        self.assertFalse(self.circuit_breaker.is_open())
+
+    def test_should_open_after_consecutive_failures(self):
+        self.fail()
+        self.assertEqual(
+            breaker.CLOSED, self.circuit_breaker.state('create_hit')
+        )
+        self.fail()
+        self.assertEqual(
+            breaker.OPEN, self.circuit_breaker.state('create_hit')
+        )
+        self.assertTrue(self.circuit_breaker.is_open())
+
+    def test_should_reset_failures_after_success(self):
+        self.fail()
+        self.circuit_breaker.call('create_hit', lambda: None)
+        self.fail()
+        self.assertEqual(
+            breaker.CLOSED, self.circuit_breaker.state('create_hit')
+        )
+
+    def test_should_not_count_invalid_requests(self):
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                self.circuit_breaker.call(
+                    'create_hit', mock.MagicMock(side_effect=ValueError)
+                )
+        self.assertEqual(
+            breaker.CLOSED, self.circuit_breaker.state('create_hit')
+        )
+
+    def test_should_fail_fast_while_open(self):
+        self.fail(times=2)
+        func = mock.MagicMock()
+        self.clock.now = 4
+        with self.assertRaises(breaker.CircuitOpenError) as context:
+            self.circuit_breaker.call('create_hit', func)
+        self.assertFalse(func.called)
+        self.assertEqual('create_hit', context.exception.operation)
+        self.assertEqual(6, context.exception.retry_after)
+
+    def test_should_isolate_operations(self):
+        self.fail(times=2)
+        self.assertEqual(
+            breaker.CLOSED, self.circuit_breaker.state('get_assignments')
+        )
+        self.assertEqual(
+            1, self.circuit_breaker.call('get_assignments', lambda: 1)
+        )
+        self.assertEqual(
+            {'create_hit': breaker.OPEN, 'get_assignments': breaker.CLOSED},
+            self.circuit_breaker.states()
+        )
+
+    def test_should_be_half_open_after_reset_timeout(self):
+        self.fail(times=2)
+        self.clock.now = 10
+        self.assertEqual(
+            breaker.HALF_OPEN, self.circuit_breaker.state('create_hit')
+        )
+        self.assertEqual(0, self.circuit_breaker.retry_after('create_hit'))
+
+    def test_should_close_after_successful_trial(self):
+        self.fail(times=2)
+        self.clock.now = 10
+        self.circuit_breaker.call('create_hit', lambda: None)
+        self.assertEqual(
+            breaker.CLOSED, self.circuit_breaker.state('create_hit')
+        )
+
+    def test_should_reopen_after_failed_trial(self):
+        self.fail(times=2)
+        self.clock.now = 10
+        self.fail()
+        self.assertEqual(
+            breaker.OPEN, self.circuit_breaker.state('create_hit')
+        )
+        self.assertEqual(10, self.circuit_breaker.retry_after('create_hit'))
+
+    def test_should_allow_one_trial_at_once(self):
+        self.fail(times=2)
+        self.clock.now = 10
+        self.circuit_breaker.before_call('create_hit')
+        with self.assertRaises(breaker.CircuitOpenError):
+            self.circuit_breaker.call('create_hit', lambda: None)
+        self.circuit_breaker.after_call('create_hit')
+        self.assertEqual(
+            breaker.CLOSED, self.circuit_breaker.state('create_hit')
+        )
+
+    def test_should_notify_listeners_of_transitions(self):
+        listener = mock.MagicMock()
+        self.circuit_breaker.listeners.append(listener)
+        self.fail(times=2)
+        self.clock.now = 10
+        self.circuit_breaker.call('create_hit', lambda: None)
+        self.assertEqual([
+            mock.call('create_hit', breaker.CLOSED, breaker.OPEN),
+            mock.call('create_hit', breaker.OPEN, breaker.HALF_OPEN),
+            mock.call('create_hit', breaker.HALF_OPEN, breaker.CLOSED)
+        ], listener.call_args_list)
+
+    def test_should_record_failures_of_generators(self):
+        def iter_items():
+            yield 1
+            raise fake.FakeRequestError('InternalError')
+
+        for _ in range(2):
+            with self.assertRaises(fake.FakeRequestError):
+                list(self.circuit_breaker.call('iter_items', iter_items))
+        self.assertEqual(
+            breaker.OPEN, self.circuit_breaker.state('iter_items')
+        )
+
+    def test_should_not_hold_trial_for_generators_never_iterated(self):
+        def iter_items():
+            yield 1
+
+        self.fail('iter_items', times=2)
+        self.clock.now = 10
+        self.circuit_breaker.call('iter_items', iter_items)
+        self.assertEqual(
+            [1], list(self.circuit_breaker.call('iter_items', iter_items))
+        )
+        self.assertEqual(
+            breaker.CLOSED, self.circuit_breaker.state('iter_items')
+        )
+
+    def test_should_check_circuit_when_generator_is_iterated(self):
+        def iter_items():
+            yield 1
+
+        items = self.circuit_breaker.call('iter_items', iter_items)
+        self.fail('iter_items', times=2)
+        with self.assertRaises(breaker.CircuitOpenError):
+            next(items)
+
+    def test_should_close_every_circuit_on_reset(self):
+        self.fail(times=2)
+        self.circuit_breaker.reset()
+        self.assertFalse(self.circuit_breaker.is_open())
+
+
+class TestWait(BaseBreakerTestCase):
+
+    def test_should_not_wait_while_closed(self):
+        self.assertTrue(self.circuit_breaker.wait('create_hit', timeout=0))
+
+    def test_should_time_out_while_open(self):
+        self.fail(times=2)
+        self.assertFalse(
+            self.circuit_breaker.wait('create_hit', timeout=0.01)
+        )
+
+    def test_should_time_out_while_clock_is_frozen(self):
+        self.fail(times=2)
+        started = time.time()
+        self.assertFalse(self.circuit_breaker.wait('create_hit', timeout=0.2))
+        self.assertLess(time.time() - started, 2)
+
+    def test_should_wake_once_trial_succeeds(self):
+        self.fail(times=2)
+        self.clock.now = 10
+        self.circuit_breaker.before_call('create_hit')
+        timer = threading.Timer(
+            0.05, self.circuit_breaker.after_call, ('create_hit',)
+        )
+        timer.start()
+        try:
+            self.assertTrue(
+                self.circuit_breaker.wait('create_hit', timeout=5)
+            )
+        finally:
+            timer.join()
+
+
+class TestBreakerConnection(unittest.TestCase):
+
+    def setUp(self):
+        super(TestBreakerConnection, self).setUp()
+        self.fake_connection = fake.FakeMTurkConnection()
+        connection.set_connection(self.fake_connection)
+        self.circuit_breaker = breaker.enable(
+            failure_threshold=1, reset_timeout=60
+        )
+
+    def tearDown(self):
+        super(TestBreakerConnection, self).tearDown()
+        breaker.disable(self.circuit_breaker)
+
+    def test_should_wrap_connection(self):
+        self.assertIsInstance(
+            connection.get_connection(), breaker.BreakerConnection
+        )
+
+    def test_should_return_raw_connection_once_disabled(self):
+        breaker.disable(self.circuit_breaker)
+        self.assertIs(self.fake_connection, connection.get_connection())
+        connection.add_wrapper(self.circuit_breaker.wrap)
+
+    def test_should_fail_fast_without_calling_connection(self):
+        self.fake_connection.fail_next('get_all_hits')
+        with self.assertRaises(fake.FakeRequestError):
+            list(hit.get_all())
+        get_all_hits = mock.patch.object(self.fake_connection, 'get_all_hits')
+        with get_all_hits as patched:
+            with self.assertRaises(breaker.CircuitOpenError):
+                list(hit.get_all())
+        self.assertFalse(patched.called)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import decimal
+import unittest
+
+import mock
+
+from tests.assignment import factories
+from turkleton import budget
+from turkleton import connection
+from turkleton import fake
+
+
+class TestHitCost(unittest.TestCase):
+
+    def test_should_add_fee_to_each_assignment(self):
+        self.assertEqual(
+            decimal.Decimal('0.60'), budget.hit_cost(0.25, 2)
+        )
+
+    def test_should_charge_large_hit_fee(self):
+        self.assertEqual(
+            decimal.Decimal('3.50'), budget.hit_cost(0.25, 10)
+        )
+
+    def test_should_charge_minimum_fee(self):
+        self.assertEqual(
+            decimal.Decimal('0.03'), budget.hit_cost(0.02, 1)
+        )
+
+    def test_should_sum_cost_of_tasks(self):
+        task = factories.make_task()
+        task.__assignments_per_hit__ = 3
+        self.assertEqual(
+            decimal.Decimal('0.15'),
+            budget.batch_cost([task, factories.make_task(),
+                               factories.make_task()])
+        )
+
+
+class TestLedger(unittest.TestCase):
+
+    def setUp(self):
+        super(TestLedger, self).setUp()
+        self.ledger = budget.Ledger(decimal.Decimal('1.00'))
+
+    def test_should_track_spend(self):
+        self.ledger.charge(decimal.Decimal('0.40'))
+        self.assertEqual(decimal.Decimal('0.60'), self.ledger.available)
+
+    def test_should_raise_error_if_spend_exceeds_balance(self):
+        with self.assertRaises(budget.InsufficientFundsError):
+            self.ledger.charge(decimal.Decimal('1.01'))
+        self.assertEqual(decimal.Decimal('1.00'), self.ledger.available)
+
+    def test_should_refund_spend(self):
+        self.ledger.charge(decimal.Decimal('0.40'))
+        self.ledger.refund(decimal.Decimal('0.40'))
+        self.assertEqual(decimal.Decimal('1.00'), self.ledger.available)
+
+
+class TestPreflight(unittest.TestCase):
+
+    def setUp(self):
+        super(TestPreflight, self).setUp()
+        self.fake_connection = fake.FakeMTurkConnection(
+            balance=decimal.Decimal('0.10')
+        )
+        connection.set_connection(self.fake_connection)
+        self.tasks = [factories.make_task() for _ in range(3)]
+
+    def test_should_raise_error_before_upload_if_batch_unaffordable(self):
+        self.tasks.append(factories.make_task())
+        with self.assertRaises(budget.InsufficientFundsError):
+            with budget.preflight(self.tasks):
+                pass
+        self.assertEqual(0, len(self.fake_connection.hits))
+
+    def test_should_fetch_balance_once(self):
+        with mock.patch.object(
+                self.fake_connection, 'get_account_balance',
+                wraps=self.fake_connection.get_account_balance) as balance:
+            with budget.preflight(self.tasks):
+                for each in self.tasks:
+                    each.upload(batch_id='1234')
+        self.assertEqual(1, balance.call_count)
+
+    def test_should_charge_uploads_to_ledger(self):
+        with budget.preflight(self.tasks) as ledger:
+            for each in self.tasks:
+                each.upload(batch_id='1234')
+        self.assertEqual(decimal.Decimal('0.01'), ledger.available)
+        self.assertEqual(self.fake_connection.balance, ledger.available)
+
+    def test_should_raise_error_for_uploads_beyond_ledger(self):
+        with budget.preflight(self.tasks):
+            for each in self.tasks:
+                each.upload(batch_id='1234')
+            with self.assertRaises(budget.InsufficientFundsError):
+                factories.make_task().upload(batch_id='1234')
+        self.assertEqual(3, len(self.fake_connection.hits))
+
+    def test_should_refund_failed_uploads(self):
+        self.fake_connection.fail_next('create_hit')
+        with budget.preflight(self.tasks) as ledger:
+            with self.assertRaises(fake.FakeRequestError):
+                self.tasks[0].upload(batch_id='1234')
+        self.assertEqual(decimal.Decimal('0.10'), ledger.available)
+
+    def test_should_not_track_spend_outside_context(self):
+        with budget.preflight(self.tasks) as ledger:
+            pass
+        self.tasks[0].upload(batch_id='1234')
+        self.assertEqual(decimal.Decimal('0.10'), ledger.available)
+
+    def test_should_cost_tasks_given_as_generator(self):
+        tasks = (each for each in self.tasks + [factories.make_task()])
+        with self.assertRaises(budget.InsufficientFundsError):
+            with budget.preflight(tasks):
+                pass
+
+
+class TestPreflightAccounts(unittest.TestCase):
+
+    def setUp(self):
+        super(TestPreflightAccounts, self).setUp()
+        self.fake_connection = fake.FakeMTurkConnection(
+            balance=decimal.Decimal('0.10')
+        )
+        self.sandbox_connection = fake.FakeMTurkConnection(
+            balance=decimal.Decimal('1.00')
+        )
+        connection.set_connection(self.fake_connection)
+        connection.set_connection(self.sandbox_connection, 'sandbox')
+        self.tasks = [factories.make_task() for _ in range(5)]
+
+    def tearDown(self):
+        super(TestPreflightAccounts, self).tearDown()
+        connection.set_connection(None, 'sandbox')
+
+    def test_should_check_balance_of_named_connection(self):
+        with budget.preflight(self.tasks, connection_name='sandbox') as ledger:
+            self.assertEqual(decimal.Decimal('1.00'), ledger.balance)
+        with self.assertRaises(budget.InsufficientFundsError):
+            with budget.preflight(self.tasks):
+                pass
+
+    def test_should_charge_ledger_of_upload_connection(self):
+        with budget.preflight(self.tasks[:3]) as ledger:
+            with budget.preflight(
+                    self.tasks, connection_name='sandbox') as sandbox_ledger:
+                for each in self.tasks:
+                    each.upload(batch_id='1234', connection_name='sandbox')
+                self.tasks[0].upload(batch_id='1234')
+        self.assertEqual(decimal.Decimal('0.07'), ledger.available)
+        self.assertEqual(decimal.Decimal('0.85'), sandbox_ledger.available)
+        self.assertEqual(5, len(self.sandbox_connection.hits))
+        self.assertEqual({}, budget.current_ledgers)
+
+    def test_should_not_charge_accounts_outside_their_context(self):
+        with budget.preflight(self.tasks, connection_name='sandbox') as ledger:
+            self.tasks[0].upload(batch_id='1234')
+        self.assertEqual(decimal.Decimal('1.00'), ledger.available)
+        self.assertEqual(1, len(self.fake_connection.hits))
+
+
+if __name__ == '__main__':
+    unittest.main()
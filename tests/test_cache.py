@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import mock
+
+from turkleton import cache
+from turkleton import connection
+from turkleton import fake
+from turkleton.assignment import hit
+
+
+class FakeClock(object):
+    """Clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def setUp(self):
+        super(TestLRUCache, self).setUp()
+        self.clock = FakeClock()
+        self.lru_cache = cache.LRUCache(2, self.clock)
+
+    def test_should_return_stored_value(self):
+        self.lru_cache.set('a', 1)
+        self.assertEqual((True, 1), self.lru_cache.get('a'))
+
+    def test_should_report_missing_value(self):
+        self.assertEqual((False, None), self.lru_cache.get('a'))
+
+    def test_should_evict_least_recently_used_entry(self):
+        self.lru_cache.set('a', 1)
+        self.lru_cache.set('b', 2)
+        self.lru_cache.get('a')
+        self.lru_cache.set('c', 3)
+        self.assertEqual((False, None), self.lru_cache.get('b'))
+        self.assertEqual((True, 1), self.lru_cache.get('a'))
+
+    def test_should_expire_entries_after_ttl(self):
+        self.lru_cache.set('a', 1, ttl=10)
+        self.clock.now = 10
+        self.assertEqual((False, None), self.lru_cache.get('a'))
+        self.assertEqual(0, len(self.lru_cache))
+
+    def test_should_keep_entries_without_ttl(self):
+        self.lru_cache.set('a', 1)
+        self.clock.now = 1e9
+        self.assertEqual((True, 1), self.lru_cache.get('a'))
+
+    def test_should_invalidate_matching_entries(self):
+        self.lru_cache.set('a', 1)
+        self.lru_cache.set('b', 2)
+        self.lru_cache.invalidate(lambda key: key == 'a')
+        self.assertEqual(['b'], list(self.lru_cache.entries))
+
+
+class TestIsTerminal(unittest.TestCase):
+
+    def test_should_not_treat_empty_results_as_terminal(self):
+        self.assertFalse(cache.is_terminal('get_assignments', []))
+
+    def test_should_treat_every_reviewed_assignment_as_terminal(self):
+        result = [mock.MagicMock(AssignmentStatus='Approved'),
+                  mock.MagicMock(AssignmentStatus='Rejected')]
+        hit = mock.MagicMock(HITStatus='Reviewable', MaxAssignments='2')
+        self.assertTrue(cache.is_terminal('get_assignments', result, hit))
+
+    def test_should_not_treat_hit_with_open_assignments_as_terminal(self):
+        result = [mock.MagicMock(AssignmentStatus='Approved')]
+        hit = mock.MagicMock(HITStatus='Assignable', MaxAssignments='3')
+        self.assertFalse(cache.is_terminal('get_assignments', result, hit))
+
+    def test_should_not_treat_assignments_of_unknown_hit_as_terminal(self):
+        result = [mock.MagicMock(AssignmentStatus='Approved')]
+        self.assertFalse(cache.is_terminal('get_assignments', result))
+
+    def test_should_treat_assignments_of_disposed_hit_as_terminal(self):
+        result = [mock.MagicMock(AssignmentStatus='Submitted')]
+        hit = mock.MagicMock(HITStatus='Disposed', MaxAssignments='3')
+        self.assertTrue(cache.is_terminal('get_assignments', result, hit))
+
+    def test_should_not_treat_submitted_assignments_as_terminal(self):
+        result = [mock.MagicMock(AssignmentStatus='Approved'),
+                  mock.MagicMock(AssignmentStatus='Submitted')]
+        self.assertFalse(cache.is_terminal('get_assignments', result))
+
+    def test_should_treat_disposed_hit_as_terminal(self):
+        result = [mock.MagicMock(HITStatus='Disposed')]
+        self.assertTrue(cache.is_terminal('get_hit', result))
+
+
+class TestReadThroughCache(unittest.TestCase):
+
+    def setUp(self):
+        super(TestReadThroughCache, self).setUp()
+        self.clock = FakeClock()
+        self.fake_connection = fake.FakeMTurkConnection()
+        connection.set_connection(self.fake_connection)
+        self.read_cache = cache.ReadThroughCache(clock=self.clock)
+        connection.add_wrapper(self.read_cache.wrap)
+
+        self.hit_id = self.fake_connection.create_hit(
+            annotation='1234'
+        )[0].HITId
+        self.assignment_id = self.fake_connection.submit_assignment(
+            self.hit_id, {'Age': '29'}
+        ).AssignmentId
+
+    def tearDown(self):
+        super(TestReadThroughCache, self).tearDown()
+        connection.remove_wrapper(self.read_cache.wrap)
+
+    def test_should_serve_repeated_reads_from_cache(self):
+        list(hit.get_all())
+        list(hit.get_all())
+        self.assertEqual(1, self.fake_connection.calls['get_all_hits'])
+        self.assertEqual(1, self.read_cache.hits)
+
+    def test_should_cache_reads_separately_by_arguments(self):
+        connection.get_connection().get_assignments(self.hit_id)
+        connection.get_connection().get_assignments(self.hit_id, 'Approved')
+        self.assertEqual(2, self.fake_connection.calls['get_assignments'])
+
+    def test_should_read_again_after_ttl(self):
+        hit.get_reviewable_by_batch_id('1234')
+        self.clock.now = cache.DEFAULT_TTLS['get_reviewable_hits']
+        hit.get_reviewable_by_batch_id('1234')
+        self.assertEqual(
+            2, self.fake_connection.calls['get_reviewable_hits']
+        )
+
+    def test_should_invalidate_assignments_when_approved(self):
+        conn = connection.get_connection()
+        conn.get_assignments(self.hit_id)
+        conn.approve_assignment(self.assignment_id)
+        result = conn.get_assignments(self.hit_id)
+        self.assertEqual('Approved', result[0].AssignmentStatus)
+        self.assertEqual(2, self.fake_connection.calls['get_assignments'])
+
+    def test_should_cache_reviewed_assignments_indefinitely(self):
+        conn = connection.get_connection()
+        conn.approve_assignment(self.assignment_id)
+        conn.get_hit(self.hit_id)
+        conn.get_assignments(self.hit_id)
+        self.clock.now = 1e9
+        conn.get_assignments(self.hit_id)
+        self.assertEqual(1, self.fake_connection.calls['get_assignments'])
+
+    def test_should_read_new_assignments_of_partly_reviewed_hit(self):
+        conn = connection.get_connection()
+        hit_id = self.fake_connection.create_hit(max_assignments=3)[0].HITId
+        conn.approve_assignment(
+            self.fake_connection.submit_assignment(
+                hit_id, {'Age': '29'}
+            ).AssignmentId
+        )
+        conn.get_hit(hit_id)
+        self.assertEqual(1, len(conn.get_assignments(hit_id)))
+        self.fake_connection.submit_assignment(hit_id, {'Age': '31'})
+        self.clock.now = cache.DEFAULT_TTLS['get_assignments']
+        self.assertEqual(2, len(conn.get_assignments(hit_id)))
+
+    def test_should_forget_assignments_of_evicted_entries(self):
+        read_cache = cache.ReadThroughCache(maxsize=1, clock=self.clock)
+        conn = read_cache.wrap(self.fake_connection)
+        conn.get_assignments(self.hit_id)
+        self.assertIn(self.assignment_id, read_cache.assignment_keys)
+        conn.get_all_hits()
+        self.assertEqual({}, read_cache.assignment_keys)
+
+    def test_should_invalidate_listings_when_hit_disposed(self):
+        conn = connection.get_connection()
+        conn.approve_assignment(self.assignment_id)
+        self.assertEqual(1, len(list(hit.get_all())))
+        conn.dispose_hit(self.hit_id)
+        self.assertEqual(0, len(list(hit.get_all())))
+
+    def test_should_invalidate_listings_when_hit_created(self):
+        list(hit.get_all())
+        connection.get_connection().create_hit()
+        self.assertEqual(2, len(list(hit.get_all())))
+
+    def test_should_not_cache_calls_with_unhashable_arguments(self):
+        conn = connection.get_connection()
+        conn.get_hit(self.hit_id, response_groups=['Minimal'])
+        conn.get_hit(self.hit_id, response_groups=['Minimal'])
+        self.assertEqual(2, self.fake_connection.calls['get_hit'])
+
+    def test_should_keep_results_of_connections_apart(self):
+        other_connection = fake.FakeMTurkConnection()
+        connection.set_connection(other_connection, 'other')
+        try:
+            self.assertEqual(
+                1, len(connection.get_connection().get_all_hits())
+            )
+            self.assertEqual(
+                [], connection.get_connection('other').get_all_hits()
+            )
+        finally:
+            connection.set_connection(None, 'other')
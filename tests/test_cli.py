@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+import six
+
+from tests.assignment import factories
+from turkleton import cli
+from turkleton import connection
+from turkleton import fake
+
+
+#: Class paths of the fixtures used by the command-line tool
+TASK_CLASS = 'tests.assignment.factories:CategorizationTaskFixture'
+ASSIGNMENT_CLASS = 'tests.assignment.test_assignment.FakeAssignment'
+
+
+class BaseCliTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(BaseCliTestCase, self).setUp()
+        self.fake_connection = fake.FakeMTurkConnection()
+        connection.set_connection(self.fake_connection)
+        self.directory = tempfile.mkdtemp()
+        self.stdout = six.StringIO()
+        self.stderr = six.StringIO()
+        self.patches = [
+            mock.patch.object(
+                connection, 'setup',
+                side_effect=lambda *args, **kwargs: connection.set_connection(
+                    self.fake_connection
+                )
+            ),
+            mock.patch('sys.stdout', self.stdout),
+            mock.patch('sys.stderr', self.stderr)
+        ]
+        self.setup = self.patches[0].start()
+        for each in self.patches[1:]:
+            each.start()
+
+    def tearDown(self):
+        super(BaseCliTestCase, self).tearDown()
+        for each in reversed(self.patches):
+            each.stop()
+        shutil.rmtree(self.directory)
+
+    def write_file(self, name, contents):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as output_file:
+            output_file.write(contents)
+        return path
+
+    def run_cli(self, *argv):
+        return cli.main(
+            [argv[0], '--access-key-id', 'key', '--secret-access-key',
+             'secret'] + list(argv[1:])
+        )
+
+    def upload_hits(self, num_hits, batch_id='1234'):
+        hit_ids = []
+        for _ in range(num_hits):
+            hit_ids.append(
+                factories.make_task().upload(batch_id=batch_id)[0].HITId
+            )
+        return hit_ids
+
+
+class TestMain(BaseCliTestCase):
+
+    def test_should_setup_connection_with_credentials(self):
+        self.run_cli('list', '1234')
+        self.setup.assert_called_once_with('key', 'secret', backend='boto2')
+
+    def test_should_read_credentials_from_environment(self):
+        environ = {'AWS_ACCESS_KEY_ID': 'a', 'AWS_SECRET_ACCESS_KEY': 'b'}
+        with mock.patch.dict(os.environ, environ):
+            cli.main(['list', '1234'])
+        self.setup.assert_called_once_with('a', 'b', backend='boto2')
+
+    def test_should_require_credentials(self):
+        with mock.patch.dict(os.environ, clear=True):
+            with self.assertRaises(SystemExit):
+                cli.main(['list', '1234'])
+
+    def test_should_use_sandbox_when_requested(self):
+        with mock.patch.object(connection, 'setup_sandbox') as setup_sandbox:
+            self.run_cli('list', '1234', '--sandbox')
+        setup_sandbox.assert_called_once_with(
+            'key', 'secret', backend='boto2'
+        )
+
+    def test_should_report_invalid_class_path(self):
+        path = self.write_file('tasks.jsonl', '{}\n')
+        self.assertEqual(2, self.run_cli('upload', 'nonexistent', path))
+        self.assertIn('Invalid class path', self.stderr.getvalue())
+
+
+class TestLoadClass(unittest.TestCase):
+
+    def test_should_load_class_with_colon_separator(self):
+        self.assertIs(
+            factories.CategorizationTaskFixture, cli.load_class(TASK_CLASS)
+        )
+
+    def test_should_load_class_with_dot_separator(self):
+        self.assertIs(
+            factories.CategorizationTaskFixture,
+            cli.load_class(TASK_CLASS.replace(':', '.'))
+        )
+
+    def test_should_raise_error_for_missing_class(self):
+        with self.assertRaises(cli.CommandError):
+            cli.load_class('tests.assignment.factories:Missing')
+
+
+class TestIterConcurrentMap(unittest.TestCase):
+
+    def test_should_yield_outcomes_in_order(self):
+        outcomes = cli.iter_concurrent_map(lambda x: x * 2, range(25), 2)
+        self.assertEqual(
+            [x * 2 for x in range(25)], [each.result for each in outcomes]
+        )
+
+
+class TestUpload(BaseCliTestCase):
+
+    def test_should_upload_task_for_each_json_line(self):
+        path = self.write_file(
+            'tasks.jsonl',
+            '{"image_url": "http://a.com/1"}\n\n'
+            '{"image_url": "http://a.com/2"}\n'
+        )
+        self.assertEqual(
+            0,
+            self.run_cli('upload', TASK_CLASS, path, '--batch-id', '1234')
+        )
+        hit_ids = self.stdout.getvalue().split()
+        self.assertEqual(2, len(hit_ids))
+        self.assertEqual(
+            ['1234', '1234'],
+            [self.fake_connection.hits[each].RequesterAnnotation
+             for each in hit_ids]
+        )
+
+    def test_should_upload_task_for_each_csv_row(self):
+        path = self.write_file(
+            'tasks.csv', 'image_url\nhttp://a.com/1\nhttp://a.com/2\n'
+        )
+        self.assertEqual(0, self.run_cli('upload', TASK_CLASS, path))
+        self.assertEqual(2, len(self.fake_connection.hits))
+
+    def test_should_report_failed_uploads(self):
+        path = self.write_file('tasks.jsonl', '{}\n{}\n')
+        self.fake_connection.fail_next('create_hit')
+        self.assertEqual(1, self.run_cli('upload', TASK_CLASS, path))
+        self.assertEqual(1, len(self.fake_connection.hits))
+        self.assertIn('record 1', self.stderr.getvalue())
+
+    def test_should_skip_duplicate_records_if_deduplicating(self):
+        path = self.write_file(
+            'tasks.jsonl',
+            '{"image_url": "http://a.com/1"}\n'
+            '{"image_url": "http://a.com/1"}\n'
+        )
+        self.assertEqual(
+            0, self.run_cli('upload', TASK_CLASS, path, '--deduplicate')
+        )
+        self.assertEqual(1, len(self.fake_connection.hits))
+        self.assertIn('Skipped 1 duplicate tasks', self.stderr.getvalue())
+
+    def test_should_skip_records_uploaded_by_previous_runs(self):
+        path = self.write_file('tasks.jsonl', '{"image_url": "http://a"}\n')
+        index_path = os.path.join(self.directory, 'uploaded.idx')
+        for _ in range(2):
+            self.run_cli(
+                'upload', TASK_CLASS, path, '--dedup-index', index_path
+            )
+        self.assertEqual(1, len(self.fake_connection.hits))
+
+
+class TestList(BaseCliTestCase):
+
+    def test_should_list_hits_in_batch(self):
+        hit_ids = self.upload_hits(2)
+        self.upload_hits(1, batch_id='other')
+        self.assertEqual(0, self.run_cli('list', '1234'))
+        self.assertEqual(hit_ids, self.stdout.getvalue().split())
+
+    def test_should_list_every_reviewable_hit_in_batch(self):
+        hit_ids = self.upload_hits(12)
+        for each in hit_ids:
+            self.fake_connection.expire_hit(each)
+        self.assertEqual(0, self.run_cli('list', '1234', '--reviewable'))
+        self.assertEqual(
+            sorted(hit_ids), sorted(self.stdout.getvalue().split())
+        )
+
+    def test_should_summarize_assignments_by_status(self):
+        hit_ids = self.upload_hits(2)
+        for each in hit_ids:
+            self.fake_connection.submit_assignment(each, {'Age': '29'})
+        self.fake_connection.approve_assignment(
+            list(self.fake_connection.assignments)[0]
+        )
+
+        self.assertEqual(0, self.run_cli('list', '1234', '--summary'))
+        self.assertEqual(
+            {
+                'batch_id': '1234',
+                'hits': 2,
+                'assignments': 2,
+                'statuses': {'Approved': 1, 'Submitted': 1}
+            },
+            json.loads(self.stdout.getvalue())
+        )
+
+
+class TestExport(BaseCliTestCase):
+
+    def test_should_export_assignments_in_batch(self):
+        for each in self.upload_hits(3):
+            self.fake_connection.submit_assignment(
+                each, {'Age': '29', 'IsOld': '1', 'Categories': 'A|B'}
+            )
+        output = os.path.join(self.directory, 'out.jsonl')
+
+        self.assertEqual(
+            0,
+            self.run_cli('export', ASSIGNMENT_CLASS, '1234', '--format',
+                         'jsonl', '--output', output, '--concurrency', '2')
+        )
+        with open(output) as output_file:
+            rows = [json.loads(line) for line in output_file]
+        self.assertEqual(3, len(rows))
+        self.assertEqual(['A', 'B'], rows[0]['categories'])
+        self.assertIn('exported 3 assignments', self.stderr.getvalue())
+
+
+class TestReview(BaseCliTestCase):
+
+    def setUp(self):
+        super(TestReview, self).setUp()
+        for each in self.upload_hits(2):
+            self.fake_connection.submit_assignment(each, {'Age': '29'})
+        self.assignment_ids = list(self.fake_connection.assignments)
+
+    def test_should_apply_decisions(self):
+        path = self.write_file(
+            'decisions.csv',
+            'assignment_id,decision,message\n'
+            '{},approve,Thanks\n{},reject,Wrong\n'.format(
+                *self.assignment_ids
+            )
+        )
+        self.assertEqual(0, self.run_cli('review', path))
+        self.assertEqual(
+            ['Approved', 'Rejected'],
+            [self.fake_connection.assignments[each].AssignmentStatus
+             for each in self.assignment_ids]
+        )
+        self.assertEqual(
+            {'approved': 1, 'rejected': 1, 'failed': 0},
+            json.loads(self.stdout.getvalue())
+        )
+
+    def test_should_report_unknown_decisions(self):
+        path = self.write_file(
+            'decisions.jsonl',
+            json.dumps({
+                'assignment_id': self.assignment_ids[0], 'decision': 'maybe'
+            }) + '\n'
+        )
+        self.assertEqual(1, self.run_cli('review', path))
+        self.assertIn('Unknown decision', self.stderr.getvalue())
+
+
+class TestDispose(BaseCliTestCase):
+
+    def test_should_dispose_reviewed_hits_in_batch(self):
+        hit_ids = self.upload_hits(2)
+        other_hit_ids = self.upload_hits(1, batch_id='other')
+        for each in hit_ids + other_hit_ids:
+            self.fake_connection.approve_assignment(
+                self.fake_connection.submit_assignment(each, {}).AssignmentId
+            )
+
+        self.assertEqual(0, self.run_cli('dispose', '1234'))
+        self.assertEqual(
+            sorted(hit_ids), sorted(self.stdout.getvalue().split())
+        )
+        self.assertEqual(
+            ['Disposed', 'Disposed', 'Reviewable'],
+            [self.fake_connection.hits[each].HITStatus
+             for each in hit_ids + other_hit_ids]
+        )
+
+    def test_should_report_hits_that_cannot_be_disposed(self):
+        hit_ids = self.upload_hits(1)
+        self.assertEqual(1, self.run_cli('dispose', '1234'))
+        self.assertIn(hit_ids[0], self.stderr.getvalue())
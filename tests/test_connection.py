@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
+import os
+import threading
+import time
 import unittest
 import uuid
 
 import mock
 
+from turkleton import cache
 from turkleton import connection
 
 
@@ -57,6 +61,271 @@ class TestGlobalConnection(unittest.TestCase):
         self.assertEqual(fixture, connection.get_connection())
 
 
+class TestWrappers(unittest.TestCase):
+
+    def setUp(self):
+        super(TestWrappers, self).setUp()
+        self.fixture = mock.MagicMock()
+        connection.set_connection(self.fixture)
+        self.wrapper = mock.MagicMock()
+        connection.add_wrapper(self.wrapper)
+
+    def tearDown(self):
+        super(TestWrappers, self).tearDown()
+        if self.wrapper in connection.connection_wrappers:
+            connection.remove_wrapper(self.wrapper)
+
+    def test_should_return_wrapped_connection(self):
+        self.assertEqual(
+            self.wrapper.return_value, connection.get_connection()
+        )
+        self.wrapper.assert_called_once_with(self.fixture)
+
+    def test_should_only_wrap_connection_once(self):
+        connection.get_connection()
+        connection.get_connection()
+        self.assertEqual(1, self.wrapper.call_count)
+
+    def test_should_rewrap_when_connection_changes(self):
+        connection.get_connection()
+        connection.set_connection(mock.MagicMock())
+        connection.get_connection()
+        self.assertEqual(2, self.wrapper.call_count)
+
+    def test_should_return_unwrapped_connection_after_removal(self):
+        connection.remove_wrapper(self.wrapper)
+        self.assertEqual(self.fixture, connection.get_connection())
+
+
+class TestNamedConnections(unittest.TestCase):
+
+    def setUp(self):
+        super(TestNamedConnections, self).setUp()
+        self.default = mock.MagicMock()
+        self.sandbox = mock.MagicMock()
+        connection.set_connection(self.default)
+        connection.set_connection(self.sandbox, 'sandbox')
+
+    def tearDown(self):
+        super(TestNamedConnections, self).tearDown()
+        for name in connection.get_connection_names():
+            connection.set_connection(None, name)
+
+    def test_should_return_named_connection(self):
+        self.assertEqual(self.sandbox, connection.get_connection('sandbox'))
+        self.assertEqual(self.default, connection.get_connection())
+
+    def test_should_raise_error_for_unknown_name(self):
+        with self.assertRaises(connection.ConnectionError):
+            connection.get_connection('production')
+
+    def test_should_remove_named_connection(self):
+        connection.set_connection(None, 'sandbox')
+        self.assertEqual([], connection.get_connection_names())
+
+    def test_should_list_connection_names(self):
+        connection.set_connection(mock.MagicMock(), 'account1')
+        self.assertEqual(
+            ['account1', 'sandbox'], connection.get_connection_names()
+        )
+
+    def test_should_wrap_each_connection_separately(self):
+        wrapper = mock.MagicMock(side_effect=lambda each: (each,))
+        connection.add_wrapper(wrapper)
+        try:
+            self.assertEqual(
+                (self.sandbox,), connection.get_connection('sandbox')
+            )
+            self.assertEqual((self.default,), connection.get_connection())
+        finally:
+            connection.remove_wrapper(wrapper)
+
+    def test_should_wrap_boto_connections_in_backend(self):
+        from boto.mturk import connection as mturk_connection
+        from turkleton.backends import boto2
+
+        boto_connection = mturk_connection.MTurkConnection(
+            aws_access_key_id='key', aws_secret_access_key='secret'
+        )
+        connection.set_connection(boto_connection, 'sandbox')
+        result = connection.get_connection('sandbox')
+        self.assertIsInstance(result, boto2.Boto2Backend)
+        self.assertIs(boto_connection, result.boto_connection)
+
+    def test_should_setup_named_connection(self):
+        backend_cls = mock.MagicMock()
+        result = connection.setup('a', 'b', backend=backend_cls, name='x')
+        self.assertEqual(result, connection.get_connection('x'))
+        self.assertEqual(self.default, connection.get_connection())
+
+
+class TestBatchSharder(unittest.TestCase):
+
+    def setUp(self):
+        super(TestBatchSharder, self).setUp()
+        self.sharder = connection.BatchSharder(['a', 'b', 'c'])
+
+    def test_should_choose_same_connection_for_batch(self):
+        self.assertEqual(self.sharder('1234'), self.sharder('1234'))
+
+    def test_should_spread_batches_across_connections(self):
+        self.assertEqual(
+            set(['a', 'b', 'c']),
+            set(self.sharder(str(each)) for each in range(100))
+        )
+
+    def test_should_choose_first_connection_without_batch(self):
+        self.assertEqual('a', self.sharder(None))
+
+    def test_should_resolve_sharder_by_batch(self):
+        self.assertEqual(
+            self.sharder('1234'),
+            connection.resolve_connection_name(self.sharder, '1234')
+        )
+
+    def test_should_resolve_name_unchanged(self):
+        self.assertEqual(
+            'a', connection.resolve_connection_name('a', '1234')
+        )
+
+
+class TestForkSafety(unittest.TestCase):
+
+    def setUp(self):
+        super(TestForkSafety, self).setUp()
+        self.factory = mock.MagicMock(
+            side_effect=lambda: mock.MagicMock()
+        )
+        connection.set_connection_factory(self.factory)
+
+    def tearDown(self):
+        super(TestForkSafety, self).tearDown()
+        connection.set_connection(None)
+        connection.set_connection(None, 'sandbox')
+
+    def test_should_build_connection_lazily_once(self):
+        self.assertFalse(self.factory.called)
+        self.assertIs(
+            connection.get_connection(), connection.get_connection()
+        )
+        self.assertEqual(1, self.factory.call_count)
+
+    def test_should_rebuild_connection_in_new_process(self):
+        parent_connection = connection.get_connection()
+        with mock.patch('os.getpid', return_value=-1):
+            child_connection = connection.get_connection()
+        self.assertIsNot(parent_connection, child_connection)
+        self.assertEqual(2, self.factory.call_count)
+
+    def test_should_rebuild_wrapped_connection_in_new_process(self):
+        wrapper = mock.MagicMock(side_effect=lambda each: (each,))
+        connection.add_wrapper(wrapper)
+        try:
+            parent_connection = connection.get_connection()
+            with mock.patch('os.getpid', return_value=-1):
+                child_connection = connection.get_connection()
+        finally:
+            connection.remove_wrapper(wrapper)
+        self.assertIsNot(parent_connection[0], child_connection[0])
+
+    def test_should_rebuild_named_connection_in_new_process(self):
+        connection.set_connection_factory(self.factory, 'sandbox')
+        self.assertEqual(['sandbox'], connection.get_connection_names())
+        parent_connection = connection.get_connection('sandbox')
+        with mock.patch('os.getpid', return_value=-1):
+            child_connection = connection.get_connection('sandbox')
+        self.assertIsNot(parent_connection, child_connection)
+
+    def test_should_keep_set_connection_in_new_process(self):
+        fixture = mock.MagicMock()
+        connection.set_connection(fixture)
+        with mock.patch('os.getpid', return_value=-1):
+            self.assertIs(fixture, connection.get_connection())
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'Requires os.fork')
+    def test_should_rebuild_connection_in_forked_process(self):
+        parent_id = id(connection.get_connection())
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            rebuilt = id(connection.get_connection()) != parent_id
+            os.write(write_end, b'1' if rebuilt else b'0')
+            os._exit(0)
+        os.close(write_end)
+        result = os.read(read_end, 1)
+        os.close(read_end)
+        os.waitpid(pid, 0)
+        self.assertEqual(b'1', result)
+
+    def test_should_rebuild_connection_once_across_threads(self):
+        def slow_factory():
+            time.sleep(0.01)
+            return mock.MagicMock()
+
+        factory = mock.MagicMock(side_effect=slow_factory)
+        connection.set_connection_factory(factory)
+        connection.get_connection()
+        results = []
+        with mock.patch('os.getpid', return_value=-1):
+            threads = [
+                threading.Thread(
+                    target=lambda: results.append(connection.get_connection())
+                )
+                for _ in range(4)
+            ]
+            for each in threads:
+                each.start()
+            for each in threads:
+                each.join()
+        self.assertEqual(2, factory.call_count)
+        self.assertEqual(1, len(set(id(each) for each in results)))
+
+    def test_should_reinit_wrapper_owners_in_new_process(self):
+        read_through_cache = cache.ReadThroughCache()
+        connection.add_wrapper(read_through_cache.wrap)
+        try:
+            connection.get_connection()
+            parent_lock = read_through_cache.stats_lock
+            with mock.patch('os.getpid', return_value=-1):
+                connection.get_connection()
+        finally:
+            connection.remove_wrapper(read_through_cache.wrap)
+        self.assertIsNot(parent_lock, read_through_cache.stats_lock)
+
+    def test_should_call_fork_handlers_in_new_process(self):
+        handler = mock.MagicMock()
+        connection.add_fork_handler(handler)
+        try:
+            connection.get_connection()
+            self.assertFalse(handler.called)
+            with mock.patch('os.getpid', return_value=-1):
+                connection.get_connection()
+        finally:
+            connection._fork_handlers.remove(handler)
+        self.assertTrue(handler.called)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'Requires os.fork')
+    def test_should_release_wrapper_locks_in_forked_process(self):
+        read_through_cache = cache.ReadThroughCache()
+        connection.add_wrapper(read_through_cache.wrap)
+        read_end, write_end = os.pipe()
+        try:
+            with read_through_cache.entries.lock:
+                pid = os.fork()
+                if pid == 0:
+                    connection.get_connection()
+                    acquired = read_through_cache.entries.lock.acquire(False)
+                    os.write(write_end, b'1' if acquired else b'0')
+                    os._exit(0)
+        finally:
+            connection.remove_wrapper(read_through_cache.wrap)
+        os.close(write_end)
+        result = os.read(read_end, 1)
+        os.close(read_end)
+        os.waitpid(pid, 0)
+        self.assertEqual(b'1', result)
+
+
 class TestSetup(BaseConnectionTestCase):
 
     def setup_connection(self):
@@ -78,7 +347,7 @@ class TestSetup(BaseConnectionTestCase):
 
     def test_should_return_mturk_connection(self):
         self.assertEqual(
-            self.setup_connection(), self.mturk_connection()
+            self.setup_connection().boto_connection, self.mturk_connection()
         )
 
 
@@ -109,7 +378,7 @@ class TestSetupSandbox(BaseConnectionTestCase):
 
     def test_should_return_mturk_connection(self):
         self.assertEqual(
-            self.setup_sandbox(), self.mturk_connection()
+            self.setup_sandbox().boto_connection, self.mturk_connection()
         )
 
 
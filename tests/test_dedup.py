@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from tests.assignment import factories
+from turkleton import connection
+from turkleton import dedup
+from turkleton import fake
+
+
+class TestContentHash(unittest.TestCase):
+
+    def test_should_hash_equal_params_the_same(self):
+        self.assertEqual(
+            dedup.content_hash({'a': 1, 'b': u'é'}),
+            dedup.content_hash({'b': u'é', 'a': 1})
+        )
+
+    def test_should_hash_different_params_differently(self):
+        self.assertNotEqual(
+            dedup.content_hash({'a': 1}), dedup.content_hash({'a': 2})
+        )
+
+
+class TestFileIndex(unittest.TestCase):
+
+    def setUp(self):
+        super(TestFileIndex, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'uploaded.idx')
+
+    def tearDown(self):
+        super(TestFileIndex, self).tearDown()
+        shutil.rmtree(self.directory)
+
+    def test_should_load_keys_added_by_previous_index(self):
+        index = dedup.FileIndex(self.path)
+        index.add(('1234', 'abc'))
+        index.add(('1234', 'abc'))
+        index.close()
+        reloaded = dedup.FileIndex(self.path)
+        self.assertIn(('1234', 'abc'), reloaded)
+        self.assertEqual(1, len(reloaded))
+        reloaded.close()
+
+
+class TestDeduplicator(unittest.TestCase):
+
+    def setUp(self):
+        super(TestDeduplicator, self).setUp()
+        self.deduplicator = dedup.Deduplicator()
+
+    def test_should_skip_task_already_uploaded_in_batch(self):
+        key = self.deduplicator.claim('1234', {'a': 1})
+        self.deduplicator.commit(key)
+        self.assertIsNone(self.deduplicator.claim('1234', {'a': 1}))
+        self.assertEqual(1, self.deduplicator.skipped)
+
+    def test_should_skip_task_being_uploaded_in_batch(self):
+        self.deduplicator.claim('1234', {'a': 1})
+        self.assertIsNone(self.deduplicator.claim('1234', {'a': 1}))
+
+    def test_should_not_skip_task_in_other_batch(self):
+        self.deduplicator.commit(self.deduplicator.claim('1234', {'a': 1}))
+        self.assertIsNotNone(self.deduplicator.claim('5678', {'a': 1}))
+
+    def test_should_not_skip_released_task(self):
+        self.deduplicator.release(self.deduplicator.claim('1234', {'a': 1}))
+        self.assertIsNotNone(self.deduplicator.claim('1234', {'a': 1}))
+        self.assertEqual(0, self.deduplicator.skipped)
+
+
+class TestDeduplicatedUpload(unittest.TestCase):
+
+    def setUp(self):
+        super(TestDeduplicatedUpload, self).setUp()
+        self.fake_connection = fake.FakeMTurkConnection()
+        connection.set_connection(self.fake_connection)
+
+    def test_should_skip_duplicates_before_any_request(self):
+        with dedup.deduplicate() as deduplicator:
+            factories.make_task().upload(batch_id='1234')
+            with mock.patch.object(
+                    self.fake_connection, 'register_hit_type') as register:
+                result = factories.make_task().upload(batch_id='1234')
+        self.assertIsNone(result)
+        self.assertFalse(register.called)
+        self.assertEqual(1, len(self.fake_connection.hits))
+        self.assertEqual(1, deduplicator.skipped)
+
+    def test_should_upload_again_after_failed_upload(self):
+        self.fake_connection.fail_next('create_hit')
+        with dedup.deduplicate():
+            with self.assertRaises(fake.FakeRequestError):
+                factories.make_task().upload(batch_id='1234')
+            factories.make_task().upload(batch_id='1234')
+        self.assertEqual(1, len(self.fake_connection.hits))
+
+    def test_should_upload_duplicates_outside_context(self):
+        with dedup.deduplicate():
+            pass
+        factories.make_task().upload(batch_id='1234')
+        factories.make_task().upload(batch_id='1234')
+        self.assertEqual(2, len(self.fake_connection.hits))
+
+
+if __name__ == '__main__':
+    unittest.main()
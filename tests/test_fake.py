@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+import datetime
+import time
+import unittest
+
+from tests.assignment import factories
+from tests.assignment import test_assignment
+from turkleton import connection
+from turkleton import fake
+from turkleton.assignment import hit
+
+
+class BaseFakeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(BaseFakeTestCase, self).setUp()
+        self.fake_connection = fake.FakeMTurkConnection()
+        connection.set_connection(self.fake_connection)
+
+    def upload(self, batch_id='1234', max_assignments=1):
+        task = factories.make_task()
+        task.__assignments_per_hit__ = max_assignments
+        return task.upload(batch_id=batch_id)[0]
+
+
+class TestHITLifecycle(BaseFakeTestCase):
+
+    def test_should_store_uploaded_hits(self):
+        created = self.upload()
+        self.assertEqual(
+            [created.HITId],
+            [each.hit_id for each in hit.get_all_by_batch_id('1234')]
+        )
+
+    def test_should_reuse_hit_type_with_same_properties(self):
+        first = self.upload()
+        second = self.upload()
+        self.assertEqual(1, len(self.fake_connection.hit_types))
+        self.assertEqual(first.HITTypeId, second.HITTypeId)
+        self.assertEqual(factories.make_task().__title__, first.Title)
+
+    def test_should_raise_error_for_unknown_hit_type(self):
+        with self.assertRaises(fake.FakeRequestError):
+            self.fake_connection.create_hit(hit_type='1234')
+
+    def test_should_store_layout_parameters(self):
+        created = self.upload()
+        self.assertEqual(
+            'http://herp.com/derp',
+            created.layout_params['HITLayoutParameter.1.Value']
+        )
+
+    def test_should_make_hit_reviewable_once_all_assignments_submitted(self):
+        created = self.upload(max_assignments=2)
+        self.fake_connection.submit_assignment(created.HITId, {'Age': '1'})
+        self.assertEqual([], hit.get_reviewable_by_batch_id('1234'))
+        self.fake_connection.submit_assignment(created.HITId, {'Age': '2'})
+        self.assertEqual(1, len(hit.get_reviewable_by_batch_id('1234')))
+
+    def test_should_reject_submissions_beyond_max_assignments(self):
+        created = self.upload()
+        self.fake_connection.submit_assignment(created.HITId, {})
+        with self.assertRaises(fake.FakeRequestError):
+            self.fake_connection.submit_assignment(created.HITId, {})
+
+    def test_should_review_assignments_and_dispose_hit(self):
+        created = self.upload()
+        self.fake_connection.submit_assignment(
+            created.HITId, {'Age': '29', 'IsOld': '0', 'Categories': 'A'}
+        )
+        assignments = test_assignment.FakeAssignment.get_by_hit_id(
+            created.HITId
+        )
+        self.assertEqual('29', assignments[0].age)
+        assignments[0].approve('Good job!')
+
+        hit.get_reviewable_by_batch_id('1234')[0].dispose()
+        self.assertEqual([], list(hit.get_all()))
+        self.assertEqual(
+            'Approved',
+            self.fake_connection.assignments[
+                assignments[0].assignment_id
+            ].AssignmentStatus
+        )
+
+    def test_should_not_dispose_hit_with_unreviewed_assignments(self):
+        created = self.upload()
+        self.fake_connection.submit_assignment(created.HITId, {})
+        with self.assertRaises(fake.FakeRequestError):
+            self.fake_connection.dispose_hit(created.HITId)
+
+    def test_should_stream_assignments(self):
+        created = self.upload(max_assignments=3)
+        for each in range(3):
+            self.fake_connection.submit_assignment(
+                created.HITId, {'Age': str(each)}
+            )
+        result = list(test_assignment.FakeAssignment.stream_by_hit_id(
+            created.HITId, page_size=2
+        ))
+        self.assertEqual(['0', '1', '2'], [each.age for each in result])
+
+    def test_should_grant_each_bonus_once(self):
+        created = self.upload()
+        self.fake_connection.submit_assignment(created.HITId, {})
+        assignment = test_assignment.FakeAssignment.get_by_hit_id(
+            created.HITId
+        )[0]
+        assignment.grant_bonus(0.25, 'Thanks')
+        assignment.grant_bonus(0.25, 'Thanks')
+        self.assertEqual(1, len(self.fake_connection.bonuses))
+
+    def test_should_index_added_assignments_by_hit(self):
+        first = self.upload()
+        second = self.upload()
+        assignment = fake.FakeAssignment(
+            assignment_id='A1', hit_id=first.HITId, worker_id='W1',
+            answer_values={}, accept_time=datetime.datetime(2015, 6, 15),
+            submit_time=datetime.datetime(2015, 6, 15)
+        )
+        self.fake_connection.add_assignment(assignment)
+        self.fake_connection.add_assignment(assignment)
+        self.assertEqual(
+            [assignment], self.fake_connection.get_assignments(first.HITId)
+        )
+        self.assertEqual(
+            [], self.fake_connection.get_assignments(second.HITId)
+        )
+
+
+class TestSimulation(unittest.TestCase):
+
+    def test_should_count_calls(self):
+        fake_connection = fake.FakeMTurkConnection()
+        fake_connection.get_all_hits()
+        fake_connection.get_all_hits()
+        self.assertEqual(2, fake_connection.calls['get_all_hits'])
+
+    def test_should_apply_per_operation_latency(self):
+        fake_connection = fake.FakeMTurkConnection(
+            latency={'get_all_hits': 0.05}
+        )
+        start = time.time()
+        fake_connection.get_all_hits()
+        fake_connection.get_reviewable_hits()
+        self.assertGreaterEqual(time.time() - start, 0.05)
+
+    def test_should_throttle_calls_beyond_rate(self):
+        fake_connection = fake.FakeMTurkConnection(calls_per_second=2)
+        fake_connection.get_all_hits()
+        fake_connection.get_all_hits()
+        with self.assertRaisesRegexp(fake.FakeRequestError, 'throttled'):
+            fake_connection.get_all_hits()
+
+    def test_should_raise_injected_failures(self):
+        fake_connection = fake.FakeMTurkConnection()
+        fake_connection.fail_next('get_all_hits', ValueError('Herp'))
+        with self.assertRaisesRegexp(ValueError, 'Herp'):
+            fake_connection.get_all_hits()
+        fake_connection.get_all_hits()
+
+    def test_should_fail_randomly_at_failure_rate(self):
+        fake_connection = fake.FakeMTurkConnection(failure_rate=1)
+        with self.assertRaises(fake.FakeRequestError) as context:
+            fake_connection.get_all_hits()
+        self.assertEqual('InternalError', context.exception.code)
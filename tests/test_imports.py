@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import subprocess
+import sys
+import unittest
+
+
+#: Modules that must not import boto until a connection is needed
+LAZY_MODULES = [
+    'turkleton.connection',
+    'turkleton.assignment.answer',
+    'turkleton.assignment.assignment',
+    'turkleton.assignment.hit',
+    'turkleton.assignment.parser',
+    'turkleton.assignment.task',
+    'turkleton.pipeline',
+    'turkleton.scheduler',
+    'turkleton.breaker',
+    'turkleton.backends.boto2',
+    'turkleton.backends.json_api'
+]
+
+
+def get_imported_modules(module_name):
+    """Import a module in a fresh interpreter and return every module it
+    imported.
+
+    :param module_name: A module name
+    :type module_name: str
+    :rtype: set of str
+    """
+    output = subprocess.check_output([
+        sys.executable, '-c',
+        'import sys; import {}; print("\\n".join(sys.modules))'.format(
+            module_name
+        )
+    ])
+    return set(output.decode('utf-8').split())
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_should_not_import_boto_on_import(self):
+        for module_name in LAZY_MODULES:
+            imported = get_imported_modules(module_name)
+            self.assertIn(module_name, imported)
+            self.assertNotIn('boto', imported, module_name)
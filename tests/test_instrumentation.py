@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import mock
+
+from turkleton import connection
+from turkleton import fake
+from turkleton import instrumentation
+from turkleton.assignment import hit
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_should_return_cumulative_counts(self):
+        histogram = instrumentation.Histogram([1, 2, 3])
+        for each in [0.5, 1.5, 2.5, 2.6, 10]:
+            histogram.observe(each)
+        self.assertEqual(
+            [(1, 1), (2, 2), (3, 4)], histogram.cumulative_counts()
+        )
+        self.assertEqual(5, histogram.count)
+
+
+class BaseInstrumentationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(BaseInstrumentationTestCase, self).setUp()
+        self.snapshots = []
+        self.fake_connection = fake.FakeMTurkConnection()
+        connection.set_connection(self.fake_connection)
+        self.instrumentation = instrumentation.enable(exporters=[
+            instrumentation.CallbackExporter(self.snapshots.append)
+        ])
+
+    def tearDown(self):
+        super(BaseInstrumentationTestCase, self).tearDown()
+        instrumentation.disable(self.instrumentation)
+
+
+class TestInstrumentation(BaseInstrumentationTestCase):
+
+    def test_should_wrap_connection(self):
+        self.assertIsInstance(
+            connection.get_connection(),
+            instrumentation.InstrumentedConnection
+        )
+
+    def test_should_return_raw_connection_once_disabled(self):
+        instrumentation.disable(self.instrumentation)
+        self.assertIs(self.fake_connection, connection.get_connection())
+        connection.add_wrapper(self.instrumentation.wrap)
+
+    def test_should_count_calls(self):
+        list(hit.get_all())
+        list(hit.get_all())
+        snapshot = self.instrumentation.snapshot()
+        self.assertEqual(2, snapshot['get_all_hits']['calls'])
+        self.assertEqual(2, snapshot['get_all_hits']['latency']['count'])
+
+    def test_should_count_errors_by_type(self):
+        self.fake_connection.fail_next('dispose_hit', ValueError('Herp'))
+        with self.assertRaises(ValueError):
+            connection.get_connection().dispose_hit('1234')
+        with self.assertRaises(fake.FakeRequestError):
+            connection.get_connection().dispose_hit('1234')
+        self.assertEqual(
+            {'ValueError': 1, 'FakeRequestError': 1},
+            self.instrumentation.snapshot()['dispose_hit']['errors']
+        )
+
+    def test_should_pass_snapshot_to_exporters(self):
+        list(hit.get_all())
+        self.instrumentation.export()
+        self.assertEqual(1, self.snapshots[0]['get_all_hits']['calls'])
+
+    def test_should_export_automatically_after_interval(self):
+        self.instrumentation.export_interval = 0
+        list(hit.get_all())
+        self.assertEqual(1, len(self.snapshots))
+
+    def test_should_not_fail_calls_when_exporter_fails(self):
+        self.instrumentation.exporters.insert(
+            0, mock.MagicMock(side_effect=OSError('Disk full'))
+        )
+        self.instrumentation.export_interval = 0
+        with mock.patch.object(instrumentation.logger, 'exception') as log:
+            list(hit.get_all())
+        self.assertTrue(log.called)
+        self.assertEqual(1, len(self.snapshots))
+
+    def test_should_time_iteration_of_generators(self):
+        def iter_items():
+            time.sleep(0.01)
+            yield 1
+            raise ValueError('Herp')
+
+        items = self.instrumentation.call('iter_items', iter_items)
+        self.assertEqual({}, self.instrumentation.snapshot())
+        with self.assertRaises(ValueError):
+            list(items)
+        metrics = self.instrumentation.snapshot()['iter_items']
+        self.assertEqual(1, metrics['calls'])
+        self.assertEqual({'ValueError': 1}, metrics['errors'])
+        self.assertGreaterEqual(metrics['latency']['sum'], 0.01)
+
+    def test_should_discard_metrics_on_reset(self):
+        list(hit.get_all())
+        self.instrumentation.reset()
+        self.assertEqual({}, self.instrumentation.snapshot())
+
+
+class TestInstrumentRequests(unittest.TestCase):
+
+    def setUp(self):
+        super(TestInstrumentRequests, self).setUp()
+        self.instrumentation = instrumentation.Instrumentation()
+        self.mock_connection = mock.MagicMock()
+        self.mock_connection.make_request.return_value = io.BytesIO(b'12345')
+        self.instrumentation._instrument_requests(self.mock_connection)
+
+    def test_should_record_bytes_sent_and_received(self):
+        self.instrumentation.call(
+            'get_hit',
+            lambda: self.mock_connection.make_request(
+                None, {'HITId': '1'}
+            ).read()
+        )
+        metrics = self.instrumentation.snapshot()['get_hit']
+        self.assertEqual(len('HITId=1'), metrics['bytes_out'])
+        self.assertEqual(5, metrics['bytes_in'])
+
+    def test_should_attribute_requests_outside_operations(self):
+        self.mock_connection.make_request(None, {}).read()
+        self.assertEqual(
+            5,
+            self.instrumentation.snapshot()[
+                instrumentation.UNATTRIBUTED_OPERATION
+            ]['bytes_in']
+        )
+
+
+class FakeBotoConnection(object):
+
+    def make_request(self, action, params=None):
+        return io.BytesIO(b'12345')
+
+
+class TestTrafficHooks(unittest.TestCase):
+
+    def setUp(self):
+        super(TestTrafficHooks, self).setUp()
+        self.boto_connection = FakeBotoConnection()
+
+    def test_should_restore_make_request_once_released(self):
+        metrics = instrumentation.Instrumentation()
+        metrics._instrument_requests(self.boto_connection)
+        self.assertIn('make_request', vars(self.boto_connection))
+        metrics.release()
+        self.assertEqual({}, vars(self.boto_connection))
+
+    def test_should_restore_make_request_on_disable(self):
+        metrics = instrumentation.enable()
+        metrics._instrument_requests(self.boto_connection)
+        instrumentation.disable(metrics)
+        self.assertNotIn('make_request', vars(self.boto_connection))
+
+    def test_should_record_traffic_for_each_instrumentation(self):
+        first = instrumentation.Instrumentation()
+        second = instrumentation.Instrumentation()
+        first._instrument_requests(self.boto_connection)
+        second._instrument_requests(self.boto_connection)
+        second.call(
+            'get_hit',
+            lambda: self.boto_connection.make_request(None, {}).read()
+        )
+        self.assertEqual(
+            5,
+            first.snapshot()[instrumentation.UNATTRIBUTED_OPERATION][
+                'bytes_in'
+            ]
+        )
+        self.assertEqual(5, second.snapshot()['get_hit']['bytes_in'])
+
+        first.release()
+        self.boto_connection.make_request(None, {}).read()
+        self.assertEqual(
+            5,
+            second.snapshot()[instrumentation.UNATTRIBUTED_OPERATION][
+                'bytes_in'
+            ]
+        )
+
+
+class TestExport(unittest.TestCase):
+
+    def test_should_export_one_thread_at_a_time(self):
+        state = {'active': 0, 'most_active': 0}
+        lock = threading.Lock()
+
+        def exporter(snapshot):
+            with lock:
+                state['active'] += 1
+                state['most_active'] = max(
+                    state['most_active'], state['active']
+                )
+            time.sleep(0.01)
+            with lock:
+                state['active'] -= 1
+
+        metrics = instrumentation.Instrumentation(exporters=[exporter])
+        threads = [
+            threading.Thread(target=metrics.export) for _ in range(5)
+        ]
+        for each in threads:
+            each.start()
+        for each in threads:
+            each.join()
+        self.assertEqual(1, state['most_active'])
+
+
+class TestPrometheusTextFileExporter(BaseInstrumentationTestCase):
+
+    def setUp(self):
+        super(TestPrometheusTextFileExporter, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'turkleton.prom')
+
+    def tearDown(self):
+        super(TestPrometheusTextFileExporter, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def test_should_write_metrics_in_text_format(self):
+        list(hit.get_all())
+        instrumentation.PrometheusTextFileExporter(self.path)(
+            self.instrumentation.snapshot()
+        )
+        with open(self.path) as metrics_file:
+            contents = metrics_file.read()
+        self.assertIn(
+            'turkleton_calls_total{operation="get_all_hits"} 1', contents
+        )
+        self.assertIn(
+            'turkleton_call_duration_seconds_bucket'
+            '{operation="get_all_hits",le="+Inf"} 1',
+            contents
+        )
+
+    def test_should_replace_previous_file_without_leftovers(self):
+        exporter = instrumentation.PrometheusTextFileExporter(self.path)
+        exporter(self.instrumentation.snapshot())
+        list(hit.get_all())
+        exporter(self.instrumentation.snapshot())
+        with open(self.path) as metrics_file:
+            self.assertIn('get_all_hits', metrics_file.read())
+        self.assertEqual(['turkleton.prom'], os.listdir(self.temp_dir))
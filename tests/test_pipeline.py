@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+
+import mock
+
+from tests.assignment import factories
+from tests.assignment import test_assignment
+from turkleton import connection
+from turkleton import fake
+from turkleton import pipeline
+from turkleton.assignment import hit
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_should_apply_stages_in_order(self):
+        outcomes = pipeline.Pipeline(range(5)).map(
+            lambda each: each + 1, workers=3
+        ).flat_map(
+            lambda each: [each] * 2, workers=2
+        )
+        self.assertEqual(
+            [1, 1, 2, 2, 3, 3, 4, 4, 5, 5],
+            sorted(each.result for each in outcomes)
+        )
+
+    def test_should_pass_failures_through_later_stages(self):
+        def fail_on_two(each):
+            if each == 2:
+                raise ValueError('Herp')
+            return each
+
+        outcomes = list(
+            pipeline.Pipeline(range(4)).map(fail_on_two).map(str)
+        )
+        failed = [each for each in outcomes if not each.succeeded]
+        self.assertEqual(1, len(failed))
+        self.assertEqual(2, failed[0].item)
+        self.assertEqual(
+            ['0', '1', '3'],
+            sorted(each.result for each in outcomes if each.succeeded)
+        )
+
+    def test_should_report_source_failures(self):
+        def source():
+            yield 1
+            raise ValueError('Herp')
+
+        outcomes = list(pipeline.Pipeline(source()).map(str))
+        self.assertEqual(
+            [True, False], [each.succeeded for each in outcomes]
+        )
+
+    def test_should_bound_items_taken_from_source(self):
+        taken = []
+        release = threading.Event()
+
+        def source():
+            for each in range(100):
+                taken.append(each)
+                yield each
+
+        def slow(each):
+            release.wait()
+            return each
+
+        outcomes = iter(
+            pipeline.Pipeline(source(), maxsize=2).map(slow)
+        )
+        first = threading.Thread(target=lambda: next(outcomes))
+        first.start()
+        first.join(0.3)
+        # One item held by the worker plus two in each queue
+        self.assertLessEqual(len(taken), 4)
+        release.set()
+        first.join()
+        self.assertEqual(99, len(list(outcomes)))
+
+    def test_should_stop_workers_when_closed_early(self):
+        num_threads = threading.active_count()
+        outcomes = iter(pipeline.Pipeline(range(1000), maxsize=1).map(str))
+        next(outcomes)
+        outcomes.close()
+        self.assertEqual(num_threads, threading.active_count())
+
+
+class TestReviewBatch(unittest.TestCase):
+
+    def setUp(self):
+        super(TestReviewBatch, self).setUp()
+        self.fake_connection = fake.FakeMTurkConnection()
+        connection.set_connection(self.fake_connection)
+
+    def submit(self, age, batch_id='1234'):
+        created = factories.make_task().upload(batch_id=batch_id)[0]
+        return self.fake_connection.submit_assignment(
+            created.HITId, {'Age': age, 'IsOld': '0', 'Categories': 'A'}
+        )
+
+    def decide(self, assignment):
+        if assignment.age == 'skip':
+            return None
+        if assignment.age == 'old':
+            return 'reject', 'Too old'
+        return 'approve', 'Thanks'
+
+    def review(self, batch_id='1234', circuit_breaker=None):
+        return list(pipeline.review_batch(
+            test_assignment.FakeAssignment, batch_id, self.decide,
+            fetch_workers=2, review_workers=2, maxsize=1,
+            circuit_breaker=circuit_breaker
+        ))
+
+    def test_should_approve_and_reject_by_decision(self):
+        approved = self.submit('29')
+        rejected = self.submit('old')
+        outcomes = self.review()
+        self.assertEqual(
+            ['approve', 'reject'], sorted(each.result for each in outcomes)
+        )
+        self.assertEqual('Approved', approved.AssignmentStatus)
+        self.assertEqual('Rejected', rejected.AssignmentStatus)
+
+    def test_should_leave_undecided_assignments(self):
+        skipped = self.submit('skip')
+        self.assertEqual([], self.review())
+        self.assertEqual('Submitted', skipped.AssignmentStatus)
+
+    def test_should_review_every_page_of_reviewable_hits(self):
+        for _ in range(hit.REVIEWABLE_PAGE_SIZE + 1):
+            self.submit('29')
+        self.assertEqual(
+            hit.REVIEWABLE_PAGE_SIZE + 1, len(self.review())
+        )
+
+    def test_should_only_review_batch(self):
+        other = self.submit('29', batch_id='5678')
+        self.review()
+        self.assertEqual('Submitted', other.AssignmentStatus)
+
+    def test_should_not_review_assignments_twice(self):
+        self.submit('29')
+        self.review()
+        self.assertEqual([], self.review())
+
+    def test_should_report_failed_reviews(self):
+        self.submit('29')
+        self.fake_connection.fail_next('approve_assignment')
+        outcomes = self.review()
+        self.assertEqual([False], [each.succeeded for each in outcomes])
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+    def test_should_pause_while_circuit_open(self):
+        self.submit('29')
+        circuit_breaker = mock.MagicMock()
+        self.review(circuit_breaker=circuit_breaker)
+        self.assertEqual([
+            mock.call('get_assignments'), mock.call('approve_assignment')
+        ], circuit_breaker.wait.call_args_list)
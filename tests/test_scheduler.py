@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import mock
+
+from tests.assignment import factories
+from turkleton import connection
+from turkleton import fake
+from turkleton import scheduler
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def setUp(self):
+        super(TestTokenBucket, self).setUp()
+        self.now = 0.0
+        self.sleep = mock.MagicMock()
+        self.bucket = scheduler.TokenBucket(
+            2, burst=2, clock=lambda: self.now, sleep=self.sleep
+        )
+
+    def test_should_allow_bursts_without_sleeping(self):
+        self.bucket.acquire()
+        self.bucket.acquire()
+        self.assertFalse(self.sleep.called)
+
+    def test_should_sleep_until_token_available(self):
+        for _ in range(3):
+            self.bucket.acquire()
+        self.sleep.assert_called_once_with(0.5)
+
+    def test_should_refill_at_rate(self):
+        self.bucket.acquire()
+        self.bucket.acquire()
+        self.now = 1.0
+        self.bucket.acquire()
+        self.assertFalse(self.sleep.called)
+
+
+class BaseSchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(BaseSchedulerTestCase, self).setUp()
+        self.fake_connection = fake.FakeMTurkConnection()
+        connection.set_connection(self.fake_connection)
+        self.uploads = scheduler.UploadScheduler(max_workers=1)
+
+    def submit(self, batch_id, num_tasks):
+        for index in range(num_tasks):
+            self.uploads.submit(
+                factories.make_task({'index': index}), batch_id
+            )
+
+    def get_uploaded_batch_ids(self):
+        return [
+            each.RequesterAnnotation
+            for each in self.fake_connection.hits.values()
+        ]
+
+
+class TestUploadScheduler(BaseSchedulerTestCase):
+
+    def test_should_upload_every_queued_task(self):
+        self.uploads.add_batch('1234')
+        self.submit('1234', 3)
+        outcomes = self.uploads.run()
+        self.assertEqual(3, len(outcomes))
+        self.assertTrue(all(each.succeeded for each in outcomes))
+        self.assertEqual(0, self.uploads.pending())
+
+    def test_should_serve_higher_priority_batches_first(self):
+        self.uploads.add_batch('backfill')
+        self.uploads.add_batch('urgent', priority=10)
+        self.submit('backfill', 3)
+        self.submit('urgent', 2)
+        self.uploads.run()
+        self.assertEqual(
+            ['urgent', 'urgent', 'backfill', 'backfill', 'backfill'],
+            self.get_uploaded_batch_ids()
+        )
+
+    def test_should_share_uploads_by_weight(self):
+        self.uploads.add_batch('heavy', weight=2)
+        self.uploads.add_batch('light')
+        self.submit('heavy', 6)
+        self.submit('light', 6)
+        self.uploads.run()
+        self.assertEqual(
+            4, self.get_uploaded_batch_ids()[:6].count('heavy')
+        )
+
+    def test_should_not_exceed_max_live_hits(self):
+        self.uploads.add_batch('1234', max_live_hits=3, live_hits=1)
+        self.submit('1234', 4)
+        self.uploads.run()
+        self.assertEqual(2, len(self.fake_connection.hits))
+        self.assertEqual(2, self.uploads.pending('1234'))
+
+    def test_should_upload_more_once_hits_released(self):
+        self.uploads.add_batch('1234', max_live_hits=2)
+        self.submit('1234', 4)
+        self.uploads.run()
+        self.uploads.release_hits('1234', 2)
+        self.uploads.run()
+        self.assertEqual(4, len(self.fake_connection.hits))
+
+    def test_should_free_live_hit_when_upload_fails(self):
+        self.uploads.add_batch('1234', max_live_hits=1)
+        self.submit('1234', 2)
+        self.fake_connection.fail_next('create_hit')
+        outcomes = self.uploads.run()
+        self.assertEqual(
+            [False, True], [each.succeeded for each in outcomes]
+        )
+
+    def test_should_raise_error_for_unknown_batch(self):
+        with self.assertRaises(scheduler.UploadScheduler.UnknownBatchError):
+            self.uploads.submit(factories.make_task(), '1234')
+
+    def test_should_limit_upload_rate(self):
+        sleep = mock.MagicMock()
+        uploads = scheduler.UploadScheduler(
+            max_workers=2, rate=1, clock=lambda: 0.0, sleep=sleep
+        )
+        uploads.add_batch('1234')
+        for _ in range(3):
+            uploads.submit(factories.make_task(), '1234')
+        uploads.run()
+        self.assertEqual(2, sleep.call_count)
+
+    def test_should_upload_concurrently(self):
+        uploads = scheduler.UploadScheduler(max_workers=4)
+        uploads.add_batch('1234')
+        for index in range(20):
+            uploads.submit(factories.make_task({'index': index}), '1234')
+        outcomes = uploads.run()
+        self.assertEqual(20, len(outcomes))
+        self.assertEqual(20, len(self.fake_connection.hits))
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+    def test_should_pause_while_circuit_open(self):
+        circuit_breaker = mock.MagicMock()
+        uploads = scheduler.UploadScheduler(
+            max_workers=1, circuit_breaker=circuit_breaker
+        )
+        uploads.add_batch('1234')
+        uploads.submit(factories.make_task(), '1234')
+        uploads.run()
+        circuit_breaker.wait.assert_called_once_with('create_hit')
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import mock
+
+from tests.assignment import factories
+from tests.assignment import test_assignment
+from turkleton import connection
+from turkleton import timing
+from turkleton.assignment import task
+
+
+class TestSpan(unittest.TestCase):
+
+    def test_should_return_null_span_when_not_collecting(self):
+        self.assertIs(timing._NULL_SPAN, timing.span('herp'))
+
+    def test_should_record_nested_span_paths(self):
+        with timing.collect() as timings:
+            with timing.span('outer'):
+                with timing.span('inner'):
+                    pass
+                with timing.span('inner'):
+                    pass
+        summary = timings.summary()
+        self.assertEqual(1, summary['outer']['count'])
+        self.assertEqual(2, summary['outer/inner']['count'])
+
+    def test_should_record_span_when_error_raised(self):
+        with timing.collect() as timings:
+            with self.assertRaises(ValueError):
+                with timing.span('outer'):
+                    raise ValueError('Herp')
+        self.assertIn('outer', timings.summary())
+
+
+class TestCollect(unittest.TestCase):
+
+    def test_should_restore_previous_collector(self):
+        with timing.collect() as outer:
+            with timing.collect():
+                pass
+            self.assertIs(outer, timing.current_collector)
+        self.assertIsNone(timing.current_collector)
+
+    def test_should_call_callback_with_collector(self):
+        callback = mock.MagicMock()
+        with timing.collect(callback=callback) as timings:
+            pass
+        callback.assert_called_once_with(timings)
+
+
+class TestOperationSpans(unittest.TestCase):
+
+    def setUp(self):
+        super(TestOperationSpans, self).setUp()
+        self.mock_connection = mock.MagicMock()
+        connection.set_connection(self.mock_connection)
+
+    def test_should_time_upload_stages(self):
+        with timing.collect() as timings:
+            with task.batched_upload('1234'):
+                factories.make_task().upload()
+        self.assertEqual(
+            set([
+                'batched_upload',
+                'batched_upload/task.upload',
+                'batched_upload/task.upload/validate',
+                'batched_upload/task.upload/register_hit_type',
+                'batched_upload/task.upload/serialize',
+                'batched_upload/task.upload/network'
+            ]),
+            set(timings.summary())
+        )
+
+    def test_should_time_assignment_retrieval_and_parsing(self):
+        self.mock_connection.get_assignments.return_value = [
+            factories.make_boto_assignment({'Age': '29'})
+        ]
+        with timing.collect() as timings:
+            test_assignment.FakeAssignment.get_by_hit_id('1234')
+        self.assertEqual(
+            set([
+                'assignment.get_by_hit_id',
+                'assignment.get_by_hit_id/network',
+                'assignment.get_by_hit_id/assignment.parse'
+            ]),
+            set(timings.summary())
+        )
@@ -22,3 +22,27 @@ class TestSafeGetAttr(unittest.TestCase):
     def test_should_return_none_if_attribute_not_present(self):
         del self.mock_obj.herp
         self.assertIsNone(utils.safe_getattr(self.mock_obj, 'herp'))
+
+
+class TestConcurrentMap(unittest.TestCase):
+
+    def test_should_return_outcome_for_each_item_in_order(self):
+        result = utils.concurrent_map(lambda x: x * 2, range(20), 4)
+        self.assertEqual(list(range(20)), [each.item for each in result])
+        self.assertEqual(
+            [x * 2 for x in range(20)], [each.result for each in result]
+        )
+
+    def test_should_report_failures_without_stopping(self):
+        def func(item):
+            if item == 2:
+                raise ValueError('Herp')
+            return item
+
+        result = utils.concurrent_map(func, [1, 2, 3])
+        self.assertEqual([True, False, True], [e.succeeded for e in result])
+        self.assertIsInstance(result[1].error, ValueError)
+        self.assertEqual(3, result[2].result)
+
+    def test_should_return_empty_list_for_no_items(self):
+        self.assertEqual([], utils.concurrent_map(lambda x: x, []))
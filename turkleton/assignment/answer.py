@@ -5,17 +5,58 @@
     Representations for various answer types from uploaded HITs.
 
 """
-import collections
 import decimal
 
 import six
 
 
+class _Empty(object):
+    """Type of the marker for answers without a value. It pickles by
+    reference so that values converted in another process keep it."""
+
+    def __reduce__(self):
+        return 'EMPTY'
+
+
+#: Indicates that the value of an answer has not been set.
+EMPTY = _Empty()
+
+
+class ValueStore(object):
+    """Values of an answer for each object owning it. They are kept in the
+    __dict__ of the object under a key of the answer, so they are released
+    along with it and pickled with it."""
+
+    def __init__(self, key, empty=None):
+        """Initialize the store.
+
+        :param key: The key of the values in the __dict__ of their objects
+        :type key: str
+        :param empty: (Default is None) The value returned for objects
+            without a value
+        :type empty: mixed
+        """
+        self.key = key
+        self.empty = empty
+
+    def __getitem__(self, obj):
+        return obj.__dict__.get(self.key, self.empty)
+
+    def __setitem__(self, obj, value):
+        obj.__dict__[self.key] = value
+
+    def __contains__(self, obj):
+        return self.key in obj.__dict__
+
+    def pop(self, obj, default=None):
+        return obj.__dict__.pop(self.key, default)
+
+
 class BaseAnswer(object):
     """Base class for all answer types. This is a descriptor class."""
 
     #: Indicates that the value of this answer has not been set.
-    _EMPTY = object()
+    _EMPTY = EMPTY
     #: Value to indicate the default value if none is given
     _DEFAULT = object()
 
@@ -29,19 +70,70 @@ class BaseAnswer(object):
         """
         self.question_name = question_name
         self.default = default
-        self.value_store = collections.defaultdict(lambda: self._EMPTY)
+        self.value_store = ValueStore(
+            '_answer_value_{}'.format(question_name), self._EMPTY
+        )
+        self.raw_store = ValueStore('_answer_raw_{}'.format(question_name))
 
     def __get__(self, obj, obtype):
         """Descriptor method for retrieving attribute value"""
-        if self.value_store[obj] is self._EMPTY:
-            return self.default
+        if obj is None:
+            return self
+
+        values = obj.__dict__
+        if self.raw_store.key in values:
+            self.decode_pending(obj)
 
-        return self.value_store[obj]
+        value = values.get(self.value_store.key, self._EMPTY)
+        if value is self._EMPTY:
+            return self.default
+        return value
 
     def __set__(self, obj, val):
         """Descriptor method for setting attribute value"""
+        self.set_converted(obj, self.convert(val))
+
+    def convert(self, val):
+        """Convert an answer into the value of this answer type.
+
+        :param val: An answer (eg. the raw answer string)
+        :type val: mixed
+        :rtype: mixed
+        """
+        return val
+
+    def set_converted(self, obj, val):
+        """Store a value already returned by convert() for the given object.
+
+        :param obj: The object owning this answer
+        :type obj: mixed
+        :param val: The converted value
+        :type val: mixed
+        """
+        self.raw_store.pop(obj, None)
         self.value_store[obj] = val
 
+    def set_raw(self, obj, raw_value):
+        """Store the raw answer string for the given object without converting
+        it. The conversion performed by __set__ is deferred until the value is
+        first accessed.
+
+        :param obj: The object owning this answer
+        :type obj: mixed
+        :param raw_value: The raw answer value
+        :type raw_value: str or unicode or None
+        """
+        self.raw_store[obj] = raw_value
+
+    def decode_pending(self, obj):
+        """Convert the raw answer stored for the given object, if any.
+
+        :param obj: The object owning this answer
+        :type obj: mixed
+        """
+        if obj in self.raw_store:
+            self.__set__(obj, self.raw_store.pop(obj))
+
 
 class TextAnswer(BaseAnswer):
     """An answer representing simple textual input"""
@@ -74,30 +166,29 @@ class BooleanAnswer(BaseAnswer):
             else self.DEFAULT_STRING_TO_BOOL
         )
 
-    def __set__(self, obj, val):
-        """Set this value to the given answer. If a string it will attempt to
-        convert it into a boolean.
+    def convert(self, val):
+        """Convert the given answer. If a string it will attempt to convert it
+        into a boolean.
         """
         if isinstance(val, six.string_types):
-            val = self.string_to_bool.get(val, self._EMPTY)
-
-        super(BooleanAnswer, self).__set__(obj, val)
+            return self.string_to_bool.get(val, self._EMPTY)
+        return val
 
 
 class IntegerAnswer(BaseAnswer):
     """Represents an answer with an integer value"""
 
-    def __set__(self, obj, val):
+    def convert(self, val):
         """Casts the given value to an integer"""
-        super(IntegerAnswer, self).__set__(obj, int(val))
+        return int(val)
 
 
 class DecimalAnswer(BaseAnswer):
     """Represents an answer with a decimal value"""
 
-    def __set__(self, obj, val):
+    def convert(self, val):
         """Casts the given value to a decimal.Decimal"""
-        super(DecimalAnswer, self).__set__(obj, decimal.Decimal(val))
+        return decimal.Decimal(val)
 
 
 class SingleChoiceAnswer(TextAnswer):
@@ -113,16 +204,19 @@ class MultiChoiceAnswer(BaseAnswer):
     def __get__(self, obj, objtype):
         """Return the value or the default value. If default value is _DEFAULT then
         this will return an empty list"""
-        if self.value_store[obj] is self._EMPTY:
+        if obj is None:
+            return self
+
+        self.decode_pending(obj)
+
+        value = self.value_store[obj]
+        if value is self._EMPTY:
             return [] if self.default is self._DEFAULT else self.default
-        return self.value_store[obj]
+        return value
 
-    def __set__(self, obj, val):
+    def convert(self, val):
         """In Mechanical Turk multi-choice answers come across as text answers
         separated by the pipe (|) character. Handle this type of input here"""
         if isinstance(val, six.string_types):
-            super(MultiChoiceAnswer, self).__set__(
-                obj, val.split('|') if val else self._EMPTY
-            )
-        else:
-            super(MultiChoiceAnswer, self).__set__(obj, val)
+            return val.split('|') if val else self._EMPTY
+        return val
@@ -5,8 +5,14 @@
     Representations for the results from uploaded HITs.
 
 """
+import hashlib
+import threading
+
 from turkleton import connection
+from turkleton import timing
+from turkleton import utils
 from turkleton.assignment import answer
+from turkleton.assignment import parser
 
 
 def get_question_name_to_answer_attribute_table(cls):
@@ -47,37 +53,189 @@ def get_answer_to_question(assignment, question_name):
     return None
 
 
+def get_answer_table(assignment):
+    """Get a dictionary mapping each question name to its answer in a single
+    pass over the answers of an assignment.
+
+    :param assignment: An assignment
+    :type assignment: boto.mturk.Assignment or
+        turkleton.assignment.parser.ParsedAssignment
+    :rtype: dict
+    """
+    if isinstance(assignment, parser.ParsedAssignment):
+        return assignment.answer_table
+
+    if not assignment or not assignment.answers:
+        return {}
+
+    table = {}
+    for each in assignment.answers[0]:
+        if each.qid not in table:
+            table[each.qid] = each.fields[0] if each.fields else None
+    return table
+
+
+def get_converter(descriptor):
+    """Get the answer descriptor to convert answers with in another process.
+    Descriptors that still customize __set__ instead of convert() are left
+    to convert answers in this process.
+
+    :param descriptor: An answer descriptor
+    :type descriptor: turkleton.assignment.answer.BaseAnswer
+    :rtype: turkleton.assignment.answer.BaseAnswer or None
+    """
+    if type(descriptor).__set__ != answer.BaseAnswer.__set__:
+        return None
+    return descriptor
+
+
+def get_bonus_token(assignment_id, key=None):
+    """Get the unique request token used to grant a bonus for an assignment.
+    Mechanical Turk ignores repeated requests with the same token, so retrying
+    a bonus never pays it twice.
+
+    :param assignment_id: An assignment id
+    :type assignment_id: str or unicode
+    :param key: (Optional) Distinguishes multiple bonuses for one assignment
+    :type key: str or unicode or None
+    :rtype: str
+    """
+    token_source = u'{}:{}'.format(assignment_id, key if key else u'')
+    return hashlib.sha1(token_source.encode('utf-8')).hexdigest()
+
+
 class BaseAssignment(object):
     """Base class for all assignments"""
 
-    def __init__(self, assignment):
+    #: Keep raw answer strings and convert each one when first accessed
+    __lazy_answers__ = False
+    #: The name of the connection to use (default is the default connection)
+    __connection__ = None
+
+    def __init__(self, assignment, lazy=None, connection_name=None):
         """Initialize this class with the given assignment.
 
         :param assignment: An assignment
         :type assignment: boto.mturk.Assignment
+        :param lazy: (Default is __lazy_answers__) Whether to defer converting
+            answers until they are accessed.
+        :type lazy: bool or None
+        :param connection_name: (Default is __connection__) The name of the
+            connection the assignment was retrieved with
+        :type connection_name: str or None
         """
         self.assignment = assignment
+        self.connection_name = (
+            connection_name if connection_name is not None
+            else self.__connection__
+        )
         self.question_to_attr = get_question_name_to_answer_attribute_table(
             self.__class__
         )
 
+        if lazy is None:
+            lazy = self.__lazy_answers__
+
+        # Construction is hot enough to skip even an empty span when disabled.
+        if timing.current_collector is None:
+            self._set_answers(lazy)
+        else:
+            with timing.span('assignment.parse'):
+                self._set_answers(lazy)
+
+    def _set_answers(self, lazy):
+        """Set each declared answer from the answers of the assignment.
+
+        :param lazy: Whether to defer converting answers until accessed
+        :type lazy: bool
+        """
+        answer_table = get_answer_table(self.assignment)
+        converted_questions = utils.safe_getattr(
+            self.assignment, 'converted_questions'
+        )
         for question_name, attr_name in self.question_to_attr.items():
-            answer = get_answer_to_question(self.assignment, question_name)
-            setattr(self, attr_name, answer)
+            answer = answer_table.get(question_name)
+            if converted_questions and question_name in converted_questions:
+                self.__class__.__dict__[attr_name].set_converted(self, answer)
+            elif lazy:
+                self.__class__.__dict__[attr_name].set_raw(self, answer)
+            else:
+                setattr(self, attr_name, answer)
 
     @classmethod
-    def get_by_hit_id(cls, hit_id):
+    def get_by_hit_id(cls, hit_id, connection_name=None):
         """Retrieve assignments over the given connection for the given HIT.
 
         :param hit_id: A HIT id
         :type hit_id: str or unicode
+        :param connection_name: (Default is __connection__) The connection
+            name
+        :type connection_name: str or None
         :rtype: list of BaseAssignment
         """
-        boto_connection = connection.get_connection()
-        return [
-            cls(each) for each
-            in boto_connection.get_assignments(hit_id)
+        if connection_name is None:
+            connection_name = cls.__connection__
+
+        with timing.span('assignment.get_by_hit_id'):
+            with timing.span('network'):
+                boto_connection = connection.get_connection(connection_name)
+                raw_assignments = boto_connection.get_assignments(hit_id)
+            return [
+                cls(each, connection_name=connection_name)
+                for each in raw_assignments
+            ]
+
+    @classmethod
+    def stream_by_hit_id(cls, hit_id, page_size=None, connection_name=None):
+        """Lazily retrieve assignments for the given HIT, parsing each response
+        as it is received. This avoids building boto result objects for every
+        answer.
+
+        :param hit_id: A HIT id
+        :type hit_id: str or unicode
+        :param page_size: (Default is backends.base.STREAMING_PAGE_SIZE)
+            Assignments per request
+        :type page_size: int or None
+        :param connection_name: (Default is __connection__) The connection
+            name
+        :type connection_name: str or None
+        :rtype: iterable of BaseAssignment
+        """
+        if connection_name is None:
+            connection_name = cls.__connection__
+
+        mturk_connection = connection.get_connection(connection_name)
+        raw_assignments = mturk_connection.iter_raw_assignments(
+            hit_id, page_size
+        )
+        for each in raw_assignments:
+            yield cls(each, connection_name=connection_name)
+
+    @classmethod
+    def pool_parse(cls, raw_assignments, processes=None, chunk_size=None):
+        """Parse a large number of raw assignments across a pool of processes.
+        This is useful when reprocessing stored answer payloads.
+
+        :param raw_assignments: Tuples of assignment id, HIT id, worker id and
+            QuestionFormAnswers XML document
+        :type raw_assignments: iterable of tuple
+        :param processes: (Default is number of CPUs) The number of processes
+        :type processes: int or None
+        :param chunk_size: (Default is parser.DEFAULT_CHUNK_SIZE) The number of
+            assignments sent to a process at once
+        :type chunk_size: int or None
+        :rtype: iterable of BaseAssignment
+        """
+        question_to_attr = get_question_name_to_answer_attribute_table(cls)
+        question_names = list(question_to_attr)
+        converters = [
+            get_converter(cls.__dict__[question_to_attr[each]])
+            for each in question_names
         ]
+        for each in parser.pool_parse_assignments(
+                raw_assignments, question_names, processes, chunk_size,
+                converters):
+            yield cls(each)
 
     @property
     def assignment_id(self):
@@ -109,7 +267,7 @@ class BaseAssignment(object):
         :param message: A message to send to the turker
         :type message: str or unicode
         """
-        boto_connection = connection.get_connection()
+        boto_connection = connection.get_connection(self.connection_name)
         boto_connection.approve_assignment(self.assignment_id, message)
 
     def reject(self, message):
@@ -118,5 +276,102 @@ class BaseAssignment(object):
         :param message: A message to send to the turker
         :type message: str or unicode
         """
-        boto_connection = connection.get_connection()
+        boto_connection = connection.get_connection(self.connection_name)
         boto_connection.reject_assignment(self.assignment_id, message)
+
+    @classmethod
+    def approve_many(cls, decisions, max_workers=None):
+        """Concurrently approve many assignments. A failure to approve one
+        assignment does not prevent the others from being approved.
+
+        :param decisions: Pairs of assignment and message to send the turker
+        :type decisions: iterable of (BaseAssignment, str or unicode)
+        :param max_workers: (Default is utils.DEFAULT_MAX_WORKERS) The maximum
+            number of concurrent requests.
+        :type max_workers: int or None
+        :rtype: list of turkleton.utils.Outcome
+        """
+        return utils.concurrent_map(
+            lambda decision: decision[0].approve(decision[1]),
+            decisions,
+            max_workers
+        )
+
+    @classmethod
+    def reject_many(cls, decisions, max_workers=None):
+        """Concurrently reject many assignments. A failure to reject one
+        assignment does not prevent the others from being rejected.
+
+        :param decisions: Pairs of assignment and message to send the turker
+        :type decisions: iterable of (BaseAssignment, str or unicode)
+        :param max_workers: (Default is utils.DEFAULT_MAX_WORKERS) The maximum
+            number of concurrent requests.
+        :type max_workers: int or None
+        :rtype: list of turkleton.utils.Outcome
+        """
+        return utils.concurrent_map(
+            lambda decision: decision[0].reject(decision[1]),
+            decisions,
+            max_workers
+        )
+
+    def grant_bonus(self, amount, reason, key=None, currency_code='USD'):
+        """Grant the worker who completed this assignment a bonus. The request
+        carries a token unique to this assignment (and key) so that retries
+        never pay the bonus twice.
+
+        :param amount: The bonus amount (eg. 0.25)
+        :type amount: float or decimal.Decimal
+        :param reason: The reason for the bonus shown to the turker
+        :type reason: str or unicode
+        :param key: (Optional) Distinguishes multiple bonuses for this
+            assignment
+        :type key: str or unicode or None
+        :param currency_code: (Default is USD) The currency code
+        :type currency_code: str or unicode
+        """
+        from boto.mturk import price
+
+        return connection.get_connection(self.connection_name).grant_bonus(
+            self.worker_id,
+            self.assignment_id,
+            price.Price(amount=amount, currency_code=currency_code),
+            reason,
+            unique_request_token=get_bonus_token(self.assignment_id, key)
+        )
+
+    @classmethod
+    def grant_bonus_many(cls, bonuses, max_workers=None):
+        """Concurrently grant many bonuses. A failure to grant one bonus does
+        not prevent the others from being granted, and failed items can be
+        safely retried. Each bonus may carry a key to grant several bonuses
+        for one assignment. A bonus repeating the assignment and key of an
+        earlier one fails instead of being silently ignored by Mechanical
+        Turk.
+
+        :param bonuses: Tuples of assignment, amount, reason and an optional
+            key
+        :type bonuses: iterable of (BaseAssignment, float, str or unicode) or
+            (BaseAssignment, float, str or unicode, str or unicode)
+        :param max_workers: (Default is utils.DEFAULT_MAX_WORKERS) The maximum
+            number of concurrent requests.
+        :type max_workers: int or None
+        :rtype: list of turkleton.utils.Outcome
+        """
+        tokens = set()
+        lock = threading.Lock()
+
+        def grant(bonus):
+            assignment, amount, reason = bonus[:3]
+            key = bonus[3] if len(bonus) > 3 else None
+            token = get_bonus_token(assignment.assignment_id, key)
+            with lock:
+                if token in tokens:
+                    raise ValueError(
+                        'Bonus for assignment {} repeated without a distinct '
+                        'key.'.format(assignment.assignment_id)
+                    )
+                tokens.add(token)
+            return assignment.grant_bonus(amount, reason, key)
+
+        return utils.concurrent_map(grant, bonuses, max_workers)
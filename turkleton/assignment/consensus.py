@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.assignment.consensus
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    Incremental aggregation of redundant assignments into a consensus answer
+    for each HIT.
+
+"""
+import collections
+import decimal
+
+from turkleton import errors
+from turkleton.assignment import answer
+
+
+class VoteAggregator(object):
+    """Majority vote over single valued answers"""
+
+    #: Whether individual answers can agree or disagree with the consensus
+    votes = True
+
+    def __init__(self):
+        self.counts = collections.Counter()
+
+    def add(self, value):
+        self.counts[value] += 1
+
+    def result(self):
+        """Return the most common answer, or None if no answers were given
+        or the most common answers are tied.
+
+        :rtype: mixed
+        """
+        most_common = self.counts.most_common(2)
+        if not most_common:
+            return None
+        if len(most_common) > 1 and most_common[0][1] == most_common[1][1]:
+            return None
+        return most_common[0][0]
+
+    def agrees(self, value, result):
+        """Return whether an individual answer agrees with the consensus.
+
+        :rtype: bool
+        """
+        return value == result
+
+
+class MultiChoiceAggregator(VoteAggregator):
+    """Per-choice majority vote. A choice is part of the consensus when more
+    than half of the answers selected it."""
+
+    def __init__(self):
+        super(MultiChoiceAggregator, self).__init__()
+        self.num_answers = 0
+
+    def add(self, value):
+        self.num_answers += 1
+        self.counts.update(set(value))
+
+    def result(self):
+        if not self.num_answers:
+            return None
+        return sorted(
+            choice for choice, count in self.counts.items()
+            if count * 2 > self.num_answers
+        )
+
+    def agrees(self, value, result):
+        return set(value) == set(result)
+
+
+def _divide(total, count):
+    """Divide preserving decimals and avoiding integer division.
+
+    :rtype: decimal.Decimal or float
+    """
+    if isinstance(total, decimal.Decimal):
+        return total / count
+    return float(total) / count
+
+
+class MeanAggregator(object):
+    """Running mean of numeric answers"""
+
+    votes = False
+
+    def __init__(self):
+        self.total = 0
+        self.count = 0
+
+    def add(self, value):
+        self.total += value
+        self.count += 1
+
+    def result(self):
+        if not self.count:
+            return None
+        return _divide(self.total, self.count)
+
+
+class MedianAggregator(object):
+    """Median of numeric answers"""
+
+    votes = False
+
+    def __init__(self):
+        self.values = []
+
+    def add(self, value):
+        self.values.append(value)
+
+    def result(self):
+        if not self.values:
+            return None
+
+        ordered = sorted(self.values)
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return ordered[middle]
+        return _divide(ordered[middle - 1] + ordered[middle], 2)
+
+
+#: Aggregators available for numeric answers
+NUMERIC_AGGREGATORS = {
+    'mean': MeanAggregator,
+    'median': MedianAggregator
+}
+
+
+def get_aggregator_class(descriptor, numeric='median'):
+    """Get the aggregator class for the given answer descriptor. Free text
+    answers are not aggregated.
+
+    :param descriptor: An answer descriptor
+    :type descriptor: turkleton.assignment.answer.BaseAnswer
+    :param numeric: (Default is median) Either mean or median
+    :type numeric: str or unicode
+    :rtype: class or None
+    """
+    if isinstance(descriptor, answer.MultiChoiceAnswer):
+        return MultiChoiceAggregator
+    if isinstance(
+            descriptor, (answer.SingleChoiceAnswer, answer.BooleanAnswer)):
+        return VoteAggregator
+    if isinstance(descriptor, (answer.IntegerAnswer, answer.DecimalAnswer)):
+        return NUMERIC_AGGREGATORS[numeric]
+    return None
+
+
+class ConsensusResult(object):
+    """The consensus reached for a single HIT"""
+
+    def __init__(self, hit_id, answers, agreement, worker_agreement,
+                 assignment_ids):
+        """Initialize a consensus result.
+
+        :param hit_id: The HIT id
+        :type hit_id: str or unicode
+        :param answers: Attribute name to consensus answer
+        :type answers: dict
+        :param agreement: Attribute name to the fraction of assignments that
+            agree with the consensus answer (voted answers only)
+        :type agreement: dict
+        :param worker_agreement: Worker id to the fraction of their voted
+            answers that agree with the consensus
+        :type worker_agreement: dict
+        :param assignment_ids: The ids of the aggregated assignments
+        :type assignment_ids: list
+        """
+        self.hit_id = hit_id
+        self.answers = answers
+        self.agreement = agreement
+        self.worker_agreement = worker_agreement
+        self.assignment_ids = assignment_ids
+
+
+class _HITState(object):
+    """Running aggregation state for a single HIT"""
+
+    def __init__(self, aggregator_classes):
+        self.aggregators = dict(
+            (attr_name, aggregator_cls())
+            for attr_name, aggregator_cls in aggregator_classes.items()
+        )
+        self.assignment_ids = []
+        self.voted_answers = []
+
+
+class ConsensusEngine(object):
+    """Aggregates a stream of assignments, emitting a result for each HIT as
+    soon as it has received the target number of assignments."""
+
+    class ConsensusError(errors.Error):
+        """Error while aggregating assignments"""
+        pass
+
+    def __init__(self, assignment_cls, assignments_per_hit, numeric='median'):
+        """Initialize the engine.
+
+        :param assignment_cls: The assignment class whose answers are
+            aggregated
+        :type assignment_cls: class
+        :param assignments_per_hit: The number of assignments each HIT
+            receives (ie. the task __assignments_per_hit__)
+        :type assignments_per_hit: int
+        :param numeric: (Default is median) Either mean or median
+        :type numeric: str or unicode
+        """
+        if numeric not in NUMERIC_AGGREGATORS:
+            raise self.ConsensusError(
+                'Unknown numeric aggregation {}.'.format(numeric)
+            )
+
+        self.assignments_per_hit = assignments_per_hit
+        self.aggregator_classes = {}
+        for attr_name, value in assignment_cls.__dict__.items():
+            if isinstance(value, answer.BaseAnswer):
+                aggregator_cls = get_aggregator_class(value, numeric)
+                if aggregator_cls:
+                    self.aggregator_classes[attr_name] = aggregator_cls
+        self.pending = {}
+        self.completed = set()
+
+    def add(self, assignment):
+        """Add an assignment to the running aggregation of its HIT.
+        Assignments that were already added, and assignments of HITs that
+        were already completed, are ignored.
+
+        :param assignment: An assignment
+        :type assignment: turkleton.assignment.assignment.BaseAssignment
+        :rtype: ConsensusResult or None if the HIT is not yet complete
+        """
+        if assignment.hit_id in self.completed:
+            return None
+
+        state = self.pending.get(assignment.hit_id)
+        if state is None:
+            state = _HITState(self.aggregator_classes)
+            self.pending[assignment.hit_id] = state
+
+        if assignment.assignment_id in state.assignment_ids:
+            return None
+        state.assignment_ids.append(assignment.assignment_id)
+
+        voted = {}
+        for attr_name, aggregator in state.aggregators.items():
+            value = getattr(assignment, attr_name)
+            if value is None:
+                continue
+            if isinstance(value, list):
+                value = tuple(value)
+            aggregator.add(value)
+            if aggregator.votes:
+                voted[attr_name] = value
+        state.voted_answers.append((assignment.worker_id, voted))
+
+        if len(state.assignment_ids) >= self.assignments_per_hit:
+            return self.complete(assignment.hit_id)
+        return None
+
+    def consume(self, assignments):
+        """Add each assignment, yielding results as HITs complete.
+
+        :param assignments: Assignments
+        :type assignments: iterable of BaseAssignment
+        :rtype: iterable of ConsensusResult
+        """
+        for each in assignments:
+            result = self.add(each)
+            if result is not None:
+                yield result
+
+    def complete(self, hit_id):
+        """Finish aggregating the given HIT regardless of how many
+        assignments it has received.
+
+        :param hit_id: A HIT id
+        :type hit_id: str or unicode
+        :rtype: ConsensusResult
+        """
+        state = self.pending.pop(hit_id, None)
+        if state is None:
+            raise self.ConsensusError(
+                'No assignments for HIT {}.'.format(hit_id)
+            )
+        self.completed.add(hit_id)
+
+        answers = dict(
+            (attr_name, aggregator.result())
+            for attr_name, aggregator in state.aggregators.items()
+        )
+
+        agreeing = collections.Counter()
+        answered = collections.Counter()
+        worker_agreement = {}
+        for worker_id, voted in state.voted_answers:
+            num_agreeing = 0
+            for attr_name, value in voted.items():
+                answered[attr_name] += 1
+                if state.aggregators[attr_name].agrees(
+                        value, answers[attr_name]):
+                    agreeing[attr_name] += 1
+                    num_agreeing += 1
+            if voted:
+                worker_agreement[worker_id] = (
+                    float(num_agreeing) / len(voted)
+                )
+
+        agreement = dict(
+            (attr_name, float(agreeing[attr_name]) / count)
+            for attr_name, count in answered.items()
+        )
+
+        return ConsensusResult(
+            hit_id=hit_id,
+            answers=answers,
+            agreement=agreement,
+            worker_agreement=worker_agreement,
+            assignment_ids=state.assignment_ids
+        )
+
+    def flush(self):
+        """Complete every HIT that is still waiting for assignments.
+
+        :rtype: list of ConsensusResult
+        """
+        return [self.complete(hit_id) for hit_id in list(self.pending)]
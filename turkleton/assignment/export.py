@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.assignment.export
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    Incrementally export assignments to CSV or JSON lines.
+
+"""
+import csv
+import decimal
+import json
+
+import six
+
+from turkleton.assignment import assignment
+
+
+#: Columns included for every assignment regardless of its answers
+ASSIGNMENT_COLUMNS = ['assignment_id', 'hit_id', 'worker_id']
+
+
+def get_columns(assignment_cls):
+    """Get the export columns for the given assignment class. These are the
+    assignment columns followed by the attribute name of each declared answer.
+
+    :param assignment_cls: An assignment class
+    :type assignment_cls: class
+    :rtype: list of str
+    """
+    answer_columns = sorted(
+        assignment.get_question_name_to_answer_attribute_table(
+            assignment_cls
+        ).values()
+    )
+    return ASSIGNMENT_COLUMNS + answer_columns
+
+
+def csv_value(value):
+    """Convert an answer value into a CSV cell. Multiple choices are joined
+    with the pipe (|) character as they are on Mechanical Turk.
+
+    :param value: A value
+    :type value: mixed
+    :rtype: str or unicode
+    """
+    if value is None:
+        return u''
+    if isinstance(value, (list, tuple)):
+        return u'|'.join(six.text_type(each) for each in value)
+    return six.text_type(value)
+
+
+def json_value(value):
+    """Convert an answer value into a JSON serializable value.
+
+    :param value: A value
+    :type value: mixed
+    :rtype: mixed
+    """
+    if isinstance(value, decimal.Decimal):
+        return six.text_type(value)
+    return value
+
+
+def write_csv(assignment_cls, assignments, fileobj):
+    """Write assignments as CSV, one row at a time.
+
+    :param assignment_cls: The assignment class defining the columns
+    :type assignment_cls: class
+    :param assignments: Assignments to export
+    :type assignments: iterable of BaseAssignment
+    :param fileobj: A file opened for writing text
+    :type fileobj: file
+    :rtype: int
+    """
+    columns = get_columns(assignment_cls)
+    writer = csv.writer(fileobj)
+    writer.writerow(columns)
+
+    num_written = 0
+    for each in assignments:
+        writer.writerow([csv_value(getattr(each, name)) for name in columns])
+        num_written += 1
+    return num_written
+
+
+def write_jsonl(assignment_cls, assignments, fileobj):
+    """Write assignments as JSON lines, one object per assignment.
+
+    :param assignment_cls: The assignment class defining the columns
+    :type assignment_cls: class
+    :param assignments: Assignments to export
+    :type assignments: iterable of BaseAssignment
+    :param fileobj: A file opened for writing text
+    :type fileobj: file
+    :rtype: int
+    """
+    columns = get_columns(assignment_cls)
+
+    num_written = 0
+    for each in assignments:
+        row = dict(
+            (name, json_value(getattr(each, name))) for name in columns
+        )
+        fileobj.write(json.dumps(row, sort_keys=True))
+        fileobj.write(u'\n')
+        num_written += 1
+    return num_written
+
+
+#: Writers for each supported export format
+WRITERS = {
+    'csv': write_csv,
+    'jsonl': write_jsonl
+}
+
+
+def export(assignment_cls, assignments, fileobj, export_format='csv'):
+    """Export assignments in the given format.
+
+    :param assignment_cls: The assignment class defining the columns
+    :type assignment_cls: class
+    :param assignments: Assignments to export
+    :type assignments: iterable of BaseAssignment
+    :param fileobj: A file opened for writing text
+    :type fileobj: file
+    :param export_format: (Default is csv) Either csv or jsonl
+    :type export_format: str or unicode
+    :rtype: int
+    """
+    if export_format not in WRITERS:
+        raise ValueError('Unknown export format {}.'.format(export_format))
+    return WRITERS[export_format](assignment_cls, assignments, fileobj)
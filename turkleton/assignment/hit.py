@@ -5,6 +5,8 @@
     Representations for HITs
 
 """
+import datetime
+
 from six import moves
 
 from turkleton import connection
@@ -12,21 +14,29 @@ from turkleton import errors
 from turkleton import utils
 
 
+#: Reviewable HITs requested per page, the most the service returns
+REVIEWABLE_PAGE_SIZE = 100
+
+
 class HIT(object):
     """Simple internal representation of a Mechanical Turk human intelligence
     task (HIT)."""
 
-    def __init__(self, hit_id, batch_id):
+    def __init__(self, hit_id, batch_id, connection_name=None):
         """Initialize a HIT"""
         self.hit_id = hit_id
         self.batch_id = batch_id
+        self.connection_name = connection_name
 
     @classmethod
-    def create_from_boto_hit(cls, raw_hit):
+    def create_from_boto_hit(cls, raw_hit, connection_name=None):
         """Safely convert a raw boto hit into internal representation.
 
         :param raw_hit: A raw hit
         :type raw_hit: boto.mturk.HIT
+        :param connection_name: (Default is the default connection) The name
+            of the connection the HIT was retrieved with
+        :type connection_name: str or None
         :rtype: turkleton.assignment.hit.HIT
         """
         if not raw_hit:
@@ -34,7 +44,8 @@ class HIT(object):
 
         return cls(
             hit_id=utils.safe_getattr(raw_hit, 'HITId'),
-            batch_id=utils.safe_getattr(raw_hit, 'RequesterAnnotation')
+            batch_id=utils.safe_getattr(raw_hit, 'RequesterAnnotation'),
+            connection_name=connection_name
         )
 
     def dispose(self):
@@ -42,49 +53,205 @@ class HIT(object):
         if not self.hit_id:
             raise errors.Error('None HIT id for disposal.')
 
-        connection.get_connection().dispose_hit(self.hit_id)
+        mturk_connection = connection.get_connection(self.connection_name)
+        mturk_connection.dispose_hit(self.hit_id)
+
+    def expire(self):
+        """Expire this HIT so that no more workers can accept it."""
+        if not self.hit_id:
+            raise errors.Error('None HIT id for expiration.')
+
+        mturk_connection = connection.get_connection(self.connection_name)
+        mturk_connection.expire_hit(self.hit_id)
+
+    def extend_expiration(self, expiration_increment):
+        """Extend the time this HIT remains available to workers.
 
+        :param expiration_increment: The time to extend the expiration by
+        :type expiration_increment: datetime.timedelta or int seconds
+        """
+        if not self.hit_id:
+            raise errors.Error('None HIT id for extension.')
 
-def transform_raw_hits(hits):
+        if isinstance(expiration_increment, datetime.timedelta):
+            expiration_increment = int(expiration_increment.total_seconds())
+
+        connection.get_connection(self.connection_name).extend_hit(
+            self.hit_id, expiration_increment=expiration_increment
+        )
+
+    def add_assignments(self, assignments_increment):
+        """Allow more workers to complete this HIT.
+
+        :param assignments_increment: The number of assignments to add
+        :type assignments_increment: int
+        """
+        if not self.hit_id:
+            raise errors.Error('None HIT id for extension.')
+
+        connection.get_connection(self.connection_name).extend_hit(
+            self.hit_id, assignments_increment=assignments_increment
+        )
+
+
+def transform_raw_hits(hits, connection_name=None):
     """Convert multiple raw hits into internal hits representation
 
     :param hits: A list of HITs
     :type hits: list of boto.mturk.HIT
+    :param connection_name: (Default is the default connection) The name of
+        the connection the HITs were retrieved with
+    :type connection_name: str or None
     :rtype: iterable of HIT
     """
     if not hits:
         return []
 
-    return moves.map(HIT.create_from_boto_hit, hits)
+    return moves.map(
+        lambda each: HIT.create_from_boto_hit(each, connection_name), hits
+    )
 
 
-def get_all():
+def get_all(connection_name=None):
     """Get all HITs
 
+    :param connection_name: (Default is the default connection) The
+        connection name
+    :type connection_name: str or None
     :rtype: iterable of HIT
     """
-    return transform_raw_hits(connection.get_connection().get_all_hits())
+    return transform_raw_hits(
+        connection.get_connection(connection_name).get_all_hits(),
+        connection_name
+    )
 
 
-def get_all_by_batch_id(batch_id):
+def get_all_by_batch_id(batch_id, connection_name=None):
     """Get all HITs with the given batch id.
 
     :param batch_id: A batch id
     :type batch_id: str or unicode
+    :param connection_name: (Default is the default connection) The
+        connection name, or a connection.BatchSharder
+    :type connection_name: str or callable or None
     :rtype: iterable of HIT
     """
-    return moves.filter(lambda each: each.batch_id == batch_id, get_all())
+    connection_name = connection.resolve_connection_name(
+        connection_name, batch_id
+    )
+    return moves.filter(
+        lambda each: each.batch_id == batch_id, get_all(connection_name)
+    )
 
 
-def get_reviewable_by_batch_id(batch_id):
-    """Get all reviewable HITs within the given batch.
+def iter_reviewable_by_batch_id(batch_id, connection_name=None,
+                                page_size=REVIEWABLE_PAGE_SIZE):
+    """Get every reviewable HIT within the given batch, requesting them page
+    by page as they are consumed.
 
     :param batch_id: A batch id
     :type batch_id: str or unicode
+    :param connection_name: (Default is the default connection) The
+        connection name, or a connection.BatchSharder
+    :type connection_name: str or callable or None
+    :param page_size: (Default is REVIEWABLE_PAGE_SIZE) HITs per request
+    :type page_size: int
     :rtype: iterable of HIT
     """
-    boto_connection = connection.get_connection()
-    all_reviewable_hits = transform_raw_hits(
-        boto_connection.get_reviewable_hits()
+    connection_name = connection.resolve_connection_name(
+        connection_name, batch_id
+    )
+    boto_connection = connection.get_connection(connection_name)
+    page_number = 1
+
+    while True:
+        page = list(boto_connection.get_reviewable_hits(
+            page_size=page_size, page_number=page_number
+        ))
+        for each in transform_raw_hits(page, connection_name):
+            if each.batch_id == batch_id:
+                yield each
+
+        if len(page) < page_size:
+            break
+        page_number += 1
+
+
+def get_reviewable_by_batch_id(batch_id, connection_name=None):
+    """Get all reviewable HITs within the given batch.
+
+    :param batch_id: A batch id
+    :type batch_id: str or unicode
+    :param connection_name: (Default is the default connection) The
+        connection name, or a connection.BatchSharder
+    :type connection_name: str or callable or None
+    :rtype: list of HIT
+    """
+    return list(iter_reviewable_by_batch_id(batch_id, connection_name))
+
+
+def expire_batch(batch_id, max_workers=None, connection_name=None):
+    """Concurrently expire every HIT in the given batch. A failure to expire
+    one HIT does not prevent the others from being expired.
+
+    :param batch_id: A batch id
+    :type batch_id: str or unicode
+    :param max_workers: (Default is utils.DEFAULT_MAX_WORKERS) The maximum
+        number of concurrent requests.
+    :type max_workers: int or None
+    :param connection_name: (Default is the default connection) The
+        connection name, or a connection.BatchSharder
+    :type connection_name: str or callable or None
+    :rtype: list of turkleton.utils.Outcome with each HIT as the item
+    """
+    return utils.concurrent_map(
+        lambda each: each.expire(),
+        get_all_by_batch_id(batch_id, connection_name),
+        max_workers
+    )
+
+
+def extend_batch_expiration(batch_id, expiration_increment, max_workers=None,
+                            connection_name=None):
+    """Concurrently extend the expiration of every HIT in the given batch.
+
+    :param batch_id: A batch id
+    :type batch_id: str or unicode
+    :param expiration_increment: The time to extend each expiration by
+    :type expiration_increment: datetime.timedelta or int seconds
+    :param max_workers: (Default is utils.DEFAULT_MAX_WORKERS) The maximum
+        number of concurrent requests.
+    :type max_workers: int or None
+    :param connection_name: (Default is the default connection) The
+        connection name, or a connection.BatchSharder
+    :type connection_name: str or callable or None
+    :rtype: list of turkleton.utils.Outcome with each HIT as the item
+    """
+    return utils.concurrent_map(
+        lambda each: each.extend_expiration(expiration_increment),
+        get_all_by_batch_id(batch_id, connection_name),
+        max_workers
+    )
+
+
+def add_assignments_to_batch(batch_id, assignments_increment,
+                             max_workers=None, connection_name=None):
+    """Concurrently add assignments to every HIT in the given batch.
+
+    :param batch_id: A batch id
+    :type batch_id: str or unicode
+    :param assignments_increment: The number of assignments to add to each HIT
+    :type assignments_increment: int
+    :param max_workers: (Default is utils.DEFAULT_MAX_WORKERS) The maximum
+        number of concurrent requests.
+    :type max_workers: int or None
+    :param connection_name: (Default is the default connection) The
+        connection name, or a connection.BatchSharder
+    :type connection_name: str or callable or None
+    :rtype: list of turkleton.utils.Outcome with each HIT as the item
+    """
+    return utils.concurrent_map(
+        lambda each: each.add_assignments(assignments_increment),
+        get_all_by_batch_id(batch_id, connection_name),
+        max_workers
     )
-    return [each for each in all_reviewable_hits if each.batch_id == batch_id]
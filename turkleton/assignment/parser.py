@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.assignment.parser
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    Lean streaming parsers for assignment results that bypass the object graph
+    boto builds for each response.
+
+"""
+import collections
+from xml.parsers import expat
+
+try:
+    from xml.etree import cElementTree as ElementTree
+except ImportError:
+    from xml.etree import ElementTree
+
+from turkleton import errors
+
+
+#: Elements within a QuestionFormAnswers answer that contain answer values
+ANSWER_VALUE_ELEMENTS = frozenset([
+    'FreeText', 'SelectionIdentifier', 'OtherSelectionText'
+])
+#: The default number of answer payloads sent to a worker process at once
+DEFAULT_CHUNK_SIZE = 500
+#: The number of chunks queued for each worker process before reading more
+CHUNKS_IN_FLIGHT_PER_PROCESS = 2
+
+
+class ResponseError(errors.Error):
+    """Error returned by Mechanical Turk in place of a result"""
+    pass
+
+
+class ParsedAssignment(object):
+    """Compact representation of an assignment read directly from a response.
+    Attribute names match those of boto.mturk.connection.Assignment, except
+    for converted_questions which names the questions whose answers were
+    already converted by their answer descriptor."""
+
+    __slots__ = [
+        'AssignmentId',
+        'WorkerId',
+        'HITId',
+        'AssignmentStatus',
+        'AutoApprovalTime',
+        'AcceptTime',
+        'SubmitTime',
+        'ApprovalTime',
+        'RejectionTime',
+        'Deadline',
+        'RequesterFeedback',
+        'answer_table',
+        'converted_questions'
+    ]
+
+    def __init__(self, answer_table=None, **fields):
+        """Initialize a parsed assignment.
+
+        :param answer_table: A dictionary mapping question names to answers
+        :type answer_table: dict or None
+        :param fields: Assignment fields (eg. AssignmentId, WorkerId)
+        :type fields: dict
+        """
+        for each in self.__slots__:
+            setattr(self, each, fields.get(each))
+        self.answer_table = answer_table if answer_table else {}
+
+
+class _AnswerHandler(object):
+    """Expat callbacks collecting the first value given for each question"""
+
+    def __init__(self):
+        self.answers = {}
+        self.question_name = None
+        self.text = []
+
+    def start_element(self, name, attrs):
+        self.text = []
+
+    def character_data(self, data):
+        self.text.append(data)
+
+    def end_element(self, name):
+        if name == 'QuestionIdentifier':
+            self.question_name = u''.join(self.text)
+        elif name in ANSWER_VALUE_ELEMENTS and self.question_name:
+            self.answers.setdefault(self.question_name, u''.join(self.text))
+        elif name == 'Answer':
+            self.question_name = None
+        self.text = []
+
+
+def parse_answers(answer_xml):
+    """Parse a QuestionFormAnswers document into a dictionary mapping each
+    question name to its answer. Like boto, only the first value given for a
+    question is kept.
+
+    :param answer_xml: A QuestionFormAnswers XML document
+    :type answer_xml: str or unicode or bytes
+    :rtype: dict
+    """
+    if not answer_xml:
+        return {}
+
+    handler = _AnswerHandler()
+    xml_parser = expat.ParserCreate()
+    xml_parser.buffer_text = True
+    xml_parser.StartElementHandler = handler.start_element
+    xml_parser.EndElementHandler = handler.end_element
+    xml_parser.CharacterDataHandler = handler.character_data
+    xml_parser.Parse(answer_xml, True)
+    return handler.answers
+
+
+def _local_name(tag):
+    """Strip any namespace from an ElementTree tag.
+
+    :param tag: A tag
+    :type tag: str or unicode
+    :rtype: str or unicode
+    """
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_assignments(stream):
+    """Incrementally parse the assignments from a GetAssignmentsForHIT
+    response. Each assignment is yielded as soon as it has been read and its
+    XML is discarded immediately afterwards.
+
+    :param stream: A file-like object containing the response
+    :type stream: file
+    :rtype: iterable of ParsedAssignment
+    """
+    for _, elem in ElementTree.iterparse(stream):
+        name = _local_name(elem.tag)
+
+        if name == 'Assignment':
+            fields = {}
+            answer_table = None
+            for child in elem:
+                child_name = _local_name(child.tag)
+                if child_name == 'Answer':
+                    answer_table = parse_answers(child.text)
+                else:
+                    fields[child_name] = child.text
+            elem.clear()
+            yield ParsedAssignment(answer_table=answer_table, **fields)
+        elif name == 'Error':
+            messages = [
+                child.text for child in elem
+                if _local_name(child.tag) == 'Message'
+            ]
+            raise ResponseError(
+                messages[0] if messages else 'Unknown error in response.'
+            )
+
+
+def _parse_chunk(chunk):
+    """Parse a chunk of answer payloads in a worker process. Only the answers
+    to the given questions are returned, as compact tuples, after conversion
+    by the answer descriptor of each question if one is given.
+
+    :param chunk: Question names, answer descriptors or None for each
+        question, and answer payloads
+    :type chunk: (tuple of str, tuple, list of str)
+    :rtype: list of tuple
+    """
+    question_names, converters, payloads = chunk
+    results = []
+    for each in payloads:
+        answers = parse_answers(each)
+        values = [answers.get(name) for name in question_names]
+        if converters:
+            values = [
+                converter.convert(value) if converter else value
+                for converter, value in zip(converters, values)
+            ]
+        results.append(tuple(values))
+    return results
+
+
+def _chunks(items, chunk_size):
+    """Split items into lists of at most chunk_size items.
+
+    :rtype: iterable of list
+    """
+    chunk = []
+    for each in items:
+        chunk.append(each)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def pool_parse_answers(payloads, question_names, processes=None,
+                       chunk_size=None, converters=None):
+    """Parse answer payloads across a pool of processes. Payloads are sent to
+    workers in chunks and each answer comes back as a tuple of values ordered
+    like question_names, so very little data is pickled. Only a few chunks
+    per process are read ahead of the results consumed, so long streams of
+    payloads are parsed in constant memory.
+
+    :param payloads: QuestionFormAnswers XML documents
+    :type payloads: iterable of str or unicode
+    :param question_names: The questions to extract answers for
+    :type question_names: iterable of str or unicode
+    :param processes: (Default is number of CPUs) The number of processes
+    :type processes: int or None
+    :param chunk_size: (Default is DEFAULT_CHUNK_SIZE) Payloads per task
+    :type chunk_size: int or None
+    :param converters: (Optional) For each question an answer descriptor
+        whose convert() is applied to the answer in the worker, or None to
+        return the raw answer
+    :type converters: iterable of turkleton.assignment.answer.BaseAnswer or
+        None
+    :rtype: iterable of tuple, in the same order as payloads
+    """
+    import multiprocessing
+
+    question_names = tuple(question_names)
+    converters = tuple(converters) if converters else ()
+    chunks = (
+        (question_names, converters, each)
+        for each in _chunks(payloads, chunk_size or DEFAULT_CHUNK_SIZE)
+    )
+    max_in_flight = CHUNKS_IN_FLIGHT_PER_PROCESS * (
+        processes if processes else multiprocessing.cpu_count()
+    )
+
+    process_pool = multiprocessing.Pool(processes)
+    try:
+        in_flight = collections.deque()
+        for chunk in chunks:
+            in_flight.append(process_pool.apply_async(_parse_chunk, (chunk,)))
+            if len(in_flight) >= max_in_flight:
+                for each in in_flight.popleft().get():
+                    yield each
+        while in_flight:
+            for each in in_flight.popleft().get():
+                yield each
+        process_pool.close()
+    except BaseException:
+        process_pool.terminate()
+        raise
+    finally:
+        process_pool.join()
+
+
+def pool_parse_assignments(raw_assignments, question_names, processes=None,
+                           chunk_size=None, converters=None):
+    """Parse raw assignments across a pool of processes, rebuilding each one
+    as a ParsedAssignment in this process.
+
+    :param raw_assignments: Tuples of assignment id, HIT id, worker id and
+        answer payload
+    :type raw_assignments: iterable of tuple
+    :param question_names: The questions to extract answers for
+    :type question_names: iterable of str or unicode
+    :param processes: (Default is number of CPUs) The number of processes
+    :type processes: int or None
+    :param chunk_size: (Default is DEFAULT_CHUNK_SIZE) Payloads per task
+    :type chunk_size: int or None
+    :param converters: (Optional) For each question an answer descriptor
+        converting its answer in the worker, or None
+    :type converters: iterable of turkleton.assignment.answer.BaseAnswer or
+        None
+    :rtype: iterable of ParsedAssignment
+    """
+    question_names = tuple(question_names)
+    converters = tuple(converters) if converters else ()
+    converted_questions = frozenset(
+        name for name, converter in zip(question_names, converters)
+        if converter
+    )
+    # Identifiers stay in this process, queued until their answers return.
+    pending_ids = collections.deque()
+
+    def payloads():
+        for assignment_id, hit_id, worker_id, payload in raw_assignments:
+            pending_ids.append((assignment_id, hit_id, worker_id))
+            yield payload
+
+    for values in pool_parse_answers(
+            payloads(), question_names, processes, chunk_size, converters):
+        assignment_id, hit_id, worker_id = pending_ids.popleft()
+        parsed = ParsedAssignment(
+            answer_table=dict(zip(question_names, values)),
+            AssignmentId=assignment_id,
+            HITId=hit_id,
+            WorkerId=worker_id
+        )
+        parsed.converted_questions = converted_questions
+        yield parsed
+
+
+def pool_parse_columns(payloads, question_names, processes=None,
+                       chunk_size=None):
+    """Parse answer payloads across a pool of processes into columns.
+
+    :param payloads: QuestionFormAnswers XML documents
+    :type payloads: iterable of str or unicode
+    :param question_names: The questions to extract answers for
+    :type question_names: iterable of str or unicode
+    :param processes: (Default is number of CPUs) The number of processes
+    :type processes: int or None
+    :param chunk_size: (Default is DEFAULT_CHUNK_SIZE) Payloads per task
+    :type chunk_size: int or None
+    :rtype: dict mapping question name to a list of answers
+    """
+    question_names = tuple(question_names)
+    columns = dict((name, []) for name in question_names)
+    for values in pool_parse_answers(
+            payloads, question_names, processes, chunk_size):
+        for name, value in zip(question_names, values):
+            columns[name].append(value)
+    return columns
@@ -8,16 +8,31 @@
 """
 import contextlib
 import datetime
+import threading
+import weakref
 
-from boto.mturk import layoutparam
-from boto.mturk import price
-
+from turkleton import budget
 from turkleton import connection
+from turkleton import dedup
 from turkleton import errors
+from turkleton import timing
 
 
 # The global per-process batch id for use in context managers
 current_batch_id = None
+# HIT type ids registered through each connection, keyed by their properties
+_hit_type_ids = weakref.WeakKeyDictionary()
+# Lock guarding the registered HIT type ids, never held across requests
+_hit_type_lock = threading.Lock()
+
+
+def _reinit_hit_type_lock_after_fork():
+    global _hit_type_lock
+
+    _hit_type_lock = threading.Lock()
+
+
+connection.add_fork_handler(_reinit_hit_type_lock_after_fork)
 
 
 def keywords_from_list(keywords):
@@ -39,6 +54,8 @@ def dict_to_layout_parameters(dict_to_convert):
     :type dict_to_convert: dict
     :rtype: boto.mturk.layoutparam.LayoutParameters
     """
+    from boto.mturk import layoutparam
+
     params = []
 
     if dict_to_convert:
@@ -60,7 +77,8 @@ def batched_upload(batch_id):
     global current_batch_id
     previous_batch_id = current_batch_id
     current_batch_id = batch_id
-    yield
+    with timing.span('batched_upload'):
+        yield
     current_batch_id = previous_batch_id
 
 
@@ -91,6 +109,9 @@ class BaseTask(object):
     __auto_approval_delay__ = datetime.timedelta(hours=8)
     #: The currency code for prices
     __currency_code__ = 'USD'
+    #: The name of the connection to upload with (default is the default
+    #: connection), or a connection.BatchSharder to choose one by batch
+    __connection__ = None
 
     def __init__(self, **assignment_params):
         """Initialize this object from the given keyword arguments
@@ -128,34 +149,143 @@ class BaseTask(object):
             if getattr(self, each) is None:
                 raise self.ValidationError('Task is missing {}.'.format(each))
 
-    def upload(self, batch_id=None):
-        """Attempt to upload this task to mechanical turk.
+    def get_hit_type_properties(self):
+        """Get the properties shared by every HIT of this task, which make up
+        its HIT type.
 
-        :param batch_id: An optional ID to attach to this object
-        :type batch_id: mixed
+        :rtype: tuple
         """
-        global current_batch_id
-
-        self.validate()
+        return (
+            self.__title__,
+            self.__description__,
+            self.__reward__,
+            self.__currency_code__,
+            self.__time_per_assignment__,
+            tuple(self.__keywords__) if self.__keywords__ else None,
+            self.__auto_approval_delay__
+        )
 
-        batch_id = batch_id if batch_id else current_batch_id
+    def get_connection_name(self, batch_id=None):
+        """Get the name of the connection this task is uploaded with.
 
-        params = dict_to_layout_parameters(self.assignment_params)
-        reward_price = price.Price(
-            amount=self.__reward__,
-            currency_code=self.__currency_code__
+        :param batch_id: (Optional) The batch the task is uploaded in
+        :type batch_id: str or unicode or None
+        :rtype: str or None for the default connection
+        """
+        return connection.resolve_connection_name(
+            self.__connection__, batch_id
         )
-        keywords = keywords_from_list(self.__keywords__)
-        return connection.get_connection().create_hit(
-            hit_layout=self.__layout_id__,
-            reward=reward_price,
+
+    def get_hit_type_id(self, connection_name=None):
+        """Get the id of the HIT type of this task, registering it the first
+        time it is needed on the connection. Registering the same properties
+        again returns the same id, so threads racing to register it are safe.
+
+        :param connection_name: (Default is the default connection) The
+            connection name
+        :type connection_name: str or None
+        :rtype: str or unicode
+        """
+        from boto.mturk import price
+
+        mturk_connection = connection.get_connection(connection_name)
+        properties = self.get_hit_type_properties()
+
+        raw_connection = connection.get_raw_connection(connection_name)
+        with _hit_type_lock:
+            registered = _hit_type_ids.setdefault(raw_connection, {})
+            hit_type_id = registered.get(properties)
+        if hit_type_id is not None:
+            return hit_type_id
+
+        result = mturk_connection.register_hit_type(
             title=self.__title__,
             description=self.__description__,
-            keywords=keywords,
-            max_assignments=self.__assignments_per_hit__,
-            lifetime=self.__hit_expires_in__,
+            reward=price.Price(
+                amount=self.__reward__,
+                currency_code=self.__currency_code__
+            ),
             duration=self.__time_per_assignment__,
-            approval_delay=self.__auto_approval_delay__,
-            annotation=batch_id,
-            layout_params=params
+            keywords=keywords_from_list(self.__keywords__),
+            approval_delay=self.__auto_approval_delay__
         )
+        with _hit_type_lock:
+            return registered.setdefault(properties, result[0].HITTypeId)
+
+    def upload(self, batch_id=None, connection_name=None):
+        """Attempt to upload this task to mechanical turk. Within
+        dedup.deduplicate() a task already uploaded in the batch is skipped,
+        and within budget.preflight() its cost is charged to the ledger of
+        the connection it is uploaded with.
+
+        :param batch_id: An optional ID to attach to this object
+        :type batch_id: mixed
+        :param connection_name: (Default is __connection__) The name of the
+            connection to upload with
+        :type connection_name: str or None
+        :rtype: list containing the created HIT, or None if skipped
+        """
+        global current_batch_id
+
+        with timing.span('task.upload'):
+            with timing.span('validate'):
+                self.validate()
+
+            batch_id = batch_id if batch_id else current_batch_id
+            if connection_name is None:
+                connection_name = self.get_connection_name(batch_id)
+
+            deduplicator = dedup.current_deduplicator
+            ledger = budget.get_ledger(connection_name)
+            if deduplicator is None and ledger is None:
+                return self._create_hit(batch_id, connection_name)
+
+            key = None
+            if deduplicator is not None:
+                with timing.span('deduplicate'):
+                    key = deduplicator.claim(batch_id, self.assignment_params)
+                if key is None:
+                    return None
+
+            charged = None
+            try:
+                if ledger is not None:
+                    cost = budget.task_cost(self)
+                    ledger.charge(cost)
+                    charged = cost
+                result = self._create_hit(batch_id, connection_name)
+            except Exception:
+                if key is not None:
+                    deduplicator.release(key)
+                if charged is not None:
+                    ledger.refund(charged)
+                raise
+
+            if key is not None:
+                deduplicator.commit(key)
+            return result
+
+    def _create_hit(self, batch_id, connection_name):
+        """Create the HIT for this task.
+
+        :param batch_id: The batch id to attach to the HIT
+        :type batch_id: mixed
+        :param connection_name: The connection name
+        :type connection_name: str or None
+        :rtype: list containing the created HIT
+        """
+        with timing.span('register_hit_type'):
+            hit_type_id = self.get_hit_type_id(connection_name)
+
+        with timing.span('serialize'):
+            params = dict_to_layout_parameters(self.assignment_params)
+
+        with timing.span('network'):
+            return connection.get_connection(connection_name).create_hit(
+                hit_type=hit_type_id,
+                hit_layout=self.__layout_id__,
+                max_assignments=self.__assignments_per_hit__,
+                lifetime=self.__hit_expires_in__,
+                annotation=batch_id,
+                layout_params=params
+            )
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.assignment.workers
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    Incrementally maintained statistics for the workers completing
+    assignments.
+
+"""
+import bisect
+import collections
+import datetime
+import json
+import os
+
+import six
+
+from turkleton import utils
+
+
+#: The format of timestamps in Mechanical Turk responses
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+#: The number of most recent work times kept for each worker
+MAX_WORK_TIMES = 1000
+
+#: The number of most recent assignment and HIT ids remembered so that
+#: repeats are ignored
+MAX_SEEN_IDS = 100000
+
+
+def parse_timestamp(value):
+    """Parse a Mechanical Turk timestamp.
+
+    :param value: A timestamp (eg. 2015-06-15T12:00:00Z)
+    :type value: str or unicode
+    :rtype: datetime.datetime or None
+    """
+    if not isinstance(value, six.string_types):
+        return None
+
+    try:
+        return datetime.datetime.strptime(value, TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def get_work_time(assignment):
+    """Get the number of seconds a worker spent on the given assignment.
+
+    :param assignment: An assignment
+    :type assignment: turkleton.assignment.assignment.BaseAssignment
+    :rtype: float or None
+    """
+    accept_time = parse_timestamp(
+        utils.safe_getattr(assignment.assignment, 'AcceptTime')
+    )
+    submit_time = parse_timestamp(
+        utils.safe_getattr(assignment.assignment, 'SubmitTime')
+    )
+    if not accept_time or not submit_time:
+        return None
+    return (submit_time - accept_time).total_seconds()
+
+
+class WorkerStats(object):
+    """Running statistics for a single worker"""
+
+    __slots__ = [
+        'worker_id',
+        'submissions',
+        'agreement_total',
+        'agreement_count',
+        'work_times',
+        '_recent_work_times'
+    ]
+
+    def __init__(self, worker_id, submissions=0, agreement_total=0.0,
+                 agreement_count=0, work_times=None,
+                 max_work_times=MAX_WORK_TIMES):
+        """Initialize statistics for a worker.
+
+        :param worker_id: The worker id
+        :type worker_id: str or unicode
+        :param submissions: The number of assignments submitted
+        :type submissions: int
+        :param agreement_total: The sum of agreement fractions recorded
+        :type agreement_total: float
+        :param agreement_count: The number of agreement fractions recorded
+        :type agreement_count: int
+        :param work_times: Work times in seconds, oldest first
+        :type work_times: list of float or None
+        :param max_work_times: The number of most recent work times kept
+        :type max_work_times: int
+        """
+        self.worker_id = worker_id
+        self.submissions = submissions
+        self.agreement_total = agreement_total
+        self.agreement_count = agreement_count
+        self._recent_work_times = collections.deque(
+            work_times[-max_work_times:] if work_times else [],
+            max_work_times
+        )
+        self.work_times = sorted(self._recent_work_times)
+
+    @property
+    def agreement_rate(self):
+        """Return the mean agreement of this worker with the consensus.
+
+        :rtype: float or None
+        """
+        if not self.agreement_count:
+            return None
+        return self.agreement_total / self.agreement_count
+
+    @property
+    def median_work_time(self):
+        """Return the median number of seconds spent per assignment over the
+        most recent work times.
+
+        :rtype: float or None
+        """
+        if not self.work_times:
+            return None
+
+        middle = len(self.work_times) // 2
+        if len(self.work_times) % 2:
+            return self.work_times[middle]
+        return (self.work_times[middle - 1] + self.work_times[middle]) / 2.0
+
+    def add_work_time(self, seconds):
+        """Record the time spent on an assignment, forgetting the oldest work
+        time once the limit is reached.
+
+        :param seconds: The work time in seconds
+        :type seconds: float
+        """
+        recent = self._recent_work_times
+        if len(recent) == recent.maxlen:
+            oldest = recent[0]
+            del self.work_times[bisect.bisect_left(self.work_times, oldest)]
+        recent.append(seconds)
+        bisect.insort(self.work_times, seconds)
+
+    def add_agreement(self, fraction):
+        """Record how well an assignment agreed with the consensus.
+
+        :param fraction: The fraction of answers agreeing
+        :type fraction: float
+        """
+        self.agreement_total += fraction
+        self.agreement_count += 1
+
+    def to_dict(self):
+        """Convert these statistics into a JSON serializable dictionary.
+
+        :rtype: dict
+        """
+        return {
+            'worker_id': self.worker_id,
+            'submissions': self.submissions,
+            'agreement_total': self.agreement_total,
+            'agreement_count': self.agreement_count,
+            'work_times': list(self._recent_work_times)
+        }
+
+
+def _remember(seen_ids, key, limit):
+    """Remember a key in an ordered collection of seen ids, forgetting the
+    oldest one once the limit is exceeded.
+
+    :param seen_ids: The ids seen so far, oldest first
+    :type seen_ids: collections.OrderedDict
+    :param key: An id
+    :type key: str or unicode
+    :param limit: The maximum number of ids remembered
+    :type limit: int
+    :rtype: bool indicating whether the key was not already seen
+    """
+    if key in seen_ids:
+        return False
+    seen_ids[key] = None
+    if len(seen_ids) > limit:
+        seen_ids.popitem(last=False)
+    return True
+
+
+class WorkerStatsIndex(object):
+    """Index of statistics for each worker that is updated as assignments and
+    consensus results are added. Only the most recent work times and seen ids
+    are kept so that memory use and the size of saved files stay bounded."""
+
+    def __init__(self, max_work_times=MAX_WORK_TIMES,
+                 max_seen_ids=MAX_SEEN_IDS):
+        """Initialize an empty index.
+
+        :param max_work_times: The number of work times kept per worker
+        :type max_work_times: int
+        :param max_seen_ids: The number of assignment and HIT ids remembered
+        :type max_seen_ids: int
+        """
+        self.max_work_times = max_work_times
+        self.max_seen_ids = max_seen_ids
+        self.workers = {}
+        self.seen_assignment_ids = collections.OrderedDict()
+        self.seen_hit_ids = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.workers)
+
+    def __contains__(self, worker_id):
+        return worker_id in self.workers
+
+    def get(self, worker_id):
+        """Return the statistics for the given worker.
+
+        :param worker_id: A worker id
+        :type worker_id: str or unicode
+        :rtype: WorkerStats or None
+        """
+        return self.workers.get(worker_id)
+
+    def _get_or_create(self, worker_id):
+        stats = self.workers.get(worker_id)
+        if stats is None:
+            stats = WorkerStats(
+                worker_id, max_work_times=self.max_work_times
+            )
+            self.workers[worker_id] = stats
+        return stats
+
+    def add(self, assignment):
+        """Record a submitted assignment. Assignments among the most recently
+        recorded ones are ignored.
+
+        :param assignment: An assignment
+        :type assignment: turkleton.assignment.assignment.BaseAssignment
+        :rtype: bool indicating whether the assignment was recorded
+        """
+        if not _remember(self.seen_assignment_ids, assignment.assignment_id,
+                         self.max_seen_ids):
+            return False
+
+        stats = self._get_or_create(assignment.worker_id)
+        stats.submissions += 1
+
+        work_time = get_work_time(assignment)
+        if work_time is not None:
+            stats.add_work_time(work_time)
+        return True
+
+    def add_consensus(self, result):
+        """Record the agreement of each worker with a consensus result.
+        Results for HITs among the most recently recorded ones are ignored.
+
+        :param result: A consensus result
+        :type result: turkleton.assignment.consensus.ConsensusResult
+        :rtype: bool indicating whether the result was recorded
+        """
+        if not _remember(self.seen_hit_ids, result.hit_id,
+                         self.max_seen_ids):
+            return False
+
+        for worker_id, fraction in result.worker_agreement.items():
+            self._get_or_create(worker_id).add_agreement(fraction)
+        return True
+
+    def save(self, path):
+        """Persist this index to the given path. The file is replaced
+        atomically so a failed save never corrupts a previous one.
+
+        :param path: A file path
+        :type path: str or unicode
+        """
+        temp_path = '{}.tmp'.format(path)
+        with open(temp_path, 'w') as index_file:
+            json.dump(
+                {
+                    'workers': [
+                        each.to_dict() for each in self.workers.values()
+                    ],
+                    'seen_assignment_ids': list(self.seen_assignment_ids),
+                    'seen_hit_ids': list(self.seen_hit_ids)
+                },
+                index_file
+            )
+        utils.replace_file(temp_path, path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Load an index previously saved to the given path. Returns an empty
+        index if the file does not exist.
+
+        :param path: A file path
+        :type path: str or unicode
+        :param kwargs: Keyword arguments for the index
+        :rtype: WorkerStatsIndex
+        """
+        index = cls(**kwargs)
+        if not os.path.exists(path):
+            return index
+
+        with open(path) as index_file:
+            data = json.load(index_file)
+
+        for each in data['workers']:
+            index.workers[each['worker_id']] = WorkerStats(
+                max_work_times=index.max_work_times, **each
+            )
+        for each in data['seen_assignment_ids']:
+            _remember(index.seen_assignment_ids, each, index.max_seen_ids)
+        for each in data.get('seen_hit_ids', []):
+            _remember(index.seen_hit_ids, each, index.max_seen_ids)
+        return index
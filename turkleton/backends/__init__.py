@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.backends
+    ~~~~~~~~~~~~~~~~~~
+    Transports that tasks, HITs and assignments make Mechanical Turk requests
+    through. Backends are imported only when selected:
+
+        connection.setup(access_key_id, secret_access_key, backend='json')
+
+"""
+import importlib
+
+import six
+
+
+#: The backend used when none is given
+DEFAULT_BACKEND = 'boto2'
+#: Backend names and the path of their class
+BACKENDS = {
+    'boto2': 'turkleton.backends.boto2:Boto2Backend',
+    'json': 'turkleton.backends.json_api:JSONBackend'
+}
+
+
+def get_backend_class(backend=None):
+    """Get a backend class, importing it if given by name.
+
+    :param backend: (Default is DEFAULT_BACKEND) A backend name or class
+    :type backend: str or class or None
+    :rtype: class
+    """
+    if backend is None:
+        backend = DEFAULT_BACKEND
+
+    if not isinstance(backend, six.string_types):
+        return backend
+
+    if backend not in BACKENDS:
+        raise ValueError('Unknown backend {}.'.format(backend))
+
+    module_name, _, class_name = BACKENDS[backend].partition(':')
+    return getattr(importlib.import_module(module_name), class_name)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.backends.base
+    ~~~~~~~~~~~~~~~~~~~~~~~
+    The interface every backend implements. Operation names and arguments
+    follow boto.mturk.connection.MTurkConnection, so connection wrappers and
+    existing code work unchanged with any backend.
+
+"""
+import datetime
+
+
+#: Assignments requested per page when streaming the assignments of a HIT
+STREAMING_PAGE_SIZE = 100
+
+
+class Backend(object):
+    """Interface of the Mechanical Turk operations made by turkleton"""
+
+    #: The host of the Mechanical Turk sandbox for this backend
+    SANDBOX_HOST = None
+
+    @classmethod
+    def create(cls, access_key_id, secret_access_key, host=None):
+        """Create a backend connected with the given credentials.
+
+        :param access_key_id: The access key id
+        :type access_key_id: str or unicode
+        :param secret_access_key: The access secret key
+        :type secret_access_key: str or unicode
+        :param host: (Optional, default is production MTurk) The host to
+            connect to
+        :type host: str or unicode
+        :rtype: Backend
+        """
+        raise NotImplementedError()
+
+    def register_hit_type(self, title, description, reward, duration,
+                          keywords=None, approval_delay=None, qual_req=None):
+        """Register a HIT type, or find the existing HIT type with the same
+        properties.
+
+        :param reward: The reward for each assignment
+        :type reward: boto.mturk.price.Price
+        :rtype: list containing a result with the HITTypeId
+        """
+        raise NotImplementedError()
+
+    def create_hit(self, hit_type=None, hit_layout=None, title=None,
+                   description=None, keywords=None, reward=None,
+                   max_assignments=1, lifetime=datetime.timedelta(days=7),
+                   duration=datetime.timedelta(days=7), approval_delay=None,
+                   annotation=None, layout_params=None, **kwargs):
+        """Create a HIT.
+
+        :rtype: list containing the created HIT
+        """
+        raise NotImplementedError()
+
+    def get_hit(self, hit_id, response_groups=None):
+        """Get a single HIT.
+
+        :rtype: list containing the HIT
+        """
+        raise NotImplementedError()
+
+    def get_all_hits(self):
+        """Get every HIT that has not been disposed.
+
+        :rtype: iterable of HIT
+        """
+        raise NotImplementedError()
+
+    def get_reviewable_hits(self, hit_type=None, status='Reviewable',
+                            sort_by='Expiration', sort_direction='Ascending',
+                            page_size=10, page_number=1):
+        """Get a page of reviewable HITs.
+
+        :rtype: list of HIT
+        """
+        raise NotImplementedError()
+
+    def get_assignments(self, hit_id, status=None, sort_by='SubmitTime',
+                        sort_direction='Ascending', page_size=10,
+                        page_number=1, response_groups=None):
+        """Get a page of the assignments submitted for a HIT.
+
+        :rtype: list of Assignment
+        """
+        raise NotImplementedError()
+
+    def iter_raw_assignments(self, hit_id, page_size=None):
+        """Get every assignment submitted for a HIT, requesting them page by
+        page as they are consumed.
+
+        :param hit_id: A HIT id
+        :type hit_id: str or unicode
+        :param page_size: (Default is STREAMING_PAGE_SIZE) Assignments per
+            request
+        :type page_size: int or None
+        :rtype: iterable of Assignment or
+            turkleton.assignment.parser.ParsedAssignment
+        """
+        page_size = page_size if page_size else STREAMING_PAGE_SIZE
+        page_number = 1
+
+        while True:
+            page = list(self.get_assignments(
+                hit_id, page_size=page_size, page_number=page_number
+            ))
+            for each in page:
+                yield each
+
+            if len(page) < page_size:
+                break
+            page_number += 1
+
+    def approve_assignment(self, assignment_id, feedback=None):
+        """Approve a submitted assignment."""
+        raise NotImplementedError()
+
+    def reject_assignment(self, assignment_id, feedback=None):
+        """Reject a submitted assignment."""
+        raise NotImplementedError()
+
+    def grant_bonus(self, worker_id, assignment_id, bonus_price, reason,
+                    unique_request_token=None):
+        """Pay a bonus to the worker who completed an assignment. Requests
+        repeating a unique request token are ignored.
+
+        :param bonus_price: The bonus amount
+        :type bonus_price: boto.mturk.price.Price
+        """
+        raise NotImplementedError()
+
+    def dispose_hit(self, hit_id):
+        """Dispose of a reviewable HIT whose assignments are all reviewed."""
+        raise NotImplementedError()
+
+    def extend_hit(self, hit_id, assignments_increment=None,
+                   expiration_increment=None):
+        """Add assignments to a HIT or extend its expiration.
+
+        :param expiration_increment: Seconds to extend the expiration by
+        :type expiration_increment: int or None
+        """
+        raise NotImplementedError()
+
+    def expire_hit(self, hit_id):
+        """Expire a HIT so that no more workers can accept it."""
+        raise NotImplementedError()
+
+    def get_account_balance(self):
+        """Get the available balance of the requester account.
+
+        :rtype: list of boto.mturk.price.Price
+        """
+        raise NotImplementedError()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.backends.boto2
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+    Backend making requests through boto's MTurkConnection.
+
+"""
+from turkleton import connection
+from turkleton.assignment import parser
+from turkleton.backends import base
+
+
+def iter_xml_assignments(make_request, hit_id, page_size=None):
+    """Request every assignment for the given HIT page by page, parsing each
+    GetAssignmentsForHIT response as it is read instead of through boto's
+    result objects.
+
+    :param make_request: The make_request method of a boto connection
+    :type make_request: callable
+    :param hit_id: A HIT id
+    :type hit_id: str or unicode
+    :param page_size: (Default is base.STREAMING_PAGE_SIZE) Assignments per
+        request
+    :type page_size: int or None
+    :rtype: iterable of turkleton.assignment.parser.ParsedAssignment
+    """
+    page_size = page_size if page_size else base.STREAMING_PAGE_SIZE
+    page_number = 1
+
+    while True:
+        response = make_request(
+            None,
+            {
+                'Operation': 'GetAssignmentsForHIT',
+                'HITId': hit_id,
+                'SortProperty': 'SubmitTime',
+                'SortDirection': 'Ascending',
+                'PageSize': page_size,
+                'PageNumber': page_number
+            },
+            verb='POST'
+        )
+
+        num_results = 0
+        for each in parser.iter_assignments(response):
+            num_results += 1
+            yield each
+
+        if num_results < page_size:
+            break
+        page_number += 1
+
+
+class Boto2Backend(base.Backend):
+    """Backend adapting a boto.mturk.connection.MTurkConnection"""
+
+    SANDBOX_HOST = connection.MTURK_SANDBOX_HOST
+
+    def __init__(self, boto_connection):
+        """Initialize the backend.
+
+        :param boto_connection: A connection
+        :type boto_connection: boto.mturk.connection.MTurkConnection
+        """
+        self.boto_connection = boto_connection
+
+    @classmethod
+    def create(cls, access_key_id, secret_access_key, host=None):
+        from boto.mturk import connection
+
+        return cls(connection.MTurkConnection(
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            host=host
+        ))
+
+    def __getattr__(self, name):
+        return getattr(self.boto_connection, name)
+
+    def register_hit_type(self, *args, **kwargs):
+        return self.boto_connection.register_hit_type(*args, **kwargs)
+
+    def create_hit(self, *args, **kwargs):
+        return self.boto_connection.create_hit(*args, **kwargs)
+
+    def get_hit(self, *args, **kwargs):
+        return self.boto_connection.get_hit(*args, **kwargs)
+
+    def get_all_hits(self):
+        return self.boto_connection.get_all_hits()
+
+    def get_reviewable_hits(self, *args, **kwargs):
+        return self.boto_connection.get_reviewable_hits(*args, **kwargs)
+
+    def get_assignments(self, *args, **kwargs):
+        return self.boto_connection.get_assignments(*args, **kwargs)
+
+    def iter_raw_assignments(self, hit_id, page_size=None):
+        return iter_xml_assignments(
+            self.boto_connection.make_request, hit_id, page_size
+        )
+
+    def approve_assignment(self, *args, **kwargs):
+        return self.boto_connection.approve_assignment(*args, **kwargs)
+
+    def reject_assignment(self, *args, **kwargs):
+        return self.boto_connection.reject_assignment(*args, **kwargs)
+
+    def grant_bonus(self, worker_id, assignment_id, bonus_price, reason,
+                    unique_request_token=None):
+        # boto's grant_bonus has no way of passing a unique request token
+        params = bonus_price.get_as_params('BonusAmount', 1)
+        params['WorkerId'] = worker_id
+        params['AssignmentId'] = assignment_id
+        params['Reason'] = reason
+        if unique_request_token:
+            params['UniqueRequestToken'] = unique_request_token
+        return self.boto_connection._process_request('GrantBonus', params)
+
+    def dispose_hit(self, *args, **kwargs):
+        return self.boto_connection.dispose_hit(*args, **kwargs)
+
+    def extend_hit(self, *args, **kwargs):
+        return self.boto_connection.extend_hit(*args, **kwargs)
+
+    def expire_hit(self, *args, **kwargs):
+        return self.boto_connection.expire_hit(*args, **kwargs)
+
+    def get_account_balance(self):
+        return self.boto_connection.get_account_balance()
@@ -0,0 +1,629 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.backends.json_api
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    Backend for the JSON Mechanical Turk requester API. Requests are signed
+    with AWS Signature Version 4 and sent over a thread-safe pool of
+    persistent HTTPS connections, so many threads can make requests at once
+    without reconnecting for each one.
+
+"""
+import datetime
+import decimal
+import errno
+import hashlib
+import hmac
+import json
+import socket
+import time
+
+from six.moves import http_client
+from six.moves import queue
+
+from turkleton import errors
+from turkleton.assignment import parser
+from turkleton.backends import base
+
+
+#: The host of the production requester API
+PRODUCTION_HOST = 'mturk-requester.us-east-1.amazonaws.com'
+#: The host of the sandbox requester API
+SANDBOX_HOST = 'mturk-requester-sandbox.us-east-1.amazonaws.com'
+#: The prefix of the X-Amz-Target header naming each operation
+TARGET_PREFIX = 'MTurkRequesterServiceV20170117'
+#: The content type of requests
+CONTENT_TYPE = 'application/x-amz-json-1.1'
+#: The maximum number of results the API returns per page
+MAX_RESULTS = 100
+#: Prefixes of operations that only read, so repeating them is harmless
+IDEMPOTENT_OPERATION_PREFIXES = ('Get', 'List')
+#: Socket errors raised when the server has closed an idle connection
+STALE_CONNECTION_ERRNOS = frozenset([
+    errno.EPIPE, errno.ECONNRESET, errno.ECONNABORTED
+])
+
+
+class RequestError(errors.Error):
+    """Error returned by the Mechanical Turk requester API"""
+
+    def __init__(self, code, message=None, status=None, body=None):
+        super(RequestError, self).__init__(
+            '{}: {}'.format(code, message) if message else code
+        )
+        self.code = code
+        self.status = status
+        self.body = body
+
+
+def is_stale_connection_error(error):
+    """Return whether an error means a pooled connection was closed by the
+    server while idle, so the request can be retried on a new connection.
+
+    :param error: An error raised while making a request
+    :type error: Exception
+    :rtype: bool
+    """
+    if isinstance(error, socket.timeout):
+        return False
+    if isinstance(error, http_client.BadStatusLine):
+        return True
+    return getattr(error, 'errno', None) in STALE_CONNECTION_ERRNOS
+
+
+def is_idempotent(operation, payload):
+    """Return whether a request can be repeated without changing its effect,
+    either because it only reads or because it carries a UniqueRequestToken
+    the service deduplicates by.
+
+    :param operation: The operation (eg. CreateHIT)
+    :type operation: str
+    :param payload: The request parameters
+    :type payload: dict
+    :rtype: bool
+    """
+    return (
+        operation.startswith(IDEMPOTENT_OPERATION_PREFIXES) or
+        'UniqueRequestToken' in payload
+    )
+
+
+class HTTPConnectionPool(object):
+    """Thread-safe pool of persistent HTTPS connections to a single host.
+    Connections are created as needed and reused once returned. Functions in
+    traffic_hooks are called with the bytes_out and bytes_in of each
+    request."""
+
+    def __init__(self, host, maxsize=10, timeout=30,
+                 connection_cls=http_client.HTTPSConnection):
+        """Initialize the pool.
+
+        :param host: The host to connect to
+        :type host: str
+        :param maxsize: (Default is 10) The maximum number of idle
+            connections kept open
+        :type maxsize: int
+        :param timeout: (Default is 30) Seconds before a request times out
+        :type timeout: float
+        :param connection_cls: (Default is HTTPSConnection) Creates each
+            connection
+        :type connection_cls: class
+        """
+        self.host = host
+        self.timeout = timeout
+        self.connection_cls = connection_cls
+        self.idle = queue.LifoQueue(maxsize)
+        self.traffic_hooks = []
+
+    def _new_connection(self):
+        return self.connection_cls(self.host, timeout=self.timeout)
+
+    def _get_connection(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return self._new_connection()
+
+    def _put_connection(self, conn):
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _send(self, conn, method, path, body, headers):
+        try:
+            conn.request(method, path, body, headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except Exception:
+            conn.close()
+            raise
+
+    def request(self, method, path, body, headers, retry_stale=False):
+        """Make a request, returning the response status and body. A
+        connection that fails is closed rather than returned to the pool.
+
+        :param method: The HTTP method
+        :type method: str
+        :param path: The request path
+        :type path: str
+        :param body: The request body
+        :type body: bytes
+        :param headers: The request headers
+        :type headers: dict
+        :param retry_stale: (Default is False) Retry once on a new connection
+            if an idle connection was closed by the server. Only requests
+            that are safe to repeat should be retried, as the server may
+            have handled the first attempt.
+        :type retry_stale: bool
+        :rtype: (int, bytes)
+        """
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            conn = self._new_connection()
+            status, data = self._send(conn, method, path, body, headers)
+        else:
+            try:
+                status, data = self._send(conn, method, path, body, headers)
+            except Exception as e:
+                if not retry_stale or not is_stale_connection_error(e):
+                    raise
+                conn = self._new_connection()
+                status, data = self._send(conn, method, path, body, headers)
+
+        self._put_connection(conn)
+        for hook in list(self.traffic_hooks):
+            hook(bytes_out=len(body) if body else 0, bytes_in=len(data))
+        return status, data
+
+    def close(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _hmac(key, message):
+    return hmac.new(key, message.encode('utf-8'), hashlib.sha256)
+
+
+def sign_request(method, host, path, query, headers, body, access_key_id,
+                 secret_access_key, region, service, now):
+    """Compute the AWS Signature Version 4 authorization header of a request.
+
+    :param method: The HTTP method
+    :type method: str
+    :param host: The host
+    :type host: str
+    :param path: The request path
+    :type path: str
+    :param query: The canonical query string
+    :type query: str
+    :param headers: Headers to sign, not including host
+    :type headers: dict
+    :param body: The request body
+    :type body: bytes
+    :param access_key_id: The access key id
+    :type access_key_id: str
+    :param secret_access_key: The access secret key
+    :type secret_access_key: str
+    :param region: The AWS region (eg. us-east-1)
+    :type region: str
+    :param service: The AWS service name (eg. mturk-requester)
+    :type service: str
+    :param now: The time the request is made, which must also be given in
+        the X-Amz-Date header
+    :type now: datetime.datetime
+    :rtype: str
+    """
+    date_stamp = now.strftime('%Y%m%d')
+    signed = dict((k.lower(), v.strip()) for k, v in headers.items())
+    signed['host'] = host
+    signed_headers = ';'.join(sorted(signed))
+
+    canonical_request = '\n'.join([
+        method,
+        path,
+        query,
+        ''.join(
+            '{}:{}\n'.format(name, signed[name]) for name in sorted(signed)
+        ),
+        signed_headers,
+        hashlib.sha256(body).hexdigest()
+    ])
+    scope = '{}/{}/{}/aws4_request'.format(date_stamp, region, service)
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256',
+        now.strftime('%Y%m%dT%H%M%SZ'),
+        scope,
+        hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+    ])
+
+    key = ('AWS4' + secret_access_key).encode('utf-8')
+    for each in (date_stamp, region, service, 'aws4_request'):
+        key = _hmac(key, each).digest()
+
+    return (
+        'AWS4-HMAC-SHA256 Credential={}/{}, SignedHeaders={}, '
+        'Signature={}'.format(
+            access_key_id, scope, signed_headers,
+            _hmac(key, string_to_sign).hexdigest()
+        )
+    )
+
+
+def format_timestamp(value):
+    """Convert an API timestamp in seconds since the epoch into the format
+    used by the XML API and boto (eg. 2015-06-15T12:00:00Z).
+
+    :param value: A timestamp
+    :type value: float or None
+    :rtype: str or None
+    """
+    if value is None:
+        return None
+    return datetime.datetime.utcfromtimestamp(value).strftime(
+        '%Y-%m-%dT%H:%M:%SZ'
+    )
+
+
+def to_seconds(value):
+    """Convert a duration into whole seconds.
+
+    :param value: A duration
+    :type value: datetime.timedelta or int
+    :rtype: int
+    """
+    if isinstance(value, datetime.timedelta):
+        return int(value.total_seconds())
+    return int(value)
+
+
+def format_amount(value):
+    """Convert a price into the decimal string the API expects.
+
+    :param value: A price or amount
+    :type value: boto.mturk.price.Price or float or decimal.Decimal
+    :rtype: str
+    """
+    amount = getattr(value, 'amount', value)
+    return '{:.2f}'.format(decimal.Decimal(str(amount)))
+
+
+def get_layout_parameters(layout_params):
+    """Convert layout parameters into a list of API name and value pairs.
+
+    :param layout_params: Layout parameters
+    :type layout_params: boto.mturk.layoutparam.LayoutParameters or dict
+    :rtype: list of dict
+    """
+    if not layout_params:
+        return []
+    if isinstance(layout_params, dict):
+        items = sorted(layout_params.items())
+    else:
+        items = [
+            (each.name, each.value)
+            for each in layout_params.layoutParameters
+        ]
+    return [{'Name': name, 'Value': value} for name, value in items]
+
+
+class Result(object):
+    """A result with one attribute per field, like boto's result objects"""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class Balance(object):
+    """An account balance, with the attributes of boto.mturk.price.Price"""
+
+    def __init__(self, amount, currency_code='USD'):
+        self.amount = decimal.Decimal(amount)
+        self.currency_code = currency_code
+
+
+def make_hit(fields):
+    """Convert a HIT from the API into a result with the attribute names of
+    boto.mturk.connection.HIT.
+
+    :param fields: A HIT
+    :type fields: dict
+    :rtype: Result
+    """
+    hit = Result(**fields)
+    for each in ('CreationTime', 'Expiration'):
+        if each in fields:
+            setattr(hit, each, format_timestamp(fields[each]))
+    if 'Reward' in fields:
+        hit.Amount = fields['Reward']
+    return hit
+
+
+def make_assignment(fields):
+    """Convert an assignment from the API into a parsed assignment.
+
+    :param fields: An assignment
+    :type fields: dict
+    :rtype: turkleton.assignment.parser.ParsedAssignment
+    """
+    timestamps = (
+        'AutoApprovalTime', 'AcceptTime', 'SubmitTime', 'ApprovalTime',
+        'RejectionTime', 'Deadline'
+    )
+    return parser.ParsedAssignment(
+        answer_table=parser.parse_answers(fields.get('Answer')),
+        **dict(
+            (k, format_timestamp(v) if k in timestamps else v)
+            for k, v in fields.items()
+            if k in parser.ParsedAssignment.__slots__
+        )
+    )
+
+
+class JSONBackend(base.Backend):
+    """Backend for the JSON requester API over pooled connections"""
+
+    SANDBOX_HOST = SANDBOX_HOST
+
+    def __init__(self, access_key_id, secret_access_key, host=None,
+                 region='us-east-1', pool=None, maxsize=10, timeout=30):
+        """Initialize the backend.
+
+        :param access_key_id: The access key id
+        :type access_key_id: str or unicode
+        :param secret_access_key: The access secret key
+        :type secret_access_key: str or unicode
+        :param host: (Default is PRODUCTION_HOST) The host to connect to
+        :type host: str or None
+        :param region: (Default is us-east-1) The AWS region
+        :type region: str
+        :param pool: (Default is a new HTTPConnectionPool) The connections
+        :type pool: HTTPConnectionPool or None
+        :param maxsize: (Default is 10) The maximum number of idle pooled
+            connections
+        :type maxsize: int
+        :param timeout: (Default is 30) Seconds before a request times out
+        :type timeout: float
+        """
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.host = host if host else PRODUCTION_HOST
+        self.region = region
+        self.pool = pool if pool else HTTPConnectionPool(
+            self.host, maxsize=maxsize, timeout=timeout
+        )
+
+    @classmethod
+    def create(cls, access_key_id, secret_access_key, host=None):
+        return cls(access_key_id, secret_access_key, host)
+
+    def request(self, operation, payload):
+        """Make a signed request for an operation.
+
+        :param operation: The operation (eg. CreateHIT)
+        :type operation: str
+        :param payload: The request parameters
+        :type payload: dict
+        :rtype: dict
+        """
+        body = json.dumps(payload).encode('utf-8')
+        now = datetime.datetime.utcnow()
+        headers = {
+            'Content-Type': CONTENT_TYPE,
+            'X-Amz-Date': now.strftime('%Y%m%dT%H%M%SZ'),
+            'X-Amz-Target': '{}.{}'.format(TARGET_PREFIX, operation)
+        }
+        headers['Authorization'] = sign_request(
+            'POST', self.host, '/', '', headers, body, self.access_key_id,
+            self.secret_access_key, self.region, 'mturk-requester', now
+        )
+
+        status, data = self.pool.request(
+            'POST', '/', body, headers,
+            retry_stale=is_idempotent(operation, payload)
+        )
+        try:
+            result = json.loads(data.decode('utf-8')) if data else {}
+        except ValueError:
+            text = data.decode('utf-8', 'replace')
+            raise RequestError(
+                'HTTPError' if status != 200 else 'InvalidResponse',
+                text[:200],
+                status,
+                text
+            )
+        if status != 200:
+            raise RequestError(
+                result.get('__type', 'HTTPError').rsplit('#', 1)[-1],
+                result.get('Message', result.get('message')),
+                status
+            )
+        return result
+
+    def _iter_pages(self, operation, payload, key, page_size=MAX_RESULTS):
+        """Request every page of a listing operation.
+
+        :rtype: iterable of list of dict
+        """
+        payload = dict(payload, MaxResults=min(page_size, MAX_RESULTS))
+        while True:
+            result = self.request(operation, payload)
+            yield result.get(key, [])
+            if not result.get('NextToken'):
+                return
+            payload['NextToken'] = result['NextToken']
+
+    def _get_page(self, operation, payload, key, page_size, page_number):
+        """Get a numbered page of a listing operation, emulating the page
+        numbers of the XML API.
+
+        :rtype: list of dict
+        """
+        items = []
+        start = (page_number - 1) * page_size
+        for page in self._iter_pages(operation, payload, key):
+            items.extend(page)
+            if len(items) >= start + page_size:
+                break
+        return items[start:start + page_size]
+
+    def register_hit_type(self, title, description, reward, duration,
+                          keywords=None, approval_delay=None, qual_req=None):
+        payload = {
+            'Title': title,
+            'Description': description,
+            'Reward': format_amount(reward),
+            'AssignmentDurationInSeconds': to_seconds(duration)
+        }
+        if isinstance(keywords, (list, tuple)):
+            keywords = ', '.join(keywords)
+        if keywords:
+            payload['Keywords'] = keywords
+        if approval_delay is not None:
+            payload['AutoApprovalDelayInSeconds'] = to_seconds(approval_delay)
+        result = self.request('CreateHITType', payload)
+        return [Result(HITTypeId=result['HITTypeId'])]
+
+    def create_hit(self, hit_type=None, hit_layout=None, title=None,
+                   description=None, keywords=None, reward=None,
+                   max_assignments=1, lifetime=datetime.timedelta(days=7),
+                   duration=datetime.timedelta(days=7), approval_delay=None,
+                   annotation=None, layout_params=None, **kwargs):
+        payload = {
+            'MaxAssignments': max_assignments,
+            'LifetimeInSeconds': to_seconds(lifetime)
+        }
+        if hit_layout:
+            payload['HITLayoutId'] = hit_layout
+            payload['HITLayoutParameters'] = get_layout_parameters(
+                layout_params
+            )
+        if annotation is not None:
+            payload['RequesterAnnotation'] = annotation
+
+        if hit_type:
+            payload['HITTypeId'] = hit_type
+            result = self.request('CreateHITWithHITType', payload)
+            return [make_hit(result['HIT'])]
+
+        if isinstance(keywords, (list, tuple)):
+            keywords = ', '.join(keywords)
+        payload.update({
+            'Title': title,
+            'Description': description,
+            'Reward': format_amount(reward),
+            'AssignmentDurationInSeconds': to_seconds(duration)
+        })
+        if keywords:
+            payload['Keywords'] = keywords
+        if approval_delay is not None:
+            payload['AutoApprovalDelayInSeconds'] = to_seconds(approval_delay)
+        return [make_hit(self.request('CreateHIT', payload)['HIT'])]
+
+    def get_hit(self, hit_id, response_groups=None):
+        return [make_hit(self.request('GetHIT', {'HITId': hit_id})['HIT'])]
+
+    def get_all_hits(self):
+        for page in self._iter_pages('ListHITs', {}, 'HITs'):
+            for each in page:
+                yield make_hit(each)
+
+    def get_reviewable_hits(self, hit_type=None, status='Reviewable',
+                            sort_by='Expiration', sort_direction='Ascending',
+                            page_size=10, page_number=1):
+        payload = {'Status': status}
+        if hit_type:
+            payload['HITTypeId'] = hit_type
+        return [
+            make_hit(each) for each in self._get_page(
+                'ListReviewableHITs', payload, 'HITs', page_size, page_number
+            )
+        ]
+
+    def get_assignments(self, hit_id, status=None, sort_by='SubmitTime',
+                        sort_direction='Ascending', page_size=10,
+                        page_number=1, response_groups=None):
+        payload = {'HITId': hit_id}
+        if status:
+            payload['AssignmentStatuses'] = [status]
+        return [
+            make_assignment(each) for each in self._get_page(
+                'ListAssignmentsForHIT', payload, 'Assignments', page_size,
+                page_number
+            )
+        ]
+
+    def iter_raw_assignments(self, hit_id, page_size=None):
+        pages = self._iter_pages(
+            'ListAssignmentsForHIT',
+            {'HITId': hit_id},
+            'Assignments',
+            page_size if page_size else base.STREAMING_PAGE_SIZE
+        )
+        for page in pages:
+            for each in page:
+                yield make_assignment(each)
+
+    def approve_assignment(self, assignment_id, feedback=None):
+        payload = {'AssignmentId': assignment_id}
+        if feedback:
+            payload['RequesterFeedback'] = feedback
+        self.request('ApproveAssignment', payload)
+        return []
+
+    def reject_assignment(self, assignment_id, feedback=None):
+        self.request('RejectAssignment', {
+            'AssignmentId': assignment_id,
+            'RequesterFeedback': feedback if feedback else ''
+        })
+        return []
+
+    def grant_bonus(self, worker_id, assignment_id, bonus_price, reason,
+                    unique_request_token=None):
+        payload = {
+            'WorkerId': worker_id,
+            'AssignmentId': assignment_id,
+            'BonusAmount': format_amount(bonus_price),
+            'Reason': reason
+        }
+        if unique_request_token:
+            payload['UniqueRequestToken'] = unique_request_token
+        self.request('SendBonus', payload)
+        return []
+
+    def dispose_hit(self, hit_id):
+        self.request('DeleteHIT', {'HITId': hit_id})
+        return []
+
+    def extend_hit(self, hit_id, assignments_increment=None,
+                   expiration_increment=None):
+        if assignments_increment:
+            self.request('CreateAdditionalAssignmentsForHIT', {
+                'HITId': hit_id,
+                'NumberOfAdditionalAssignments': assignments_increment
+            })
+        if expiration_increment:
+            # The JSON API only sets absolute expirations
+            hit = self.request('GetHIT', {'HITId': hit_id})['HIT']
+            self.request('UpdateExpirationForHIT', {
+                'HITId': hit_id,
+                'ExpireAt': (
+                    max(hit['Expiration'], time.time()) +
+                    to_seconds(expiration_increment)
+                )
+            })
+        return []
+
+    def expire_hit(self, hit_id):
+        self.request('UpdateExpirationForHIT', {
+            'HITId': hit_id, 'ExpireAt': 0
+        })
+        return []
+
+    def get_account_balance(self):
+        result = self.request('GetAccountBalance', {})
+        return [Balance(result['AvailableBalance'])]
@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.breaker
+    ~~~~~~~~~~~~~~~~~
+    Opt-in circuit breaker for each operation made through the connection.
+    After repeated service failures an operation's circuit opens and calls
+    fail fast with CircuitOpenError. Once the reset timeout passes a trial
+    call is let through, closing the circuit again if it succeeds:
+
+        circuit_breaker = breaker.enable(failure_threshold=5, reset_timeout=30)
+        circuit_breaker.wait('create_hit')
+        print(circuit_breaker.states())
+
+"""
+import socket
+import threading
+import time
+import types
+
+from six.moves import http_client
+
+from turkleton import connection
+from turkleton import errors
+
+
+#: Calls are made as usual
+CLOSED = 'closed'
+#: Calls fail fast
+OPEN = 'open'
+#: A limited number of trial calls decide whether to close the circuit
+HALF_OPEN = 'half-open'
+#: Error codes meaning the service, rather than the request, failed
+SERVICE_ERROR_CODES = frozenset([
+    'InternalError', 'ServiceFailure', 'ServiceUnavailable',
+    'AWS.ServiceUnavailable'
+])
+
+# Real time used to bound waits, whatever clock the breaker is given.
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+class CircuitOpenError(errors.Error):
+    """Represents a call refused because the circuit of its operation is
+    open"""
+
+    def __init__(self, operation, retry_after):
+        super(CircuitOpenError, self).__init__(
+            'Circuit for {} is open, retry in {:.1f}s.'.format(
+                operation, retry_after
+            )
+        )
+        self.operation = operation
+        self.retry_after = retry_after
+
+
+def is_service_failure(error):
+    """Return whether an error means the service is unhealthy, as opposed to
+    the request being invalid. Timeouts, connection errors, server errors and
+    service error codes count as service failures. Server errors are told by
+    their status even when the response body could not be parsed.
+
+    :param error: An error raised by a connection
+    :type error: Exception
+    :rtype: bool
+    """
+    if isinstance(error, (socket.error, socket.timeout, IOError,
+                          http_client.HTTPException)):
+        return True
+
+    try:
+        status = int(getattr(error, 'status', None))
+    except (TypeError, ValueError):
+        status = None
+    if status is not None and status >= 500:
+        return True
+
+    return getattr(error, 'code', None) in SERVICE_ERROR_CODES
+
+
+class Circuit(object):
+    """The state of the circuit of one operation"""
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trial_calls = 0
+
+
+class CircuitBreaker(object):
+    """Tracks service failures of each operation and refuses calls to
+    operations whose circuit is open"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30,
+                 half_open_max_calls=1, is_failure=is_service_failure,
+                 clock=time.time):
+        """Initialize the circuit breaker.
+
+        :param failure_threshold: (Default is 5) Consecutive failures opening
+            a circuit
+        :type failure_threshold: int
+        :param reset_timeout: (Default is 30) Seconds a circuit stays open
+            before a trial call is let through
+        :type reset_timeout: float
+        :param half_open_max_calls: (Default is 1) Trial calls allowed at
+            once while half-open
+        :type half_open_max_calls: int
+        :param is_failure: (Default is is_service_failure) Function deciding
+            whether an error counts as a failure
+        :type is_failure: callable
+        :param clock: (Default is time.time) Function returning the time
+        :type clock: callable
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.is_failure = is_failure
+        self.clock = clock
+        self.circuits = {}
+        self.listeners = []
+        self.condition = threading.Condition()
+
+    def _get_circuit(self, operation):
+        circuit = self.circuits.get(operation)
+        if circuit is None:
+            circuit = Circuit()
+            self.circuits[operation] = circuit
+        return circuit
+
+    def _set_state(self, operation, circuit, state):
+        previous_state = circuit.state
+        circuit.state = state
+        circuit.trial_calls = 0
+        if state == OPEN:
+            circuit.opened_at = self.clock()
+        elif state == CLOSED:
+            circuit.failures = 0
+        self.condition.notify_all()
+        return previous_state
+
+    def _notify(self, operation, previous_state, state):
+        if previous_state != state:
+            for listener in self.listeners:
+                listener(operation, previous_state, state)
+
+    def _retry_after(self, operation):
+        circuit = self._get_circuit(operation)
+        if circuit.state == CLOSED:
+            return 0
+        if circuit.state == OPEN:
+            return max(
+                0, circuit.opened_at + self.reset_timeout - self.clock()
+            )
+        if circuit.trial_calls < self.half_open_max_calls:
+            return 0
+        return self.reset_timeout
+
+    def state(self, operation):
+        """Return the state of the circuit of an operation.
+
+        :param operation: The operation name (eg. create_hit)
+        :type operation: str
+        :rtype: str
+        """
+        with self.condition:
+            circuit = self._get_circuit(operation)
+            if circuit.state == OPEN and not self._retry_after(operation):
+                return HALF_OPEN
+            return circuit.state
+
+    def states(self):
+        """Return the state of every operation called so far.
+
+        :rtype: dict
+        """
+        with self.condition:
+            operations = list(self.circuits)
+        return dict((each, self.state(each)) for each in operations)
+
+    def is_open(self, operation=None):
+        """Return whether calls to an operation are currently refused.
+
+        :param operation: (Default is any operation) The operation name
+        :type operation: str or None
+        :rtype: bool
+        """
+        with self.condition:
+            operations = (
+                [operation] if operation is not None else list(self.circuits)
+            )
+            return any(self._retry_after(each) > 0 for each in operations)
+
+    def retry_after(self, operation):
+        """Return the seconds until a call to an operation may be made.
+
+        :param operation: The operation name
+        :type operation: str
+        :rtype: float
+        """
+        with self.condition:
+            return self._retry_after(operation)
+
+    def wait(self, operation, timeout=None):
+        """Block while calls to an operation are refused, eg. to pause an
+        upload or review pipeline while the service is unhealthy.
+
+        :param operation: The operation name
+        :type operation: str
+        :param timeout: (Optional) The most seconds to wait, in real time
+            rather than by the clock of the breaker
+        :type timeout: float or None
+        :rtype: bool indicating whether a call may now be made
+        """
+        deadline = None if timeout is None else _monotonic() + timeout
+        with self.condition:
+            while True:
+                delay = self._retry_after(operation)
+                if delay <= 0:
+                    return True
+                if deadline is not None:
+                    remaining = deadline - _monotonic()
+                    if remaining <= 0:
+                        return False
+                    delay = min(delay, remaining)
+                self.condition.wait(delay)
+
+    def before_call(self, operation):
+        """Allow a call to an operation, raising CircuitOpenError instead if
+        its circuit is open.
+
+        :param operation: The operation name
+        :type operation: str
+        """
+        transition = None
+        with self.condition:
+            circuit = self._get_circuit(operation)
+            retry_after = self._retry_after(operation)
+            if retry_after > 0:
+                raise CircuitOpenError(operation, retry_after)
+
+            if circuit.state == OPEN:
+                transition = self._set_state(operation, circuit, HALF_OPEN)
+            if circuit.state == HALF_OPEN:
+                circuit.trial_calls += 1
+
+        if transition is not None:
+            self._notify(operation, transition, HALF_OPEN)
+
+    def release(self, operation):
+        """Give back the trial call taken by before_call() without recording
+        a result, eg. for a call deferred until later.
+
+        :param operation: The operation name
+        :type operation: str
+        """
+        with self.condition:
+            circuit = self._get_circuit(operation)
+            if circuit.state == HALF_OPEN and circuit.trial_calls > 0:
+                circuit.trial_calls -= 1
+                self.condition.notify_all()
+
+    def after_call(self, operation, error=None):
+        """Record the result of an allowed call.
+
+        :param operation: The operation name
+        :type operation: str
+        :param error: (Optional) The error raised by the call
+        :type error: Exception or None
+        """
+        failed = error is not None and self.is_failure(error)
+        transition = None
+        with self.condition:
+            circuit = self._get_circuit(operation)
+            if circuit.state == HALF_OPEN:
+                state = OPEN if failed else CLOSED
+                transition = (
+                    self._set_state(operation, circuit, state), state
+                )
+            elif failed:
+                circuit.failures += 1
+                if (circuit.state == CLOSED and
+                        circuit.failures >= self.failure_threshold):
+                    transition = (
+                        self._set_state(operation, circuit, OPEN), OPEN
+                    )
+            elif circuit.state == CLOSED:
+                circuit.failures = 0
+
+        if transition is not None:
+            self._notify(operation, *transition)
+
+    def _iterate(self, operation, iterator):
+        try:
+            self.before_call(operation)
+        except CircuitOpenError:
+            iterator.close()
+            raise
+
+        failed = False
+        try:
+            for each in iterator:
+                yield each
+        except Exception as e:
+            failed = True
+            self.after_call(operation, e)
+            raise
+        finally:
+            if not failed:
+                self.after_call(operation)
+
+    def call(self, operation, func, *args, **kwargs):
+        """Call a function through the circuit of the given operation.
+        Generators are guarded from their first item until they are
+        exhausted, so one that is never iterated holds no trial call.
+
+        :param operation: The operation name
+        :type operation: str
+        :param func: The function to call
+        :type func: callable
+        :rtype: mixed
+        """
+        self.before_call(operation)
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.after_call(operation, e)
+            raise
+
+        if isinstance(result, types.GeneratorType):
+            self.release(operation)
+            return self._iterate(operation, result)
+
+        self.after_call(operation)
+        return result
+
+    def reset(self):
+        """Close every circuit."""
+        with self.condition:
+            self.circuits.clear()
+            self.condition.notify_all()
+
+    def reinit_after_fork(self):
+        """Recreate the condition of the circuit breaker in a forked child,
+        where another thread of the parent may have held it."""
+        self.condition = threading.Condition()
+
+    def wrap(self, wrapped_connection):
+        """Wrap a connection so that its operations go through the circuit
+        breaker. This can be given to connection.add_wrapper().
+
+        :param wrapped_connection: A connection
+        :type wrapped_connection: turkleton.backends.base.Backend
+        :rtype: BreakerConnection
+        """
+        return BreakerConnection(wrapped_connection, self)
+
+
+class BreakerConnection(object):
+    """Proxy for a connection calling each method through a circuit
+    breaker"""
+
+    def __init__(self, wrapped_connection, circuit_breaker):
+        self._connection = wrapped_connection
+        self._circuit_breaker = circuit_breaker
+
+    def __getattr__(self, name):
+        attr = getattr(self._connection, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        circuit_breaker = self._circuit_breaker
+
+        def guarded(*args, **kwargs):
+            return circuit_breaker.call(name, attr, *args, **kwargs)
+
+        return guarded
+
+
+def enable(**kwargs):
+    """Guard every operation made through connection.get_connection() with a
+    circuit breaker.
+
+    :param kwargs: Arguments for CircuitBreaker
+    :type kwargs: dict
+    :rtype: CircuitBreaker
+    """
+    circuit_breaker = CircuitBreaker(**kwargs)
+    connection.add_wrapper(circuit_breaker.wrap)
+    return circuit_breaker
+
+
+def disable(circuit_breaker):
+    """Stop guarding operations with the given circuit breaker.
+
+    :param circuit_breaker: A circuit breaker returned by enable()
+    :type circuit_breaker: CircuitBreaker
+    """
+    connection.remove_wrapper(circuit_breaker.wrap)
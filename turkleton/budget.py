@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.budget
+    ~~~~~~~~~~~~~~~~
+    Pre-flight cost checks for batches. The cost of the planned tasks is
+    checked against a single fetch of the account balance, after which spend
+    is tracked in a local ledger so uploads never need to check the balance:
+
+        with budget.preflight(tasks) as ledger:
+            with task.batched_upload('1234'):
+                for each in tasks:
+                    each.upload()
+        print(ledger.available)
+
+    Each account has its own ledger, so batches uploaded with a named
+    connection are checked against that account's balance:
+
+        with budget.preflight(sandbox_tasks, connection_name='sandbox'):
+            ...
+
+"""
+import contextlib
+import decimal
+import threading
+
+from turkleton import connection
+from turkleton import errors
+
+
+#: The fee charged on each reward as a fraction of it
+FEE_RATE = decimal.Decimal('0.20')
+#: The fee charged for HITs with LARGE_HIT_ASSIGNMENTS or more assignments
+LARGE_HIT_FEE_RATE = decimal.Decimal('0.40')
+#: The number of assignments at which the large HIT fee applies
+LARGE_HIT_ASSIGNMENTS = 10
+#: The smallest fee charged for each assignment
+MINIMUM_FEE = decimal.Decimal('0.01')
+#: The smallest unit of currency
+CENT = decimal.Decimal('0.01')
+
+# The global per-process ledgers keyed by connection name, without entries
+# for accounts whose spend is not being tracked
+current_ledgers = {}
+
+
+class InsufficientFundsError(errors.Error):
+    """Represents spend that would exceed the available balance"""
+    pass
+
+
+def to_decimal(amount):
+    """Convert an amount of money to a decimal without float artifacts.
+
+    :param amount: An amount (eg. 0.25)
+    :type amount: float or int or str or decimal.Decimal
+    :rtype: decimal.Decimal
+    """
+    if isinstance(amount, decimal.Decimal):
+        return amount
+    return decimal.Decimal(str(amount))
+
+
+def hit_cost(reward, max_assignments):
+    """Return the cost of a HIT including fees.
+
+    :param reward: The reward for each assignment
+    :type reward: float or decimal.Decimal
+    :param max_assignments: The number of assignments of the HIT
+    :type max_assignments: int
+    :rtype: decimal.Decimal
+    """
+    reward = to_decimal(reward)
+    fee_rate = (
+        LARGE_HIT_FEE_RATE if max_assignments >= LARGE_HIT_ASSIGNMENTS
+        else FEE_RATE
+    )
+    fee = max(
+        MINIMUM_FEE,
+        (reward * fee_rate).quantize(CENT, rounding=decimal.ROUND_HALF_UP)
+    )
+    return (reward + fee) * max_assignments
+
+
+def task_cost(task):
+    """Return the cost of uploading a task including fees.
+
+    :param task: A task
+    :type task: turkleton.assignment.task.BaseTask
+    :rtype: decimal.Decimal
+    """
+    return hit_cost(task.__reward__, task.__assignments_per_hit__)
+
+
+def batch_cost(tasks):
+    """Return the cost of uploading every task including fees.
+
+    :param tasks: The tasks
+    :type tasks: iterable of turkleton.assignment.task.BaseTask
+    :rtype: decimal.Decimal
+    """
+    return sum((task_cost(each) for each in tasks), decimal.Decimal(0))
+
+
+def get_available_balance(connection_name=None):
+    """Fetch the available balance of the account.
+
+    :param connection_name: (Default is the default connection) The name of
+        the connection of the account
+    :type connection_name: str or None
+    :rtype: decimal.Decimal
+    """
+    mturk_connection = connection.get_connection(connection_name)
+    return to_decimal(mturk_connection.get_account_balance()[0].amount)
+
+
+def get_ledger(connection_name=None):
+    """Return the ledger tracking spend of an account within preflight().
+
+    :param connection_name: (Default is the default connection) The name of
+        the connection of the account
+    :type connection_name: str or None
+    :rtype: Ledger or None if spend is not being tracked
+    """
+    return current_ledgers.get(connection_name)
+
+
+class Ledger(object):
+    """Tracks spend against a balance fetched once"""
+
+    def __init__(self, balance):
+        """Initialize the ledger.
+
+        :param balance: The balance available when the ledger is opened
+        :type balance: decimal.Decimal
+        """
+        self.balance = to_decimal(balance)
+        self.spent = decimal.Decimal(0)
+        self.lock = threading.Lock()
+
+    @property
+    def available(self):
+        """Return the balance not yet spent.
+
+        :rtype: decimal.Decimal
+        """
+        return self.balance - self.spent
+
+    def charge(self, amount):
+        """Record spend, raising InsufficientFundsError instead if it would
+        exceed the available balance.
+
+        :param amount: The amount spent
+        :type amount: decimal.Decimal
+        """
+        with self.lock:
+            if amount > self.balance - self.spent:
+                raise InsufficientFundsError(
+                    'Spending {} exceeds the available balance of {}.'.format(
+                        amount, self.balance - self.spent
+                    )
+                )
+            self.spent += amount
+
+    def reinit_after_fork(self):
+        """Recreate the lock of the ledger in a forked child, where another
+        thread of the parent may have held it."""
+        self.lock = threading.Lock()
+
+    def refund(self, amount):
+        """Return spend that did not happen, eg. for a failed upload.
+
+        :param amount: The amount refunded
+        :type amount: decimal.Decimal
+        """
+        with self.lock:
+            self.spent -= amount
+
+
+def _reinit_ledgers_after_fork():
+    for ledger in list(current_ledgers.values()):
+        ledger.reinit_after_fork()
+
+
+connection.add_fork_handler(_reinit_ledgers_after_fork)
+
+
+@contextlib.contextmanager
+def preflight(tasks, ledger=None, connection_name=None):
+    """Check that the tasks can be paid for and track the spend of uploads
+    with the connection within this context. Uploads that would exceed the
+    balance raise InsufficientFundsError before any request is made.
+
+    :param tasks: The tasks planned for upload
+    :type tasks: iterable of turkleton.assignment.task.BaseTask
+    :param ledger: (Default is a Ledger of the fetched balance) The ledger
+        to track spend with, eg. one shared by several batches
+    :type ledger: Ledger or None
+    :param connection_name: (Default is the default connection) The name of
+        the connection of the account paying for the tasks
+    :type connection_name: str or None
+    :rtype: context manager yielding the Ledger
+    """
+    cost = batch_cost(list(tasks))
+    if ledger is None:
+        ledger = Ledger(get_available_balance(connection_name))
+
+    if cost > ledger.available:
+        raise InsufficientFundsError(
+            'Batch costs {} but only {} is available.'.format(
+                cost, ledger.available
+            )
+        )
+
+    previous_ledger = current_ledgers.get(connection_name)
+    current_ledgers[connection_name] = ledger
+    try:
+        yield ledger
+    finally:
+        if previous_ledger is None:
+            del current_ledgers[connection_name]
+        else:
+            current_ledgers[connection_name] = previous_ledger
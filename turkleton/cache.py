@@ -0,0 +1,442 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.cache
+    ~~~~~~~~~~~~~~~
+    Opt-in read-through cache for read-only Mechanical Turk operations with
+    size-bounded LRU eviction and per-operation time-to-live. Writes made
+    through the connection invalidate the entries they affect:
+
+        cache.enable(maxsize=4096, ttls={'get_assignments': 60})
+
+"""
+import collections
+import threading
+import time
+
+from turkleton import connection
+
+
+#: Default seconds each cached read stays fresh
+DEFAULT_TTLS = {
+    'get_all_hits': 60,
+    'get_reviewable_hits': 30,
+    'get_hit': 60,
+    'get_assignments': 30
+}
+#: Assignment statuses that never change
+TERMINAL_ASSIGNMENT_STATUSES = frozenset(['Approved', 'Rejected'])
+#: HIT statuses that never change
+TERMINAL_HIT_STATUSES = frozenset(['Disposed'])
+#: Operations listing many HITs
+LISTING_OPERATIONS = ('get_all_hits', 'get_reviewable_hits')
+
+
+def is_terminal(operation, result, hit=None):
+    """Return whether a result can no longer change and so can be cached
+    indefinitely. This is the case for disposed HITs, and for the assignments
+    of a HIT that is disposed or whose every assignment has been approved or
+    rejected. A HIT with open assignments may still receive more, so its
+    assignments are only terminal when the HIT is known.
+
+    :param operation: The operation name
+    :type operation: str
+    :param result: The result of the operation
+    :type result: list
+    :param hit: (Optional) The HIT whose assignments are the result
+    :type hit: boto.mturk.connection.HIT or None
+    :rtype: bool
+    """
+    if not result:
+        return False
+
+    if operation == 'get_hit':
+        return all(
+            getattr(each, 'HITStatus', None) in TERMINAL_HIT_STATUSES
+            for each in result
+        )
+
+    if operation == 'get_assignments' and hit is not None:
+        if getattr(hit, 'HITStatus', None) in TERMINAL_HIT_STATUSES:
+            return True
+        max_assignments = int(getattr(hit, 'MaxAssignments', None) or 0)
+        return len(result) >= max_assignments and all(
+            getattr(each, 'AssignmentStatus', None) in
+            TERMINAL_ASSIGNMENT_STATUSES
+            for each in result
+        )
+
+    return False
+
+
+class LRUCache(object):
+    """Thread-safe, size-bounded cache evicting the least recently used entry,
+    where each entry may expire."""
+
+    def __init__(self, maxsize, clock=time.time, on_set=None,
+                 on_remove=None):
+        """Initialize the cache.
+
+        :param maxsize: The maximum number of entries
+        :type maxsize: int
+        :param clock: (Default is time.time) Function returning the time
+        :type clock: callable
+        :param on_set: (Optional) Function called with the key and value of
+            each stored entry, while the cache is locked
+        :type on_set: callable or None
+        :param on_remove: (Optional) Function called with the key and value
+            of each evicted, expired, replaced or invalidated entry, while the
+            cache is locked
+        :type on_remove: callable or None
+        """
+        self.maxsize = maxsize
+        self.clock = clock
+        self.on_set = on_set
+        self.on_remove = on_remove
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def _remove(self, key):
+        value, _ = self.entries.pop(key)
+        if self.on_remove is not None:
+            self.on_remove(key, value)
+
+    def _get_fresh(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        if entry[1] is not None and entry[1] <= self.clock():
+            self._remove(key)
+            return None
+        return entry
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Get a fresh entry, marking it as recently used.
+
+        :param key: A key
+        :type key: hashable
+        :rtype: (bool, mixed) indicating whether the key was found and its
+            value
+        """
+        with self.lock:
+            entry = self._get_fresh(key)
+            if entry is None:
+                return False, None
+
+            del self.entries[key]
+            self.entries[key] = entry
+            return True, entry[0]
+
+    def peek(self, key):
+        """Get a fresh entry without marking it as recently used.
+
+        :param key: A key
+        :type key: hashable
+        :rtype: (bool, mixed) indicating whether the key was found and its
+            value
+        """
+        with self.lock:
+            entry = self._get_fresh(key)
+            if entry is None:
+                return False, None
+            return True, entry[0]
+
+    def set(self, key, value, ttl=None):
+        """Store an entry, evicting the least recently used if full.
+
+        :param key: A key
+        :type key: hashable
+        :param value: A value
+        :type value: mixed
+        :param ttl: (Optional) Seconds until the entry expires, or None to
+            keep it until evicted
+        :type ttl: float or None
+        """
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (
+                value, self.clock() + ttl if ttl is not None else None
+            )
+            if self.on_set is not None:
+                self.on_set(key, value)
+            while len(self.entries) > self.maxsize:
+                self._remove(next(iter(self.entries)))
+
+    def invalidate(self, predicate):
+        """Remove every entry whose key matches the predicate.
+
+        :param predicate: A function taking a key
+        :type predicate: callable
+        """
+        with self.lock:
+            for key in [each for each in self.entries if predicate(each)]:
+                self._remove(key)
+
+    def clear(self):
+        """Remove every entry."""
+        with self.lock:
+            for key in list(self.entries):
+                self._remove(key)
+
+
+class ReadThroughCache(object):
+    """Caches read-only operations of connections it wraps"""
+
+    def __init__(self, maxsize=1024, ttls=None, clock=time.time):
+        """Initialize the cache.
+
+        :param maxsize: (Default is 1024) The maximum number of cached reads
+        :type maxsize: int
+        :param ttls: (Optional) Seconds each operation stays fresh,
+            overriding DEFAULT_TTLS
+        :type ttls: dict or None
+        :param clock: (Default is time.time) Function returning the time
+        :type clock: callable
+        """
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls if ttls else {})
+        self.entries = LRUCache(
+            maxsize, clock, self._index_entry, self._unindex_entry
+        )
+        # Keys of the cached assignment lists holding each assignment, kept
+        # in step with the entries so it is bounded along with them.
+        self.assignment_keys = {}
+        self.hits = 0
+        self.misses = 0
+        self.stats_lock = threading.Lock()
+
+    def _index_entry(self, key, value):
+        if key[0] == 'get_assignments':
+            for each in value:
+                self.assignment_keys.setdefault(
+                    each.AssignmentId, set()
+                ).add(key)
+
+    def _unindex_entry(self, key, value):
+        if key[0] == 'get_assignments':
+            for each in value:
+                keys = self.assignment_keys.get(each.AssignmentId)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.assignment_keys[each.AssignmentId]
+
+    def read(self, operation, func, *args, **kwargs):
+        """Return the cached result of an operation, calling it on a miss.
+
+        :param operation: The operation name
+        :type operation: str
+        :param func: The operation
+        :type func: callable
+        :rtype: list
+        """
+        return self.read_from(None, operation, func, *args, **kwargs)
+
+    def read_from(self, source, operation, func, *args, **kwargs):
+        """Return the cached result of an operation on a connection, kept
+        apart from the results of other connections.
+
+        :param source: The connection the operation is made on
+        :type source: turkleton.backends.base.Backend or None
+        :param operation: The operation name
+        :type operation: str
+        :param func: The operation
+        :type func: callable
+        :rtype: list
+        """
+        key = (operation, args, tuple(sorted(kwargs.items())), source)
+        try:
+            hash(key)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        found, value = self.entries.get(key)
+        with self.stats_lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if found:
+            return list(value)
+
+        value = list(func(*args, **kwargs))
+
+        hit = None
+        if operation == 'get_assignments' and args:
+            _, hit_result = self.entries.peek(
+                ('get_hit', args[:1], (), source)
+            )
+            hit = hit_result[0] if hit_result else None
+
+        self.entries.set(
+            key,
+            value,
+            None if is_terminal(operation, value, hit)
+            else self.ttls[operation]
+        )
+        return list(value)
+
+    def invalidate_hit(self, hit_id, listings=True):
+        """Remove cached reads affected by a change to the given HIT.
+
+        :param hit_id: A HIT id
+        :type hit_id: str or unicode
+        :param listings: (Default is True) Also remove cached HIT listings
+        :type listings: bool
+        """
+        self.entries.invalidate(
+            lambda key: (
+                (key[0] in ('get_hit', 'get_assignments') and
+                 key[1][:1] == (hit_id,)) or
+                (listings and key[0] in LISTING_OPERATIONS)
+            )
+        )
+
+    def invalidate_listings(self):
+        """Remove cached HIT listings."""
+        self.entries.invalidate(lambda key: key[0] in LISTING_OPERATIONS)
+
+    def invalidate_assignment(self, assignment_id):
+        """Remove cached reads affected by a change to the given assignment.
+
+        :param assignment_id: An assignment id
+        :type assignment_id: str or unicode
+        """
+        with self.entries.lock:
+            hit_ids = set(
+                key[1][0]
+                for key in self.assignment_keys.get(assignment_id, ())
+            )
+        if not hit_ids:
+            self.entries.invalidate(lambda key: key[0] == 'get_assignments')
+        for each in hit_ids:
+            self.invalidate_hit(each, listings=False)
+
+    def clear(self):
+        """Remove every cached read."""
+        self.entries.clear()
+
+    def reinit_after_fork(self):
+        """Recreate the locks of the cache in a forked child, where another
+        thread of the parent may have held them."""
+        self.entries.lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+
+    def wrap(self, wrapped_connection):
+        """Wrap a connection so that its reads are cached. This can be given
+        to connection.add_wrapper().
+
+        :param wrapped_connection: A connection
+        :type wrapped_connection: turkleton.backends.base.Backend
+        :rtype: CachingConnection
+        """
+        return CachingConnection(wrapped_connection, self)
+
+
+class CachingConnection(object):
+    """Proxy for a connection caching its read-only operations"""
+
+    def __init__(self, wrapped_connection, cache):
+        self._connection = wrapped_connection
+        self._cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def get_all_hits(self):
+        return self._cache.read_from(
+            self._connection,
+            'get_all_hits',
+            self._connection.get_all_hits
+        )
+
+    def get_reviewable_hits(self, *args, **kwargs):
+        return self._cache.read_from(
+            self._connection,
+            'get_reviewable_hits',
+            self._connection.get_reviewable_hits,
+            *args, **kwargs
+        )
+
+    def get_hit(self, hit_id, *args, **kwargs):
+        return self._cache.read_from(
+            self._connection,
+            'get_hit',
+            self._connection.get_hit,
+            hit_id, *args, **kwargs
+        )
+
+    def get_assignments(self, hit_id, *args, **kwargs):
+        return self._cache.read_from(
+            self._connection,
+            'get_assignments',
+            self._connection.get_assignments,
+            hit_id, *args, **kwargs
+        )
+
+    def create_hit(self, *args, **kwargs):
+        result = self._connection.create_hit(*args, **kwargs)
+        self._cache.invalidate_listings()
+        return result
+
+    def dispose_hit(self, hit_id, *args, **kwargs):
+        try:
+            return self._connection.dispose_hit(hit_id, *args, **kwargs)
+        finally:
+            self._cache.invalidate_hit(hit_id)
+
+    def extend_hit(self, hit_id, *args, **kwargs):
+        try:
+            return self._connection.extend_hit(hit_id, *args, **kwargs)
+        finally:
+            self._cache.invalidate_hit(hit_id)
+
+    def expire_hit(self, hit_id, *args, **kwargs):
+        try:
+            return self._connection.expire_hit(hit_id, *args, **kwargs)
+        finally:
+            self._cache.invalidate_hit(hit_id)
+
+    def approve_assignment(self, assignment_id, *args, **kwargs):
+        try:
+            return self._connection.approve_assignment(
+                assignment_id, *args, **kwargs
+            )
+        finally:
+            self._cache.invalidate_assignment(assignment_id)
+
+    def reject_assignment(self, assignment_id, *args, **kwargs):
+        try:
+            return self._connection.reject_assignment(
+                assignment_id, *args, **kwargs
+            )
+        finally:
+            self._cache.invalidate_assignment(assignment_id)
+
+
+def enable(maxsize=1024, ttls=None):
+    """Cache read-only operations made through connection.get_connection().
+
+    :param maxsize: (Default is 1024) The maximum number of cached reads
+    :type maxsize: int
+    :param ttls: (Optional) Seconds each operation stays fresh, overriding
+        DEFAULT_TTLS
+    :type ttls: dict or None
+    :rtype: ReadThroughCache
+    """
+    read_cache = ReadThroughCache(maxsize=maxsize, ttls=ttls)
+    connection.add_wrapper(read_cache.wrap)
+    return read_cache
+
+
+def disable(read_cache):
+    """Stop caching reads with the given cache.
+
+    :param read_cache: A cache returned by enable()
+    :type read_cache: ReadThroughCache
+    """
+    connection.remove_wrapper(read_cache.wrap)
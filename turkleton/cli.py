@@ -0,0 +1,510 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.cli
+    ~~~~~~~~~~~~~
+    The turkleton command-line tool for bulk operations on batches. Inputs
+    are read and outputs written one record at a time, with requests made
+    concurrently:
+
+        $ turkleton upload mytasks:ImageTask images.jsonl --batch-id 1234
+        $ turkleton list 1234 --summary
+        $ turkleton export mytasks:ImageAssignment 1234 --output out.csv
+        $ turkleton review decisions.csv
+        $ turkleton dispose 1234
+
+    Credentials are read from the AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY
+    environment variables unless given as options.
+
+"""
+import argparse
+import collections
+import contextlib
+import csv
+import importlib
+import itertools
+import json
+import os
+import sys
+
+from turkleton import backends
+from turkleton import connection
+from turkleton import dedup
+from turkleton import errors
+from turkleton import utils
+from turkleton.assignment import export
+from turkleton.assignment import hit
+
+
+#: Input formats recognized from file extensions
+INPUT_FORMATS = ('csv', 'jsonl')
+#: Review decisions and the connection method making them
+DECISIONS = {
+    'approve': 'approve_assignment',
+    'reject': 'reject_assignment'
+}
+
+
+class CommandError(errors.Error):
+    """Error that stops a command, reported without a traceback"""
+    pass
+
+
+def load_class(path):
+    """Load a class from a path such as mypackage.tasks:ImageTask or
+    mypackage.tasks.ImageTask. Modules are also searched for in the current
+    directory.
+
+    :param path: The class path
+    :type path: str
+    :rtype: class
+    """
+    if ':' in path:
+        module_name, _, class_name = path.partition(':')
+    else:
+        module_name, _, class_name = path.rpartition('.')
+
+    if not module_name or not class_name:
+        raise CommandError('Invalid class path {}.'.format(path))
+
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        raise CommandError('Unable to import {}: {}'.format(module_name, e))
+
+    try:
+        return getattr(module, class_name)
+    except AttributeError:
+        raise CommandError(
+            'Module {} has no class {}.'.format(module_name, class_name)
+        )
+
+
+@contextlib.contextmanager
+def open_input(path):
+    """Open a file for reading, or standard input for -.
+
+    :param path: A file path or -
+    :type path: str
+    """
+    if path == '-':
+        yield sys.stdin
+    else:
+        with open(path) as input_file:
+            yield input_file
+
+
+@contextlib.contextmanager
+def open_output(path):
+    """Open a file for writing, or standard output for -.
+
+    :param path: A file path or -
+    :type path: str
+    """
+    if path == '-':
+        yield sys.stdout
+    else:
+        with open(path, 'w') as output_file:
+            yield output_file
+
+
+def get_input_format(path, input_format=None):
+    """Get the format of an input file, inferring it from the extension.
+
+    :param path: A file path or -
+    :type path: str
+    :param input_format: (Optional) An explicitly given format
+    :type input_format: str or None
+    :rtype: str
+    """
+    if input_format:
+        return input_format
+    if path.endswith('.csv'):
+        return 'csv'
+    return 'jsonl'
+
+
+def iter_records(input_file, input_format):
+    """Read records from an input file one at a time.
+
+    :param input_file: A file opened for reading text
+    :type input_file: file
+    :param input_format: Either csv or jsonl
+    :type input_format: str
+    :rtype: iterable of dict
+    """
+    if input_format == 'csv':
+        for each in csv.DictReader(input_file):
+            yield each
+        return
+
+    for line in input_file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_concurrent_map(func, items, concurrency):
+    """Like utils.concurrent_map, but consumes items and yields outcomes a
+    bounded number at a time so that arbitrarily many items can be streamed.
+
+    :param func: A function taking a single item
+    :type func: callable
+    :param items: The items to process
+    :type items: iterable
+    :param concurrency: The maximum number of concurrent calls
+    :type concurrency: int
+    :rtype: iterable of turkleton.utils.Outcome in the same order as items
+    """
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, concurrency * 4))
+        if not chunk:
+            return
+        for outcome in utils.concurrent_map(func, chunk, concurrency):
+            yield outcome
+
+
+def report_failure(outcome, description):
+    """Write a failed outcome to standard error.
+
+    :param outcome: A failed outcome
+    :type outcome: turkleton.utils.Outcome
+    :param description: What the outcome was for
+    :type description: str
+    """
+    sys.stderr.write('error: {}: {}\n'.format(description, outcome.error))
+
+
+def upload(args):
+    """Upload a task for each record of the input file."""
+    task_cls = load_class(args.task_class)
+    input_format = get_input_format(args.input, args.format)
+
+    def upload_record(record):
+        return task_cls(**record).upload(batch_id=args.batch_id)
+
+    dedup_index = None
+    if args.dedup_index:
+        dedup_index = dedup.FileIndex(args.dedup_index)
+    elif args.deduplicate:
+        dedup_index = dedup.MemoryIndex()
+
+    num_failed = 0
+    with open_input(args.input) as input_file, \
+            deduplicate_uploads(dedup_index) as deduplicator:
+        outcomes = iter_concurrent_map(
+            upload_record,
+            iter_records(input_file, input_format),
+            args.concurrency
+        )
+        for index, outcome in enumerate(outcomes):
+            if not outcome.succeeded:
+                num_failed += 1
+                report_failure(outcome, 'record {}'.format(index + 1))
+            elif outcome.result:
+                sys.stdout.write('{}\n'.format(outcome.result[0].HITId))
+
+    if deduplicator is not None:
+        sys.stderr.write(
+            'Skipped {} duplicate tasks\n'.format(deduplicator.skipped)
+        )
+    return 1 if num_failed else 0
+
+
+@contextlib.contextmanager
+def deduplicate_uploads(index):
+    """Deduplicate uploads within this context if an index is given.
+
+    :param index: The uploaded tasks, or None to upload every task
+    :type index: turkleton.dedup.MemoryIndex or None
+    :rtype: context manager yielding the Deduplicator or None
+    """
+    if index is None:
+        yield None
+        return
+
+    try:
+        with dedup.deduplicate(index) as deduplicator:
+            yield deduplicator
+    finally:
+        if isinstance(index, dedup.FileIndex):
+            index.close()
+
+
+def get_batch_hits(batch_id, reviewable=False):
+    """Get the HITs in a batch.
+
+    :param batch_id: A batch id
+    :type batch_id: str
+    :param reviewable: (Default is False) Only get reviewable HITs
+    :type reviewable: bool
+    :rtype: iterable of turkleton.assignment.hit.HIT
+    """
+    if reviewable:
+        return hit.get_reviewable_by_batch_id(batch_id)
+    return hit.get_all_by_batch_id(batch_id)
+
+
+def list_batch(args):
+    """List the HITs in a batch or summarize their assignments."""
+    hits = get_batch_hits(args.batch_id, args.reviewable)
+    if not args.summary:
+        for each in hits:
+            sys.stdout.write('{}\n'.format(each.hit_id))
+        return 0
+
+    mturk_connection = connection.get_connection()
+
+    def count_statuses(each):
+        return collections.Counter(
+            raw.AssignmentStatus
+            for raw in mturk_connection.iter_raw_assignments(each.hit_id)
+        )
+
+    num_hits = 0
+    num_failed = 0
+    statuses = collections.Counter()
+    for outcome in iter_concurrent_map(count_statuses, hits,
+                                       args.concurrency):
+        num_hits += 1
+        if outcome.succeeded:
+            statuses.update(outcome.result)
+        else:
+            num_failed += 1
+            report_failure(outcome, 'HIT {}'.format(outcome.item.hit_id))
+
+    summary = {
+        'batch_id': args.batch_id,
+        'hits': num_hits,
+        'assignments': sum(statuses.values()),
+        'statuses': dict(statuses)
+    }
+    sys.stdout.write('{}\n'.format(json.dumps(summary, sort_keys=True)))
+    return 1 if num_failed else 0
+
+
+def export_batch(args):
+    """Export the assignments of every HIT in a batch."""
+    assignment_cls = load_class(args.assignment_class)
+    hits = get_batch_hits(args.batch_id, args.reviewable)
+    failures = []
+
+    def fetch(each):
+        return list(assignment_cls.stream_by_hit_id(each.hit_id))
+
+    def iter_assignments():
+        for outcome in iter_concurrent_map(fetch, hits, args.concurrency):
+            if outcome.succeeded:
+                for each in outcome.result:
+                    yield each
+            else:
+                failures.append(outcome)
+                report_failure(outcome, 'HIT {}'.format(outcome.item.hit_id))
+
+    with open_output(args.output) as output_file:
+        num_written = export.export(
+            assignment_cls, iter_assignments(), output_file, args.format
+        )
+    sys.stderr.write('exported {} assignments\n'.format(num_written))
+    return 1 if failures else 0
+
+
+def review(args):
+    """Approve or reject each assignment in a decisions file."""
+    input_format = get_input_format(args.decisions, args.format)
+    boto_connection = connection.get_connection()
+
+    def decide(record):
+        decision = record.get('decision', '').strip().lower()
+        if decision not in DECISIONS:
+            raise CommandError('Unknown decision {!r}.'.format(decision))
+        getattr(boto_connection, DECISIONS[decision])(
+            record['assignment_id'], record.get('message') or None
+        )
+        return decision
+
+    num_failed = 0
+    decided = collections.Counter()
+    with open_input(args.decisions) as input_file:
+        outcomes = iter_concurrent_map(
+            decide,
+            iter_records(input_file, input_format),
+            args.concurrency
+        )
+        for outcome in outcomes:
+            if outcome.succeeded:
+                decided[outcome.result] += 1
+            else:
+                num_failed += 1
+                report_failure(outcome, 'assignment {}'.format(
+                    outcome.item.get('assignment_id')
+                ))
+
+    sys.stdout.write('{}\n'.format(json.dumps(
+        {'approved': decided['approve'], 'rejected': decided['reject'],
+         'failed': num_failed},
+        sort_keys=True
+    )))
+    return 1 if num_failed else 0
+
+
+def dispose(args):
+    """Dispose of every HIT in a batch."""
+    hits = get_batch_hits(args.batch_id, args.reviewable)
+
+    num_failed = 0
+    for outcome in iter_concurrent_map(lambda each: each.dispose(), hits,
+                                       args.concurrency):
+        if outcome.succeeded:
+            sys.stdout.write('{}\n'.format(outcome.item.hit_id))
+        else:
+            num_failed += 1
+            report_failure(outcome, 'HIT {}'.format(outcome.item.hit_id))
+    return 1 if num_failed else 0
+
+
+def make_parser():
+    """Create the argument parser for the command-line tool.
+
+    :rtype: argparse.ArgumentParser
+    """
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        '--access-key-id', default=os.environ.get('AWS_ACCESS_KEY_ID'),
+        help='Defaults to the AWS_ACCESS_KEY_ID environment variable'
+    )
+    common.add_argument(
+        '--secret-access-key',
+        default=os.environ.get('AWS_SECRET_ACCESS_KEY'),
+        help='Defaults to the AWS_SECRET_ACCESS_KEY environment variable'
+    )
+    common.add_argument(
+        '--sandbox', action='store_true',
+        help='Use the Mechanical Turk sandbox'
+    )
+    common.add_argument(
+        '--backend', choices=sorted(backends.BACKENDS),
+        default=backends.DEFAULT_BACKEND,
+        help='The transport used to make requests'
+    )
+    common.add_argument(
+        '--concurrency', type=int, default=utils.DEFAULT_MAX_WORKERS,
+        help='The maximum number of concurrent requests'
+    )
+
+    arg_parser = argparse.ArgumentParser(
+        prog='turkleton',
+        description='Bulk operations on Mechanical Turk batches.'
+    )
+    subparsers = arg_parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    upload_parser = subparsers.add_parser(
+        'upload', parents=[common], help=upload.__doc__
+    )
+    upload_parser.add_argument(
+        'task_class', help='The task class (eg. mypackage.tasks:ImageTask)'
+    )
+    upload_parser.add_argument(
+        'input', help='CSV or JSON lines of task parameters, or - for stdin'
+    )
+    upload_parser.add_argument('--batch-id', default=None)
+    upload_parser.add_argument('--format', choices=INPUT_FORMATS)
+    upload_parser.add_argument(
+        '--deduplicate', action='store_true',
+        help='Skip records with the same parameters as one already uploaded'
+    )
+    upload_parser.add_argument(
+        '--dedup-index', default=None,
+        help='Deduplicate against uploads recorded in this file by past runs'
+    )
+    upload_parser.set_defaults(func=upload)
+
+    list_parser = subparsers.add_parser(
+        'list', parents=[common], help=list_batch.__doc__
+    )
+    list_parser.add_argument('batch_id')
+    list_parser.add_argument('--reviewable', action='store_true')
+    list_parser.add_argument(
+        '--summary', action='store_true',
+        help='Count the assignments of the batch by status'
+    )
+    list_parser.set_defaults(func=list_batch)
+
+    export_parser = subparsers.add_parser(
+        'export', parents=[common], help=export_batch.__doc__
+    )
+    export_parser.add_argument(
+        'assignment_class',
+        help='The assignment class (eg. mypackage.tasks:ImageAssignment)'
+    )
+    export_parser.add_argument('batch_id')
+    export_parser.add_argument('--reviewable', action='store_true')
+    export_parser.add_argument(
+        '--format', choices=sorted(export.WRITERS), default='csv'
+    )
+    export_parser.add_argument('--output', default='-')
+    export_parser.set_defaults(func=export_batch)
+
+    review_parser = subparsers.add_parser(
+        'review', parents=[common], help=review.__doc__
+    )
+    review_parser.add_argument(
+        'decisions',
+        help=(
+            'CSV or JSON lines with assignment_id, decision (approve or '
+            'reject) and message, or - for stdin'
+        )
+    )
+    review_parser.add_argument('--format', choices=INPUT_FORMATS)
+    review_parser.set_defaults(func=review)
+
+    dispose_parser = subparsers.add_parser(
+        'dispose', parents=[common], help=dispose.__doc__
+    )
+    dispose_parser.add_argument('batch_id')
+    dispose_parser.add_argument('--reviewable', action='store_true')
+    dispose_parser.set_defaults(func=dispose)
+
+    return arg_parser
+
+
+def main(argv=None):
+    """Run the command-line tool.
+
+    :param argv: (Default is sys.argv[1:]) The arguments
+    :type argv: list of str or None
+    :rtype: int exit status
+    """
+    arg_parser = make_parser()
+    args = arg_parser.parse_args(argv)
+
+    if not args.access_key_id or not args.secret_access_key:
+        arg_parser.error(
+            'Credentials are required, set AWS_ACCESS_KEY_ID and '
+            'AWS_SECRET_ACCESS_KEY or use --access-key-id and '
+            '--secret-access-key.'
+        )
+    if args.concurrency < 1:
+        arg_parser.error('--concurrency must be at least 1.')
+
+    if args.sandbox:
+        connection.setup_sandbox(
+            args.access_key_id, args.secret_access_key, backend=args.backend
+        )
+    else:
+        connection.setup(
+            args.access_key_id, args.secret_access_key, backend=args.backend
+        )
+
+    try:
+        return args.func(args)
+    except CommandError as e:
+        sys.stderr.write('error: {}\n'.format(e))
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,18 +2,53 @@
 """
     mturk.connection
     ~~~~~~~~~~~~~~~~
-    Simplified interface for connecting to Mechanical Turk.
+    Simplified interface for connecting to Mechanical Turk. Backends, and
+    boto, are only imported once a connection is setup, keeping imports of
+    turkleton cheap.
+
+    Besides the default connection, connections can be registered by name,
+    eg. to use the sandbox and production or several requester accounts in
+    the same process:
+
+        connection.setup_sandbox(KEY, SECRET, name='sandbox')
+        hit.get_all(connection_name='sandbox')
+
+    Connections made by setup() are rebuilt from their credentials the first
+    time they are used in a forked process, so that children never share the
+    sockets of their parent. Locks of the connection wrappers, which may have
+    been held by another thread of the parent, are recreated in the child.
 
 """
-from boto.mturk import connection
+import functools
+import os
+import threading
+import zlib
+
+import six
 
 from turkleton import errors
 
 
 # The host for the Mechanical Turk sandbox.
 MTURK_SANDBOX_HOST = 'mechanicalturk.sandbox.amazonaws.com'
-# Global containing the boto connection to Mechanical Turk for this process.
+# Global containing the backend connected to Mechanical Turk for this process.
 mturk_connection = None
+# Backends registered by name, in addition to the default connection.
+named_connections = {}
+# Wrappers applied, in order, to the connection returned by get_connection().
+connection_wrappers = []
+# Each connection and its wrapped form by name, cached between calls.
+_wrapped_connections = {}
+# Functions building each connection by name, used to rebuild after a fork.
+_connection_factories = {}
+# The id of the process each connection by name was built in.
+_connection_pids = {}
+# Guards building and wrapping connections across threads.
+_lock = threading.RLock()
+# The id of the process the module state was last used in.
+_process_id = os.getpid()
+# Functions called in a forked child before connections are used there.
+_fork_handlers = []
 
 
 class ConnectionError(errors.Error):
@@ -21,33 +56,234 @@ class ConnectionError(errors.Error):
     pass
 
 
-def get_connection():
-    """Return the Mechanical Turk connection for this process.
+class BatchSharder(object):
+    """Chooses one of several named connections for each batch by a stable
+    hash of the batch id. It can be used anywhere a connection name is
+    accepted along with a batch id, eg. as the __connection__ of a task:
 
-    :rtype: boto.mturk.connection.MTurkConnection
+        __connection__ = connection.BatchSharder(['account1', 'account2'])
+
+    Changing the names moves batches between connections, so keep them fixed
+    while batches are live.
     """
-    global mturk_connection
 
-    if not mturk_connection:
-        raise ConnectionError(
-            'It is required that you setup() turkleton before use.'
-        )
+    def __init__(self, names):
+        """Initialize the sharder.
+
+        :param names: The connection names to spread batches across
+        :type names: list of str
+        """
+        if not names:
+            raise ValueError('At least one connection name is required.')
+        self.names = list(names)
+
+    def __call__(self, batch_id):
+        """Return the connection name for a batch.
+
+        :param batch_id: A batch id
+        :type batch_id: str or unicode
+        :rtype: str
+        """
+        if batch_id is None:
+            return self.names[0]
+        key = six.text_type(batch_id).encode('utf-8')
+        return self.names[(zlib.crc32(key) & 0xffffffff) % len(self.names)]
+
+
+def resolve_connection_name(connection_name, batch_id=None):
+    """Resolve a connection name, choosing one by batch if a sharder is
+    given.
+
+    :param connection_name: A connection name, a function taking a batch id
+        and returning one (eg. a BatchSharder), or None for the default
+    :type connection_name: str or callable or None
+    :param batch_id: (Optional) The batch the connection is used for
+    :type batch_id: str or unicode or None
+    :rtype: str or None
+    """
+    if callable(connection_name):
+        return connection_name(batch_id)
+    return connection_name
+
+
+def add_fork_handler(handler):
+    """Call a function in each forked child before connections are used
+    there, eg. to recreate locks another thread of the parent held at the
+    fork. Wrappers that are bound methods of an object with a
+    reinit_after_fork() method have it called without being added.
 
-    return mturk_connection
+    :param handler: A function taking no arguments
+    :type handler: callable
+    """
+    _fork_handlers.append(handler)
+
+
+def _after_fork():
+    global _lock, _process_id
+
+    _lock = threading.RLock()
+    _process_id = os.getpid()
+    _wrapped_connections.clear()
+    for wrapper in connection_wrappers:
+        owner = getattr(wrapper, '__self__', None)
+        reinit_after_fork = getattr(owner, 'reinit_after_fork', None)
+        if reinit_after_fork is not None:
+            reinit_after_fork()
+    for handler in list(_fork_handlers):
+        handler()
+
+
+def _check_fork():
+    # Without os.register_at_fork the fork is noticed on first use instead
+    if _process_id != os.getpid():
+        _after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
 
 
-def set_connection(boto_connection):
-    """Set the Mechanical Turk connection for this process.
+def get_raw_connection(name=None):
+    """Return a connection without the wrappers added with add_wrapper().
 
-    :param boto_connection: A connection
-    :type boto_connection: boto.mturk.connection.MTurkConnection
+    :param name: (Default is the default connection) A connection name
+    :type name: str or None
+    :rtype: turkleton.backends.base.Backend
     """
+    _check_fork()
+    with _lock:
+        factory = _connection_factories.get(name)
+        if factory is not None and _connection_pids.get(name) != os.getpid():
+            # Built in another process, whose sockets must not be shared
+            _store_connection(factory(), name)
+            _connection_pids[name] = os.getpid()
+
+        if name is None:
+            if not mturk_connection:
+                raise ConnectionError(
+                    'It is required that you setup() turkleton before use.'
+                )
+            return mturk_connection
+
+        named_connection = named_connections.get(name)
+        if not named_connection:
+            raise ConnectionError(
+                'No connection named {} has been setup.'.format(name)
+            )
+        return named_connection
+
+
+def get_connection(name=None):
+    """Return a Mechanical Turk connection for this process.
+
+    :param name: (Default is the default connection) A connection name
+    :type name: str or None
+    :rtype: turkleton.backends.base.Backend
+    """
+    raw_connection = get_raw_connection(name)
+
+    if not connection_wrappers:
+        return raw_connection
+
+    with _lock:
+        cached = _wrapped_connections.get(name)
+        if cached is None or cached[0] is not raw_connection:
+            wrapped = raw_connection
+            for wrapper in connection_wrappers:
+                wrapped = wrapper(wrapped)
+            cached = (raw_connection, wrapped)
+            _wrapped_connections[name] = cached
+
+        return cached[1]
+
+
+def _store_connection(boto_connection, name):
     global mturk_connection
-    mturk_connection = boto_connection
+
+    if name is None:
+        mturk_connection = boto_connection
+    elif boto_connection is None:
+        named_connections.pop(name, None)
+    else:
+        named_connections[name] = boto_connection
+    _wrapped_connections.pop(name, None)
+
+
+def set_connection(boto_connection, name=None):
+    """Set a Mechanical Turk connection for this process. The connection is
+    used as is, even in forked processes, except that a boto MTurkConnection
+    is wrapped in the boto2 backend.
+
+    :param boto_connection: A connection, or None to remove a named one
+    :type boto_connection: turkleton.backends.base.Backend or
+        boto.mturk.connection.MTurkConnection
+    :param name: (Default is the default connection) A connection name
+    :type name: str or None
+    """
+    if type(boto_connection).__module__.startswith('boto.'):
+        from turkleton.backends import boto2
+
+        boto_connection = boto2.Boto2Backend(boto_connection)
+
+    with _lock:
+        _connection_factories.pop(name, None)
+        _connection_pids.pop(name, None)
+        _store_connection(boto_connection, name)
+
+
+def set_connection_factory(factory, name=None):
+    """Set a function building a Mechanical Turk connection. The connection
+    is built on first use in each process, including forked processes.
+
+    :param factory: A function taking no arguments and returning a connection
+    :type factory: callable
+    :param name: (Default is the default connection) A connection name
+    :type name: str or None
+    """
+    with _lock:
+        _store_connection(None, name)
+        _connection_pids.pop(name, None)
+        _connection_factories[name] = factory
 
 
-def setup(access_key_id, secret_access_key, host=None):
-    """Setup the global connection to Mechanical Turk.
+def get_connection_names():
+    """Return the names of the registered named connections.
+
+    :rtype: list of str
+    """
+    return sorted(
+        set(named_connections) |
+        set(each for each in _connection_factories if each is not None)
+    )
+
+
+def add_wrapper(wrapper):
+    """Add a wrapper around the connection returned by get_connection().
+    Wrappers are applied in the order they were added.
+
+    :param wrapper: A function taking a connection and returning an object
+        with the same interface
+    :type wrapper: callable
+    """
+    with _lock:
+        connection_wrappers.append(wrapper)
+        _wrapped_connections.clear()
+
+
+def remove_wrapper(wrapper):
+    """Remove a wrapper previously added with add_wrapper().
+
+    :param wrapper: A wrapper
+    :type wrapper: callable
+    """
+    with _lock:
+        connection_wrappers.remove(wrapper)
+        _wrapped_connections.clear()
+
+
+def setup(access_key_id, secret_access_key, host=None, backend=None,
+          name=None):
+    """Setup a connection to Mechanical Turk.
 
     :param access_key_id: The access key id
     :type access_key_id: str or unicode
@@ -55,26 +291,43 @@ def setup(access_key_id, secret_access_key, host=None):
     :type secret_access_key: str or unicode
     :param host: (Optional, default is production MTurk) The host to connect to
     :type host: str or unicode
-    :rtype: boto.mturk.connection.Connection
+    :param backend: (Default is boto2) The backend name (eg. json) or class
+    :type backend: str or class or None
+    :param name: (Default is the default connection) The name to register the
+        connection under
+    :type name: str or None
+    :rtype: turkleton.backends.base.Backend
     """
-    boto_connection = connection.MTurkConnection(
-        aws_access_key_id=access_key_id,
-        aws_secret_access_key=secret_access_key,
-        host=host
+    from turkleton import backends
+
+    set_connection_factory(
+        functools.partial(
+            backends.get_backend_class(backend).create,
+            access_key_id, secret_access_key, host
+        ),
+        name
     )
-    set_connection(boto_connection)
-    return boto_connection
+    return get_raw_connection(name)
 
 
-def setup_sandbox(access_key_id, secret_access_key):
-    """Setup a global connection to the Mechanical Turk sandbox.
+def setup_sandbox(access_key_id, secret_access_key, backend=None, name=None):
+    """Setup a connection to the Mechanical Turk sandbox.
 
     :param access_key_id: The access key id
     :type access_key_id: str or unicode
     :param secret_access_key: The access secret key
     :type secret_access_key: str or unicode
-    :rtype: boto.mturk.connection.Connection
+    :param backend: (Default is boto2) The backend name (eg. json) or class
+    :type backend: str or class or None
+    :param name: (Default is the default connection) The name to register the
+        connection under
+    :type name: str or None
+    :rtype: turkleton.backends.base.Backend
     """
+    from turkleton import backends
+
+    backend_cls = backends.get_backend_class(backend)
     return setup(
-        access_key_id, secret_access_key, MTURK_SANDBOX_HOST
+        access_key_id, secret_access_key, backend_cls.SANDBOX_HOST,
+        backend_cls, name
     )
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.dedup
+    ~~~~~~~~~~~~~~~
+    Opt-in deduplication of uploaded tasks. Tasks whose assignment parameters
+    hash the same as a task already uploaded in the same batch are skipped
+    before any request is made:
+
+        with dedup.deduplicate(dedup.FileIndex('uploaded.idx')) as uploads:
+            with task.batched_upload('1234'):
+                ...
+        print(uploads.skipped)
+
+"""
+import contextlib
+import hashlib
+import io
+import json
+import os
+import threading
+
+import six
+
+
+# The global per-process deduplicator, None when deduplication is disabled
+current_deduplicator = None
+
+
+def content_hash(assignment_params):
+    """Return a stable hash of the parameters of a task. Equal parameters
+    hash the same regardless of their order.
+
+    :param assignment_params: Assignment parameters of a task
+    :type assignment_params: dict
+    :rtype: str
+    """
+    serialized = json.dumps(
+        assignment_params,
+        sort_keys=True,
+        separators=(',', ':'),
+        default=six.text_type
+    )
+    return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+
+class MemoryIndex(object):
+    """Index of uploaded tasks kept for the life of the process"""
+
+    def __init__(self):
+        self.keys = set()
+        self.lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key):
+        """Record an uploaded task.
+
+        :param key: The batch id and content hash of the task
+        :type key: tuple
+        """
+        with self.lock:
+            self.keys.add(key)
+
+
+class FileIndex(MemoryIndex):
+    """Index of uploaded tasks persisted to a file with one JSON encoded key
+    per line, so that tasks are not uploaded again by later runs"""
+
+    def __init__(self, path):
+        """Load the index, creating the file if it does not exist.
+
+        :param path: The path of the index file
+        :type path: str
+        """
+        super(FileIndex, self).__init__()
+        self.path = path
+
+        if os.path.exists(path):
+            with io.open(path, encoding='utf-8') as index_file:
+                for line in index_file:
+                    if line.strip():
+                        self.keys.add(tuple(json.loads(line)))
+
+        self.index_file = io.open(path, 'a', encoding='utf-8')
+
+    def add(self, key):
+        with self.lock:
+            if key in self.keys:
+                return
+            self.keys.add(key)
+            self.index_file.write(
+                six.text_type(json.dumps(list(key))) + u'\n'
+            )
+            self.index_file.flush()
+
+    def close(self):
+        """Close the index file."""
+        with self.lock:
+            self.index_file.close()
+
+
+class Deduplicator(object):
+    """Decides whether each task should be uploaded and counts the skipped
+    duplicates"""
+
+    def __init__(self, index=None):
+        """Initialize the deduplicator.
+
+        :param index: (Default is a new MemoryIndex) The uploaded tasks
+        :type index: MemoryIndex or FileIndex or None
+        """
+        self.index = index if index is not None else MemoryIndex()
+        self.pending = set()
+        self.skipped = 0
+        self.lock = threading.Lock()
+
+    def claim(self, batch_id, assignment_params):
+        """Claim the upload of a task, unless the same task was already
+        uploaded or is being uploaded in the batch.
+
+        :param batch_id: The batch id of the task
+        :type batch_id: mixed
+        :param assignment_params: Assignment parameters of the task
+        :type assignment_params: dict
+        :rtype: tuple key to pass to commit() or release(), or None if the
+            task is a duplicate
+        """
+        key = (batch_id, content_hash(assignment_params))
+        with self.lock:
+            if key in self.pending or key in self.index:
+                self.skipped += 1
+                return None
+            self.pending.add(key)
+            return key
+
+    def commit(self, key):
+        """Record that a claimed task was uploaded.
+
+        :param key: A key returned by claim()
+        :type key: tuple
+        """
+        self.index.add(key)
+        with self.lock:
+            self.pending.discard(key)
+
+    def release(self, key):
+        """Give up a claimed task whose upload failed so that it can be
+        uploaded again.
+
+        :param key: A key returned by claim()
+        :type key: tuple
+        """
+        with self.lock:
+            self.pending.discard(key)
+
+
+@contextlib.contextmanager
+def deduplicate(index=None):
+    """Skip uploads of tasks already uploaded in their batch within this
+    context.
+
+    :param index: (Default is a new MemoryIndex) The uploaded tasks
+    :type index: MemoryIndex or FileIndex or None
+    :rtype: context manager yielding the Deduplicator
+    """
+    global current_deduplicator
+    previous_deduplicator = current_deduplicator
+    current_deduplicator = Deduplicator(index)
+    try:
+        yield current_deduplicator
+    finally:
+        current_deduplicator = previous_deduplicator
@@ -0,0 +1,582 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.fake
+    ~~~~~~~~~~~~~~
+    A stateful, in-process stand-in for a Mechanical Turk connection with
+    configurable latency, throttling and failure injection. Useful for testing
+    and load testing pipelines offline:
+
+        connection.set_connection(fake.FakeMTurkConnection(latency=0.05))
+
+"""
+import collections
+import datetime
+import decimal
+import io
+import random
+import threading
+import time
+import uuid
+from xml.sax import saxutils
+
+from turkleton import budget
+from turkleton import errors
+from turkleton.backends import base
+from turkleton.backends import boto2
+
+
+#: The format of timestamps in Mechanical Turk responses
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+class FakeRequestError(errors.Error):
+    """Error raised by the fake connection in place of a request error"""
+
+    def __init__(self, code, message=None):
+        super(FakeRequestError, self).__init__(
+            message if message else code
+        )
+        self.code = code
+
+
+class FakeHIT(object):
+    """A HIT stored by the fake connection. Attribute names match those of
+    boto.mturk.connection.HIT."""
+
+    def __init__(self, hit_id, max_assignments, annotation=None,
+                 hit_type_id=None, hit_layout_id=None, title=None,
+                 reward=None, layout_params=None, expiration=None):
+        self.HITId = hit_id
+        self.HITTypeId = hit_type_id
+        self.HITLayoutId = hit_layout_id
+        self.RequesterAnnotation = annotation
+        self.Title = title
+        self.Reward = reward
+        self.MaxAssignments = max_assignments
+        self.HITStatus = 'Assignable'
+        self.Expiration = expiration
+        self.layout_params = layout_params if layout_params else {}
+
+
+class FakeHITType(object):
+    """A HIT type registered with the fake connection"""
+
+    def __init__(self, hit_type_id, title, description, reward, duration,
+                 keywords=None, approval_delay=None):
+        self.HITTypeId = hit_type_id
+        self.Title = title
+        self.Description = description
+        self.Reward = reward
+        self.AssignmentDuration = duration
+        self.Keywords = keywords
+        self.AutoApprovalDelay = approval_delay
+
+
+class FakeBalance(object):
+    """An account balance, with the attributes of boto.mturk.price.Price"""
+
+    def __init__(self, amount, currency_code='USD'):
+        self.amount = amount
+        self.currency_code = currency_code
+
+
+class FakeAnswer(object):
+    """An answer to a single question. Attribute names match those of
+    boto.mturk.connection.QuestionFormAnswer."""
+
+    def __init__(self, qid, value):
+        self.qid = qid
+        self.fields = [value]
+
+
+class FakeAssignment(object):
+    """An assignment stored by the fake connection. Attribute names match those
+    of boto.mturk.connection.Assignment."""
+
+    def __init__(self, assignment_id, hit_id, worker_id, answer_values,
+                 accept_time, submit_time):
+        self.AssignmentId = assignment_id
+        self.HITId = hit_id
+        self.WorkerId = worker_id
+        self.AssignmentStatus = 'Submitted'
+        self.AcceptTime = accept_time.strftime(TIMESTAMP_FORMAT)
+        self.SubmitTime = submit_time.strftime(TIMESTAMP_FORMAT)
+        self.RequesterFeedback = None
+        self.answer_values = answer_values
+        self.answers = [[
+            FakeAnswer(qid, value) for qid, value in answer_values.items()
+        ]]
+
+
+def _answer_xml(answer_values):
+    """Render answers as a QuestionFormAnswers document.
+
+    :rtype: str
+    """
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><QuestionFormAnswers>{}'
+        '</QuestionFormAnswers>'.format(''.join(
+            '<Answer><QuestionIdentifier>{}</QuestionIdentifier>'
+            '<FreeText>{}</FreeText></Answer>'.format(
+                saxutils.escape(qid), saxutils.escape(value)
+            )
+            for qid, value in answer_values.items()
+        ))
+    )
+
+
+class FakeMTurkConnection(base.Backend):
+    """In-process fake of a backend, answering raw assignment requests in the
+    format of boto.mturk.connection.MTurkConnection"""
+
+    def __init__(self, latency=0, calls_per_second=None, failure_rate=0,
+                 seed=None, balance=decimal.Decimal('10000.00')):
+        """Initialize the fake connection.
+
+        :param latency: (Default is 0) Seconds each call takes, either for all
+            operations or as a dictionary mapping operation name to seconds.
+        :type latency: float or dict
+        :param calls_per_second: (Optional) Calls allowed per second across
+            all operations. Calls beyond this raise a ServiceUnavailable
+            FakeRequestError.
+        :type calls_per_second: float or None
+        :param failure_rate: (Default is 0) Probability that any call fails
+            with an InternalError FakeRequestError.
+        :type failure_rate: float
+        :param seed: (Optional) Seed for the random failures
+        :type seed: mixed
+        :param balance: (Default is 10000.00) The available balance, from
+            which the cost of each created HIT is deducted
+        :type balance: decimal.Decimal
+        """
+        self.latency = latency
+        self.calls_per_second = calls_per_second
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.balance = budget.to_decimal(balance)
+
+        self.lock = threading.RLock()
+        self.hit_types = collections.OrderedDict()
+        self.hit_type_ids = {}
+        self.hits = collections.OrderedDict()
+        self.assignments = collections.OrderedDict()
+        # The assignments of each HIT by HIT id, kept in step with assignments
+        self.hit_assignments = collections.defaultdict(list)
+        self.bonuses = {}
+        self.calls = collections.Counter()
+        self.injected_failures = collections.defaultdict(collections.deque)
+        self.tokens = calls_per_second
+        self.last_refill = time.time()
+
+    # Simulation controls
+
+    def fail_next(self, operation, error=None, times=1):
+        """Make the next calls to the given operation fail.
+
+        :param operation: An operation name (eg. create_hit)
+        :type operation: str
+        :param error: (Default is InternalError FakeRequestError) The error
+        :type error: Exception or None
+        :param times: (Default is 1) The number of calls that should fail
+        :type times: int
+        """
+        with self.lock:
+            for _ in range(times):
+                self.injected_failures[operation].append(
+                    error if error else FakeRequestError('InternalError')
+                )
+
+    def add_hit(self, hit):
+        """Store a HIT, eg. one created for a benchmark.
+
+        :param hit: A HIT
+        :type hit: FakeHIT
+        """
+        with self.lock:
+            self.hits[hit.HITId] = hit
+
+    def add_assignment(self, assignment):
+        """Store an assignment and index it by its HIT.
+
+        :param assignment: An assignment
+        :type assignment: FakeAssignment
+        """
+        with self.lock:
+            if assignment.AssignmentId not in self.assignments:
+                self.hit_assignments[assignment.HITId].append(assignment)
+            self.assignments[assignment.AssignmentId] = assignment
+
+    def submit_assignment(self, hit_id, answer_values, worker_id=None,
+                          work_time=None):
+        """Simulate a worker submitting an assignment for the given HIT. The
+        HIT becomes reviewable once all of its assignments are submitted.
+
+        :param hit_id: A HIT id
+        :type hit_id: str
+        :param answer_values: A dictionary mapping question names to answers
+        :type answer_values: dict
+        :param worker_id: (Default is random) The worker id
+        :type worker_id: str or None
+        :param work_time: (Default is 1 minute) Time spent on the assignment
+        :type work_time: datetime.timedelta or None
+        :rtype: FakeAssignment
+        """
+        with self.lock:
+            hit = self._get_hit(hit_id)
+            hit_assignments = self._get_hit_assignments(hit_id)
+            if len(hit_assignments) >= hit.MaxAssignments:
+                raise FakeRequestError(
+                    'InvalidRequest', 'HIT {} is full.'.format(hit_id)
+                )
+
+            submit_time = datetime.datetime.utcnow()
+            assignment = FakeAssignment(
+                assignment_id=uuid.uuid4().hex,
+                hit_id=hit_id,
+                worker_id=worker_id if worker_id else uuid.uuid4().hex,
+                answer_values=answer_values,
+                accept_time=submit_time - (
+                    work_time if work_time else datetime.timedelta(minutes=1)
+                ),
+                submit_time=submit_time
+            )
+            self.add_assignment(assignment)
+
+            if len(hit_assignments) + 1 >= hit.MaxAssignments:
+                hit.HITStatus = 'Reviewable'
+            return assignment
+
+    def _simulate(self, operation):
+        """Count a call and apply the configured latency, throttling and
+        failures to it.
+
+        :param operation: The operation name
+        :type operation: str
+        """
+        latency = (
+            self.latency.get(operation, 0)
+            if isinstance(self.latency, dict)
+            else self.latency
+        )
+        if latency:
+            time.sleep(latency)
+
+        with self.lock:
+            self.calls[operation] += 1
+
+            if self.calls_per_second:
+                now = time.time()
+                self.tokens = min(
+                    self.calls_per_second,
+                    self.tokens +
+                    (now - self.last_refill) * self.calls_per_second
+                )
+                self.last_refill = now
+                if self.tokens < 1:
+                    raise FakeRequestError(
+                        'ServiceUnavailable', 'Request was throttled.'
+                    )
+                self.tokens -= 1
+
+            if self.injected_failures[operation]:
+                raise self.injected_failures[operation].popleft()
+
+            if self.failure_rate and self.random.random() < self.failure_rate:
+                raise FakeRequestError('InternalError')
+
+    def _get_hit(self, hit_id):
+        hit = self.hits.get(hit_id)
+        if hit is None:
+            raise FakeRequestError(
+                'DoesNotExist', 'HIT {} does not exist.'.format(hit_id)
+            )
+        return hit
+
+    def _get_assignment(self, assignment_id):
+        assignment = self.assignments.get(assignment_id)
+        if assignment is None:
+            raise FakeRequestError(
+                'DoesNotExist',
+                'Assignment {} does not exist.'.format(assignment_id)
+            )
+        return assignment
+
+    def _get_hit_assignments(self, hit_id, status=None):
+        return [
+            each for each in self.hit_assignments.get(hit_id, ())
+            if status is None or each.AssignmentStatus == status
+        ]
+
+    @staticmethod
+    def _page(items, page_size, page_number):
+        start = (page_number - 1) * page_size
+        return items[start:start + page_size]
+
+    # Operations
+
+    def register_hit_type(self, title, description, reward, duration,
+                          keywords=None, approval_delay=None, qual_req=None):
+        """Register a HIT type. Registering the same properties again returns
+        the existing HIT type, as Mechanical Turk does.
+
+        :rtype: list containing the FakeHITType
+        """
+        self._simulate('register_hit_type')
+        key = (
+            title, description, getattr(reward, 'amount', reward),
+            getattr(reward, 'currency_code', None), duration, keywords,
+            approval_delay
+        )
+        with self.lock:
+            hit_type_id = self.hit_type_ids.get(key)
+            if hit_type_id is None:
+                hit_type_id = uuid.uuid4().hex
+                self.hit_type_ids[key] = hit_type_id
+                self.hit_types[hit_type_id] = FakeHITType(
+                    hit_type_id=hit_type_id,
+                    title=title,
+                    description=description,
+                    reward=reward,
+                    duration=duration,
+                    keywords=keywords,
+                    approval_delay=approval_delay
+                )
+            return [self.hit_types[hit_type_id]]
+
+    def create_hit(self, hit_type=None, hit_layout=None, max_assignments=1,
+                   lifetime=datetime.timedelta(days=7), title=None,
+                   reward=None, annotation=None, layout_params=None,
+                   **kwargs):
+        """Create a new HIT, taking its title and reward from the HIT type if
+        one is given.
+
+        :rtype: list containing the FakeHIT
+        """
+        self._simulate('create_hit')
+        with self.lock:
+            if hit_type is not None:
+                if hit_type not in self.hit_types:
+                    raise FakeRequestError(
+                        'AWS.MechanicalTurk.HITTypeDoesNotExist', hit_type
+                    )
+                title = self.hit_types[hit_type].Title
+                reward = self.hit_types[hit_type].Reward
+
+            if reward is not None:
+                cost = budget.hit_cost(
+                    getattr(reward, 'amount', reward), max_assignments
+                )
+                if cost > self.balance:
+                    raise FakeRequestError(
+                        'AWS.MechanicalTurk.InsufficientFunds',
+                        'HIT costs {} but only {} is available.'.format(
+                            cost, self.balance
+                        )
+                    )
+                self.balance -= cost
+
+            hit = FakeHIT(
+                hit_id=uuid.uuid4().hex,
+                max_assignments=max_assignments,
+                annotation=annotation,
+                hit_type_id=hit_type,
+                hit_layout_id=hit_layout,
+                title=title,
+                reward=reward,
+                layout_params=(
+                    dict(layout_params.get_as_params())
+                    if layout_params else None
+                ),
+                expiration=datetime.datetime.utcnow() + lifetime
+            )
+            self.add_hit(hit)
+            return [hit]
+
+    def get_hit(self, hit_id, response_groups=None):
+        """Get a single HIT.
+
+        :rtype: list containing the FakeHIT
+        """
+        self._simulate('get_hit')
+        with self.lock:
+            return [self._get_hit(hit_id)]
+
+    def get_all_hits(self):
+        """Get every HIT that has not been disposed.
+
+        :rtype: iterable of FakeHIT
+        """
+        self._simulate('get_all_hits')
+        with self.lock:
+            return iter([
+                each for each in self.hits.values()
+                if each.HITStatus != 'Disposed'
+            ])
+
+    def get_reviewable_hits(self, hit_type=None, status='Reviewable',
+                            sort_by='Expiration', sort_direction='Ascending',
+                            page_size=10, page_number=1):
+        """Get a page of reviewable HITs.
+
+        :rtype: list of FakeHIT
+        """
+        self._simulate('get_reviewable_hits')
+        with self.lock:
+            hits = [
+                each for each in self.hits.values()
+                if each.HITStatus == status and
+                (hit_type is None or each.HITTypeId == hit_type)
+            ]
+            return self._page(hits, page_size, page_number)
+
+    def get_assignments(self, hit_id, status=None, sort_by='SubmitTime',
+                        sort_direction='Ascending', page_size=10,
+                        page_number=1, response_groups=None):
+        """Get a page of the assignments submitted for a HIT.
+
+        :rtype: list of FakeAssignment
+        """
+        self._simulate('get_assignments')
+        with self.lock:
+            self._get_hit(hit_id)
+            return self._page(
+                self._get_hit_assignments(hit_id, status),
+                page_size,
+                page_number
+            )
+
+    def approve_assignment(self, assignment_id, feedback=None):
+        """Approve a submitted assignment."""
+        self._simulate('approve_assignment')
+        with self.lock:
+            self._review(assignment_id, 'Approved', feedback)
+
+    def reject_assignment(self, assignment_id, feedback=None):
+        """Reject a submitted assignment."""
+        self._simulate('reject_assignment')
+        with self.lock:
+            self._review(assignment_id, 'Rejected', feedback)
+
+    def _review(self, assignment_id, status, feedback):
+        assignment = self._get_assignment(assignment_id)
+        if assignment.AssignmentStatus != 'Submitted':
+            raise FakeRequestError(
+                'InvalidAssignmentState',
+                'Assignment {} is {}.'.format(
+                    assignment_id, assignment.AssignmentStatus
+                )
+            )
+        assignment.AssignmentStatus = status
+        assignment.RequesterFeedback = feedback
+
+    def dispose_hit(self, hit_id):
+        """Dispose of a reviewable HIT whose assignments are all reviewed."""
+        self._simulate('dispose_hit')
+        with self.lock:
+            hit = self._get_hit(hit_id)
+            if hit.HITStatus != 'Reviewable' or self._get_hit_assignments(
+                    hit_id, 'Submitted'):
+                raise FakeRequestError(
+                    'InvalidHITState',
+                    'HIT {} cannot be disposed.'.format(hit_id)
+                )
+            hit.HITStatus = 'Disposed'
+
+    def extend_hit(self, hit_id, assignments_increment=None,
+                   expiration_increment=None):
+        """Add assignments to a HIT or extend its expiration by the given
+        number of seconds."""
+        self._simulate('extend_hit')
+        with self.lock:
+            hit = self._get_hit(hit_id)
+            if hit.HITStatus == 'Disposed':
+                raise FakeRequestError(
+                    'InvalidHITState',
+                    'HIT {} cannot be extended.'.format(hit_id)
+                )
+            if assignments_increment:
+                hit.MaxAssignments += assignments_increment
+                hit.HITStatus = 'Assignable'
+            if expiration_increment:
+                hit.Expiration = max(
+                    hit.Expiration, datetime.datetime.utcnow()
+                ) + datetime.timedelta(seconds=expiration_increment)
+
+    def expire_hit(self, hit_id):
+        """Expire a HIT, making it reviewable."""
+        self._simulate('expire_hit')
+        with self.lock:
+            hit = self._get_hit(hit_id)
+            hit.Expiration = datetime.datetime.utcnow()
+            if hit.HITStatus == 'Assignable':
+                hit.HITStatus = 'Reviewable'
+
+    def get_account_balance(self):
+        """Get the available balance.
+
+        :rtype: list containing the FakeBalance
+        """
+        self._simulate('get_account_balance')
+        with self.lock:
+            return [FakeBalance(self.balance)]
+
+    def make_request(self, action, params=None, path='/', verb='GET'):
+        """Make a raw request. Supports GetAssignmentsForHIT, returning the
+        XML response as a file-like object.
+
+        :rtype: file
+        """
+        params = params if params else {}
+        if params.get('Operation') != 'GetAssignmentsForHIT':
+            raise FakeRequestError(
+                'InvalidOperation', params.get('Operation')
+            )
+
+        assignments = self.get_assignments(
+            params['HITId'],
+            page_size=params.get('PageSize', 10),
+            page_number=params.get('PageNumber', 1)
+        )
+        body = ''.join(
+            '<Assignment><AssignmentId>{}</AssignmentId>'
+            '<WorkerId>{}</WorkerId><HITId>{}</HITId>'
+            '<AssignmentStatus>{}</AssignmentStatus>'
+            '<AcceptTime>{}</AcceptTime><SubmitTime>{}</SubmitTime>'
+            '<Answer>{}</Answer></Assignment>'.format(
+                each.AssignmentId, each.WorkerId, each.HITId,
+                each.AssignmentStatus, each.AcceptTime, each.SubmitTime,
+                saxutils.escape(_answer_xml(each.answer_values))
+            )
+            for each in assignments
+        )
+        return io.BytesIO((
+            '<GetAssignmentsForHITResponse><GetAssignmentsForHITResult>'
+            '<Request><IsValid>True</IsValid></Request>{}'
+            '</GetAssignmentsForHITResult></GetAssignmentsForHITResponse>'
+        ).format(body).encode('utf-8'))
+
+    def iter_raw_assignments(self, hit_id, page_size=None):
+        """Stream the assignments of a HIT through raw requests, as the boto2
+        backend does.
+
+        :rtype: iterable of turkleton.assignment.parser.ParsedAssignment
+        """
+        return boto2.iter_xml_assignments(self.make_request, hit_id, page_size)
+
+    def grant_bonus(self, worker_id, assignment_id, bonus_price, reason,
+                    unique_request_token=None):
+        """Grant a bonus, ignoring repeated requests with the same unique
+        request token."""
+        self._simulate('grant_bonus')
+        with self.lock:
+            self._get_assignment(assignment_id)
+            token = (
+                unique_request_token if unique_request_token
+                else uuid.uuid4().hex
+            )
+            self.bonuses.setdefault(token, {
+                'WorkerId': worker_id,
+                'AssignmentId': assignment_id,
+                'BonusAmount': bonus_price.amount,
+                'Reason': reason
+            })
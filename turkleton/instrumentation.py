@@ -0,0 +1,535 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.instrumentation
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+    Latency, call, error and traffic metrics for every operation made through
+    the connection. Metrics are handed to pluggable exporters:
+
+        instrumentation.enable(exporters=[
+            instrumentation.PrometheusTextFileExporter('/var/lib/turk.prom')
+        ])
+
+    Exporter failures are logged rather than raised, so telemetry never fails
+    the calls it measures.
+
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+import types
+
+from six.moves.urllib import parse
+
+from turkleton import connection
+from turkleton import utils
+
+
+#: Upper bounds, in seconds, of the latency histogram buckets
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+#: Operation that traffic is attributed to when made outside any operation
+UNATTRIBUTED_OPERATION = 'make_request'
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram(object):
+    """Histogram of observed values with fixed bucket bounds"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Record an observed value.
+
+        :param value: A value
+        :type value: float
+        """
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative_counts(self):
+        """Return (bound, count of values <= bound) pairs.
+
+        :rtype: list of tuple
+        """
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class OperationMetrics(object):
+    """Metrics for a single operation"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.calls = 0
+        self.errors = {}
+        self.latency = Histogram(buckets)
+        self.bytes_out = 0
+        self.bytes_in = 0
+
+    def to_dict(self):
+        """Convert these metrics into a dictionary.
+
+        :rtype: dict
+        """
+        return {
+            'calls': self.calls,
+            'errors': dict(self.errors),
+            'latency': {
+                'buckets': self.latency.cumulative_counts(),
+                'sum': self.latency.sum,
+                'count': self.latency.count
+            },
+            'bytes_out': self.bytes_out,
+            'bytes_in': self.bytes_in
+        }
+
+
+class _CountingResponse(object):
+    """Proxy for an HTTP response recording the number of bytes read"""
+
+    def __init__(self, response, hooks):
+        self._response = response
+        self._hooks = hooks
+
+    def read(self, *args):
+        data = self._response.read(*args)
+        for hook in list(self._hooks):
+            hook(bytes_in=len(data))
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+def _get_pool_hooks(target):
+    """Return the traffic_hooks list of a connection pool, or None if the
+    target is not a pool calling its own hooks."""
+    hooks = getattr(target, '__dict__', {}).get('traffic_hooks')
+    return hooks if isinstance(hooks, list) else None
+
+
+def add_traffic_hook(boto_connection, hook):
+    """Call a hook with the bytes sent and received by each HTTP request of a
+    boto connection. make_request is replaced once however many hooks are
+    added. A connection pool with its own traffic_hooks, such as the JSON
+    backend's, is given the hook directly.
+
+    :param boto_connection: A boto connection or connection pool
+    :type boto_connection: boto.connection.AWSAuthConnection or
+        turkleton.backends.json_api.HTTPConnectionPool
+    :param hook: A function taking bytes_out and bytes_in keyword arguments
+    :type hook: callable
+    """
+    pool_hooks = _get_pool_hooks(boto_connection)
+    if pool_hooks is not None:
+        if hook not in pool_hooks:
+            pool_hooks.append(hook)
+        return
+
+    hooks = vars(boto_connection).get('_turkleton_traffic_hooks')
+    if hooks is None:
+        hooks = []
+        overridden = vars(boto_connection).get('make_request')
+        make_request = boto_connection.make_request
+
+        def counting_make_request(action, params=None, *args, **kwargs):
+            bytes_out = len(parse.urlencode(params)) if params else 0
+            for each in list(hooks):
+                each(bytes_out=bytes_out)
+            response = make_request(action, params, *args, **kwargs)
+            return _CountingResponse(response, hooks)
+
+        boto_connection.make_request = counting_make_request
+        boto_connection._turkleton_traffic_hooks = hooks
+        boto_connection._turkleton_make_request = overridden
+
+    if hook not in hooks:
+        hooks.append(hook)
+
+
+def remove_traffic_hook(boto_connection, hook):
+    """Stop calling a hook added with add_traffic_hook(). Once no hooks are
+    left the original make_request is restored.
+
+    :param boto_connection: A boto connection or connection pool
+    :type boto_connection: boto.connection.AWSAuthConnection or
+        turkleton.backends.json_api.HTTPConnectionPool
+    :param hook: A hook given to add_traffic_hook()
+    :type hook: callable
+    """
+    pool_hooks = _get_pool_hooks(boto_connection)
+    if pool_hooks is not None:
+        if hook in pool_hooks:
+            pool_hooks.remove(hook)
+        return
+
+    hooks = vars(boto_connection).get('_turkleton_traffic_hooks')
+    if hooks is None or hook not in hooks:
+        return
+
+    hooks.remove(hook)
+    if not hooks:
+        overridden = boto_connection._turkleton_make_request
+        del boto_connection._turkleton_traffic_hooks
+        del boto_connection._turkleton_make_request
+        if overridden is None:
+            del boto_connection.make_request
+        else:
+            boto_connection.make_request = overridden
+
+
+class InstrumentedConnection(object):
+    """Proxy for a connection recording metrics for each method call"""
+
+    def __init__(self, wrapped_connection, instrumentation):
+        self._connection = wrapped_connection
+        self._instrumentation = instrumentation
+
+    def __getattr__(self, name):
+        attr = getattr(self._connection, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        instrumentation = self._instrumentation
+
+        def instrumented(*args, **kwargs):
+            return instrumentation.call(name, attr, *args, **kwargs)
+
+        return instrumented
+
+
+class Instrumentation(object):
+    """Collects metrics for connection operations and exports them"""
+
+    def __init__(self, exporters=None, buckets=DEFAULT_BUCKETS,
+                 export_interval=None):
+        """Initialize instrumentation.
+
+        :param exporters: (Optional) Callables receiving a snapshot of the
+            metrics each time they are exported
+        :type exporters: list of callable or None
+        :param buckets: (Default is DEFAULT_BUCKETS) Latency bucket bounds
+        :type buckets: iterable of float
+        :param export_interval: (Optional) Seconds between automatic exports
+        :type export_interval: float or None
+        """
+        self.exporters = list(exporters) if exporters else []
+        self.buckets = tuple(buckets)
+        self.export_interval = export_interval
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.export_lock = threading.Lock()
+        self.local = threading.local()
+        self.last_export = time.time()
+        self.hooked_connections = []
+
+    def _get_metrics(self, operation):
+        metrics = self.metrics.get(operation)
+        if metrics is None:
+            metrics = OperationMetrics(self.buckets)
+            self.metrics[operation] = metrics
+        return metrics
+
+    def record(self, operation, seconds, error=None):
+        """Record a completed call.
+
+        :param operation: The operation name
+        :type operation: str
+        :param seconds: The call latency
+        :type seconds: float
+        :param error: (Optional) The error raised by the call
+        :type error: Exception or None
+        """
+        with self.lock:
+            metrics = self._get_metrics(operation)
+            metrics.calls += 1
+            metrics.latency.observe(seconds)
+            if error is not None:
+                error_type = type(error).__name__
+                metrics.errors[error_type] = (
+                    metrics.errors.get(error_type, 0) + 1
+                )
+
+        if (self.export_interval is not None and
+                time.time() - self.last_export >= self.export_interval):
+            self.export()
+
+    def record_traffic(self, operation, bytes_out=0, bytes_in=0):
+        """Record bytes sent or received for an operation.
+
+        :param operation: The operation name
+        :type operation: str
+        :param bytes_out: Bytes sent
+        :type bytes_out: int
+        :param bytes_in: Bytes received
+        :type bytes_in: int
+        """
+        with self.lock:
+            metrics = self._get_metrics(operation)
+            metrics.bytes_out += bytes_out
+            metrics.bytes_in += bytes_in
+
+    def call(self, operation, func, *args, **kwargs):
+        """Call a function, recording its metrics under the given operation.
+        The latency of a generator includes the time spent producing each of
+        its items, and is recorded once it is exhausted or closed.
+
+        :param operation: The operation name
+        :type operation: str
+        :param func: The function to call
+        :type func: callable
+        :rtype: mixed
+        """
+        previous_operation = getattr(self.local, 'operation', None)
+        self.local.operation = operation
+        start = time.time()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record(operation, time.time() - start, e)
+            raise
+        finally:
+            self.local.operation = previous_operation
+
+        if isinstance(result, types.GeneratorType):
+            return self._iterate(operation, result, time.time() - start)
+
+        self.record(operation, time.time() - start)
+        return result
+
+    def _iterate(self, operation, iterator, seconds):
+        error = None
+        try:
+            while True:
+                previous_operation = getattr(self.local, 'operation', None)
+                self.local.operation = operation
+                start = time.time()
+                try:
+                    each = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    seconds += time.time() - start
+                    self.local.operation = previous_operation
+                yield each
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.record(operation, seconds, error)
+
+    def record_request_traffic(self, bytes_out=0, bytes_in=0):
+        """Record bytes sent or received by an HTTP request against the
+        operation being made in this thread.
+
+        :param bytes_out: Bytes sent
+        :type bytes_out: int
+        :param bytes_in: Bytes received
+        :type bytes_in: int
+        """
+        operation = (
+            getattr(self.local, 'operation', None) or UNATTRIBUTED_OPERATION
+        )
+        self.record_traffic(operation, bytes_out, bytes_in)
+
+    def _instrument_requests(self, boto_connection):
+        """Record the traffic of each HTTP request made by a boto connection
+        or connection pool against the operation making it."""
+        add_traffic_hook(boto_connection, self.record_request_traffic)
+        if boto_connection not in self.hooked_connections:
+            self.hooked_connections.append(boto_connection)
+
+    def release(self):
+        """Stop recording the traffic of the connections this has wrapped,
+        restoring their original request methods."""
+        while self.hooked_connections:
+            remove_traffic_hook(
+                self.hooked_connections.pop(), self.record_request_traffic
+            )
+
+    def reinit_after_fork(self):
+        """Recreate the locks of the instrumentation in a forked child, where
+        another thread of the parent may have held them."""
+        self.lock = threading.Lock()
+        self.export_lock = threading.Lock()
+        self.local = threading.local()
+
+    def wrap(self, wrapped_connection):
+        """Wrap a connection so that its operations are instrumented. This can
+        be given to connection.add_wrapper().
+
+        :param wrapped_connection: A connection
+        :type wrapped_connection: turkleton.backends.base.Backend
+        :rtype: InstrumentedConnection
+        """
+        boto_connection = getattr(
+            wrapped_connection, 'boto_connection', wrapped_connection
+        )
+        if type(boto_connection).__module__.startswith('boto.'):
+            self._instrument_requests(boto_connection)
+        pool = getattr(wrapped_connection, 'pool', None)
+        if _get_pool_hooks(pool) is not None:
+            self._instrument_requests(pool)
+        return InstrumentedConnection(wrapped_connection, self)
+
+    def snapshot(self):
+        """Return a copy of the current metrics keyed by operation.
+
+        :rtype: dict
+        """
+        with self.lock:
+            return dict(
+                (operation, metrics.to_dict())
+                for operation, metrics in self.metrics.items()
+            )
+
+    def export(self):
+        """Hand a snapshot of the current metrics to each exporter. Exports
+        from several threads are made one at a time. An exporter that fails
+        is logged and does not stop the others."""
+        with self.export_lock:
+            self.last_export = time.time()
+            snapshot = self.snapshot()
+            for exporter in self.exporters:
+                try:
+                    exporter(snapshot)
+                except Exception:
+                    logger.exception('Failed to export metrics.')
+
+    def reset(self):
+        """Discard all recorded metrics."""
+        with self.lock:
+            self.metrics = {}
+
+
+class CallbackExporter(object):
+    """Exporter passing each snapshot to a callback"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def __call__(self, snapshot):
+        self.callback(snapshot)
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def format_prometheus(snapshot, prefix='turkleton'):
+    """Format a snapshot in the Prometheus text exposition format.
+
+    :param snapshot: A snapshot from Instrumentation.snapshot()
+    :type snapshot: dict
+    :param prefix: (Default is turkleton) Prefix for metric names
+    :type prefix: str
+    :rtype: str
+    """
+    lines = [
+        '# TYPE {}_calls_total counter'.format(prefix),
+        '# TYPE {}_errors_total counter'.format(prefix),
+        '# TYPE {}_call_duration_seconds histogram'.format(prefix),
+        '# TYPE {}_bytes_sent_total counter'.format(prefix),
+        '# TYPE {}_bytes_received_total counter'.format(prefix)
+    ]
+
+    for operation in sorted(snapshot):
+        metrics = snapshot[operation]
+        label = 'operation="{}"'.format(_escape_label(operation))
+
+        lines.append('{}_calls_total{{{}}} {}'.format(
+            prefix, label, metrics['calls']
+        ))
+        for error_type in sorted(metrics['errors']):
+            lines.append('{}_errors_total{{{},error="{}"}} {}'.format(
+                prefix, label, _escape_label(error_type),
+                metrics['errors'][error_type]
+            ))
+        for bound, count in metrics['latency']['buckets']:
+            lines.append(
+                '{}_call_duration_seconds_bucket{{{},le="{}"}} {}'.format(
+                    prefix, label, bound, count
+                )
+            )
+        lines.append(
+            '{}_call_duration_seconds_bucket{{{},le="+Inf"}} {}'.format(
+                prefix, label, metrics['latency']['count']
+            )
+        )
+        lines.append('{}_call_duration_seconds_sum{{{}}} {}'.format(
+            prefix, label, metrics['latency']['sum']
+        ))
+        lines.append('{}_call_duration_seconds_count{{{}}} {}'.format(
+            prefix, label, metrics['latency']['count']
+        ))
+        lines.append('{}_bytes_sent_total{{{}}} {}'.format(
+            prefix, label, metrics['bytes_out']
+        ))
+        lines.append('{}_bytes_received_total{{{}}} {}'.format(
+            prefix, label, metrics['bytes_in']
+        ))
+
+    return '\n'.join(lines) + '\n'
+
+
+class PrometheusTextFileExporter(object):
+    """Exporter writing metrics to a file for the Prometheus node exporter
+    textfile collector. The file is replaced atomically."""
+
+    def __init__(self, path, prefix='turkleton'):
+        self.path = path
+        self.prefix = prefix
+
+    def __call__(self, snapshot):
+        metrics_file = tempfile.NamedTemporaryFile(
+            mode='w',
+            dir=os.path.dirname(os.path.abspath(self.path)),
+            prefix='.{}.'.format(os.path.basename(self.path)),
+            delete=False
+        )
+        try:
+            with metrics_file:
+                metrics_file.write(format_prometheus(snapshot, self.prefix))
+            utils.replace_file(metrics_file.name, self.path)
+        except Exception:
+            os.remove(metrics_file.name)
+            raise
+
+
+def enable(exporters=None, **kwargs):
+    """Instrument every operation made through connection.get_connection().
+
+    :param exporters: (Optional) Callables receiving metric snapshots
+    :type exporters: list of callable or None
+    :param kwargs: Additional arguments for Instrumentation
+    :type kwargs: dict
+    :rtype: Instrumentation
+    """
+    instrumentation = Instrumentation(exporters=exporters, **kwargs)
+    connection.add_wrapper(instrumentation.wrap)
+    return instrumentation
+
+
+def disable(instrumentation):
+    """Stop instrumenting operations with the given instrumentation.
+
+    :param instrumentation: Instrumentation returned by enable()
+    :type instrumentation: Instrumentation
+    """
+    connection.remove_wrapper(instrumentation.wrap)
+    instrumentation.release()
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.pipeline
+    ~~~~~~~~~~~~~~~~~~
+    Streaming pipelines of concurrent stages joined by bounded queues. A slow
+    stage blocks the stages before it rather than letting items pile up, so
+    memory stays flat while network stages overlap:
+
+        outcomes = pipeline.review_batch(MyAssignment, '1234', decide)
+        for outcome in outcomes:
+            if not outcome.succeeded:
+                print(outcome.error)
+
+"""
+import threading
+
+from six.moves import queue
+
+from turkleton import utils
+from turkleton.assignment import hit
+
+
+#: The default number of items held between two stages
+DEFAULT_QUEUE_SIZE = 100
+#: Seconds between checks for a stopped pipeline while blocked
+POLL_INTERVAL = 0.1
+#: Statuses of assignments that can be approved or rejected
+REVIEWABLE_ASSIGNMENT_STATUSES = (None, 'Submitted')
+
+# Marks the end of the items of a queue
+_END = object()
+
+
+class _Stage(object):
+    """A function applied to each item by a number of workers"""
+
+    def __init__(self, func, workers, flat):
+        self.func = func
+        self.workers = workers
+        self.flat = flat
+        self.remaining = workers
+        self.lock = threading.Lock()
+
+    def apply(self, item):
+        """Apply the function to an item.
+
+        :param item: An item
+        :type item: mixed
+        :rtype: iterable of turkleton.utils.Outcome
+        """
+        try:
+            if not self.flat:
+                yield utils.Outcome(item, self.func(item), None)
+                return
+
+            for each in self.func(item):
+                yield utils.Outcome(item, each, None)
+        except Exception as e:
+            yield utils.Outcome(item, None, e)
+
+    def finish_worker(self):
+        """Record that a worker has finished.
+
+        :rtype: bool indicating whether it was the last worker
+        """
+        with self.lock:
+            self.remaining -= 1
+            return self.remaining == 0
+
+
+class Pipeline(object):
+    """Streams items from a source through stages, each run by its own
+    workers. Iterating the pipeline yields an outcome for every item leaving
+    the last stage and every item that failed in any stage, in the order
+    they finish."""
+
+    def __init__(self, source, maxsize=DEFAULT_QUEUE_SIZE):
+        """Initialize the pipeline.
+
+        :param source: The items to process
+        :type source: iterable
+        :param maxsize: (Default is DEFAULT_QUEUE_SIZE) The most items held
+            between two stages
+        :type maxsize: int
+        """
+        self.source = source
+        self.maxsize = maxsize
+        self.stages = []
+
+    def map(self, func, workers=1):
+        """Add a stage giving one result for each item.
+
+        :param func: A function taking a single item
+        :type func: callable
+        :param workers: (Default is 1) The number of concurrent calls
+        :type workers: int
+        :rtype: Pipeline
+        """
+        self.stages.append(_Stage(func, workers, flat=False))
+        return self
+
+    def flat_map(self, func, workers=1):
+        """Add a stage giving any number of results for each item.
+
+        :param func: A function taking a single item and returning an
+            iterable of results
+        :type func: callable
+        :param workers: (Default is 1) The number of concurrent calls
+        :type workers: int
+        :rtype: Pipeline
+        """
+        self.stages.append(_Stage(func, workers, flat=True))
+        return self
+
+    def __iter__(self):
+        queues = [
+            queue.Queue(self.maxsize) for _ in range(len(self.stages) + 1)
+        ]
+        stopped = threading.Event()
+        for each in self.stages:
+            each.remaining = each.workers
+
+        def put(target, item):
+            while not stopped.is_set():
+                try:
+                    target.put(item, timeout=POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def get(source):
+            while not stopped.is_set():
+                try:
+                    return source.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    pass
+            return _END
+
+        def end(index):
+            workers = (
+                self.stages[index].workers if index < len(self.stages) else 1
+            )
+            for _ in range(workers):
+                put(queues[index], _END)
+
+        def feed():
+            try:
+                for each in self.source:
+                    if not put(queues[0], utils.Outcome(each, each, None)):
+                        return
+            except Exception as e:
+                put(queues[0], utils.Outcome(None, None, e))
+            end(0)
+
+        def work(index, stage):
+            while True:
+                outcome = get(queues[index])
+                if outcome is _END:
+                    break
+
+                results = (
+                    stage.apply(outcome.result) if outcome.succeeded
+                    else [outcome]
+                )
+                for each in results:
+                    if not put(queues[index + 1], each):
+                        return
+
+            if stage.finish_worker():
+                end(index + 1)
+
+        threads = [threading.Thread(target=feed)]
+        for index, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(target=work, args=(index, stage))
+                for _ in range(stage.workers)
+            )
+        for each in threads:
+            each.daemon = True
+            each.start()
+
+        try:
+            while True:
+                outcome = get(queues[-1])
+                if outcome is _END:
+                    return
+                yield outcome
+        finally:
+            stopped.set()
+            for each in threads:
+                each.join()
+
+
+def review_batch(assignment_cls, batch_id, decide, fetch_workers=None,
+                 decide_workers=1, review_workers=None,
+                 maxsize=DEFAULT_QUEUE_SIZE, connection_name=None,
+                 circuit_breaker=None):
+    """Review the submitted assignments of a batch in a streaming pipeline.
+    Assignments of each reviewable HIT are fetched and parsed, given to the
+    decide function and approved or rejected as they arrive.
+
+    :param assignment_cls: The assignment class
+    :type assignment_cls: type
+    :param batch_id: A batch id
+    :type batch_id: str or unicode
+    :param decide: A function taking an assignment and returning a pair of
+        'approve' or 'reject' and the message for the turker, or None to leave
+        the assignment unreviewed
+    :type decide: callable
+    :param fetch_workers: (Default is utils.DEFAULT_MAX_WORKERS) The number of
+        concurrent assignment requests
+    :type fetch_workers: int or None
+    :param decide_workers: (Default is 1) The number of concurrent decisions
+    :type decide_workers: int
+    :param review_workers: (Default is utils.DEFAULT_MAX_WORKERS) The number
+        of concurrent approve and reject requests
+    :type review_workers: int or None
+    :param maxsize: (Default is DEFAULT_QUEUE_SIZE) The most items held
+        between two stages
+    :type maxsize: int
+    :param connection_name: (Default is the default connection) The
+        connection name, or a connection.BatchSharder
+    :type connection_name: str or callable or None
+    :param circuit_breaker: (Optional) Fetches and reviews pause while the
+        circuit of their operation is open
+    :type circuit_breaker: turkleton.breaker.CircuitBreaker or None
+    :rtype: Pipeline yielding a turkleton.utils.Outcome for each reviewed
+        assignment with its (assignment, (decision, message)) item and the
+        decision as result, or for each failed HIT, assignment or review
+    """
+    def pause(operation):
+        if circuit_breaker is not None:
+            circuit_breaker.wait(operation)
+
+    def fetch(reviewable_hit):
+        pause('get_assignments')
+        assignments = assignment_cls.get_by_hit_id(
+            reviewable_hit.hit_id, reviewable_hit.connection_name
+        )
+        return [
+            each for each in assignments
+            if utils.safe_getattr(each.assignment, 'AssignmentStatus') in
+            REVIEWABLE_ASSIGNMENT_STATUSES
+        ]
+
+    def make_decision(assignment):
+        decision = decide(assignment)
+        return [(assignment, decision)] if decision else []
+
+    def review(decided):
+        assignment, (decision, message) = decided
+        if decision == 'approve':
+            pause('approve_assignment')
+            assignment.approve(message)
+        elif decision == 'reject':
+            pause('reject_assignment')
+            assignment.reject(message)
+        else:
+            raise ValueError('Unknown decision {}.'.format(decision))
+        return decision
+
+    reviewable_hits = hit.iter_reviewable_by_batch_id(
+        batch_id, connection_name
+    )
+    return Pipeline(reviewable_hits, maxsize).flat_map(
+        fetch, fetch_workers if fetch_workers else utils.DEFAULT_MAX_WORKERS
+    ).flat_map(
+        make_decision, decide_workers
+    ).map(
+        review, review_workers if review_workers else utils.DEFAULT_MAX_WORKERS
+    )
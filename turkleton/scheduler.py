@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.scheduler
+    ~~~~~~~~~~~~~~~~~~~
+    Schedules uploads from many batches onto a pool of workers. Batches with
+    a higher priority are always served first, batches of equal priority
+    share the request budget in proportion to their weights, and each batch
+    can be limited in the number of HITs it has live:
+
+        uploads = scheduler.UploadScheduler(max_workers=10, rate=5)
+        uploads.add_batch('backfill', max_live_hits=5000)
+        uploads.add_batch('urgent', priority=10)
+        for each in tasks:
+            uploads.submit(each, 'backfill')
+        uploads.submit(urgent_task, 'urgent')
+        outcomes = uploads.run()
+
+"""
+import collections
+import threading
+import time
+
+from turkleton import errors
+from turkleton import utils
+
+
+#: The pass added to a batch each time it is served with a weight of 1
+STRIDE = 1.0
+
+
+class TokenBucket(object):
+    """Limits the rate of requests, allowing bursts up to a size"""
+
+    def __init__(self, rate, burst=None, clock=time.time, sleep=time.sleep):
+        """Initialize the bucket, starting full.
+
+        :param rate: The sustained number of requests per second
+        :type rate: float
+        :param burst: (Default is rate rounded up) The most requests made
+            at once
+        :type burst: float or None
+        :param clock: (Default is time.time) Function returning the time
+        :type clock: callable
+        :param sleep: (Default is time.sleep) Function sleeping for seconds
+        :type sleep: callable
+        """
+        self.rate = float(rate)
+        self.burst = float(burst) if burst else max(1.0, float(rate))
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.burst
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping until one is available."""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait > 0:
+            self.sleep(wait)
+
+
+class ScheduledBatch(object):
+    """The queued uploads and scheduling state of a batch"""
+
+    def __init__(self, batch_id, priority=0, weight=1, max_live_hits=None,
+                 live_hits=0, pass_value=0.0):
+        self.batch_id = batch_id
+        self.priority = priority
+        self.weight = weight
+        self.max_live_hits = max_live_hits
+        self.live_hits = live_hits
+        self.pass_value = pass_value
+        self.tasks = collections.deque()
+
+    @property
+    def is_ready(self):
+        """Return whether the batch has a task it may upload now.
+
+        :rtype: bool
+        """
+        return bool(self.tasks) and (
+            self.max_live_hits is None or self.live_hits < self.max_live_hits
+        )
+
+
+class UploadScheduler(object):
+    """Uploads tasks of many batches concurrently in priority and weighted
+    fair order"""
+
+    class UnknownBatchError(errors.Error):
+        """Represents an attempt to use a batch that was never added"""
+        pass
+
+    def __init__(self, max_workers=None, rate=None, burst=None,
+                 clock=time.time, sleep=time.sleep, circuit_breaker=None):
+        """Initialize the scheduler.
+
+        :param max_workers: (Default is DEFAULT_MAX_WORKERS) The maximum
+            number of concurrent uploads
+        :type max_workers: int or None
+        :param rate: (Optional) The most uploads started per second across
+            all batches
+        :type rate: float or None
+        :param burst: (Default is rate rounded up) The most uploads started
+            at once
+        :type burst: float or None
+        :param clock: (Default is time.time) Function returning the time
+        :type clock: callable
+        :param sleep: (Default is time.sleep) Function sleeping for seconds
+        :type sleep: callable
+        :param circuit_breaker: (Optional) Uploads pause while its create_hit
+            circuit is open
+        :type circuit_breaker: turkleton.breaker.CircuitBreaker or None
+        """
+        self.max_workers = (
+            max_workers if max_workers else utils.DEFAULT_MAX_WORKERS
+        )
+        self.bucket = (
+            TokenBucket(rate, burst, clock, sleep) if rate else None
+        )
+        self.circuit_breaker = circuit_breaker
+        self.batches = collections.OrderedDict()
+        self.virtual_time = 0.0
+        self.condition = threading.Condition()
+
+    def add_batch(self, batch_id, priority=0, weight=1, max_live_hits=None,
+                  live_hits=0):
+        """Add a batch, or update the settings of an added batch.
+
+        :param batch_id: The batch id
+        :type batch_id: str or unicode
+        :param priority: (Default is 0) Batches with higher priorities are
+            served first
+        :type priority: int
+        :param weight: (Default is 1) The share of uploads given to this
+            batch relative to other batches of the same priority
+        :type weight: float
+        :param max_live_hits: (Optional) The most HITs of the batch live at
+            once
+        :type max_live_hits: int or None
+        :param live_hits: (Default is 0) The number of HITs of the batch
+            already live
+        :type live_hits: int
+        """
+        if weight <= 0:
+            raise ValueError('Batch weight must be positive.')
+
+        with self.condition:
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                self.batches[batch_id] = ScheduledBatch(
+                    batch_id,
+                    priority=priority,
+                    weight=weight,
+                    max_live_hits=max_live_hits,
+                    live_hits=live_hits,
+                    pass_value=self.virtual_time
+                )
+            else:
+                batch.priority = priority
+                batch.weight = weight
+                batch.max_live_hits = max_live_hits
+                batch.live_hits = live_hits
+            self.condition.notify_all()
+
+    def _get_batch(self, batch_id):
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            raise self.UnknownBatchError(
+                'Batch {} was never added.'.format(batch_id)
+            )
+        return batch
+
+    def submit(self, task, batch_id):
+        """Queue a task for upload in a batch.
+
+        :param task: A task
+        :type task: turkleton.assignment.task.BaseTask
+        :param batch_id: The id of an added batch
+        :type batch_id: str or unicode
+        """
+        with self.condition:
+            batch = self._get_batch(batch_id)
+            if not batch.tasks:
+                # An idle batch must not catch up on turns it had no work for
+                batch.pass_value = max(batch.pass_value, self.virtual_time)
+            batch.tasks.append(task)
+            self.condition.notify_all()
+
+    def release_hits(self, batch_id, num_hits=1):
+        """Record that HITs of a batch are no longer live, eg. once they are
+        disposed, so that more of its tasks can be uploaded.
+
+        :param batch_id: The id of an added batch
+        :type batch_id: str or unicode
+        :param num_hits: (Default is 1) The number of HITs
+        :type num_hits: int
+        """
+        with self.condition:
+            batch = self._get_batch(batch_id)
+            batch.live_hits = max(0, batch.live_hits - num_hits)
+            self.condition.notify_all()
+
+    def pending(self, batch_id=None):
+        """Return the number of tasks waiting to be uploaded.
+
+        :param batch_id: (Optional) Only count tasks of this batch
+        :type batch_id: str or unicode or None
+        :rtype: int
+        """
+        with self.condition:
+            if batch_id is not None:
+                return len(self._get_batch(batch_id).tasks)
+            return sum(len(each.tasks) for each in self.batches.values())
+
+    def _next_batch(self):
+        """Choose the batch to serve next, taking the ready batches of the
+        highest priority in stride order.
+
+        :rtype: ScheduledBatch or None
+        """
+        ready = [each for each in self.batches.values() if each.is_ready]
+        if not ready:
+            return None
+
+        top_priority = max(each.priority for each in ready)
+        batch = min(
+            (each for each in ready if each.priority == top_priority),
+            key=lambda each: each.pass_value
+        )
+        self.virtual_time = batch.pass_value
+        batch.pass_value += STRIDE / batch.weight
+        return batch
+
+    def run(self):
+        """Upload queued tasks until none can be uploaded. Tasks of batches
+        at their live HIT limit stay queued for a later run.
+
+        :rtype: list of turkleton.utils.Outcome for each task in the order
+            uploads finished
+        """
+        from multiprocessing import pool
+
+        outcomes = []
+        state = {'in_flight': 0}
+
+        def upload(batch, task):
+            try:
+                result = task.upload(batch_id=batch.batch_id)
+                outcome = utils.Outcome(task, result, None)
+            except Exception as e:
+                outcome = utils.Outcome(task, None, e)
+
+            with self.condition:
+                if not outcome.result:
+                    # Failed and skipped uploads leave no HIT live
+                    batch.live_hits -= 1
+                state['in_flight'] -= 1
+                outcomes.append(outcome)
+                self.condition.notify_all()
+
+        thread_pool = pool.ThreadPool(self.max_workers)
+        try:
+            while True:
+                with self.condition:
+                    while True:
+                        batch = None
+                        if state['in_flight'] < self.max_workers:
+                            batch = self._next_batch()
+                        if batch is not None or not state['in_flight']:
+                            break
+                        self.condition.wait()
+
+                    if batch is None:
+                        return outcomes
+
+                    task = batch.tasks.popleft()
+                    batch.live_hits += 1
+                    state['in_flight'] += 1
+
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.wait('create_hit')
+                if self.bucket is not None:
+                    self.bucket.acquire()
+                thread_pool.apply_async(upload, (batch, task))
+        finally:
+            thread_pool.close()
+            thread_pool.join()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+    turkleton.timing
+    ~~~~~~~~~~~~~~~~
+    Lightweight nested timing spans showing how the time of batch operations
+    splits between validation, serialization, network and parsing. Spans cost
+    almost nothing unless a collector is active:
+
+        with timing.collect() as timings:
+            with task.batched_upload('1234'):
+                ...
+        print(timings.summary())
+
+"""
+import contextlib
+import threading
+import time
+
+
+# The global per-process span collector, None when timing is disabled
+current_collector = None
+# Stack of the spans open in each thread
+_local = threading.local()
+
+
+class SpanCollector(object):
+    """Aggregates the durations of finished spans by their path"""
+
+    def __init__(self):
+        self.totals = {}
+        self.lock = threading.Lock()
+
+    def add(self, path, seconds):
+        """Record a finished span.
+
+        :param path: The span path (eg. task.upload/network)
+        :type path: str
+        :param seconds: The span duration
+        :type seconds: float
+        """
+        with self.lock:
+            total = self.totals.get(path)
+            if total is None:
+                self.totals[path] = [1, seconds, seconds]
+            else:
+                total[0] += 1
+                total[1] += seconds
+                total[2] = max(total[2], seconds)
+
+    def summary(self):
+        """Return the count, total and maximum seconds for each span path.
+
+        :rtype: dict
+        """
+        with self.lock:
+            return dict(
+                (path, {
+                    'count': count,
+                    'seconds': seconds,
+                    'max_seconds': max_seconds
+                })
+                for path, (count, seconds, max_seconds)
+                in self.totals.items()
+            )
+
+
+class _NullSpan(object):
+    """Span used while timing is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    """A span being timed"""
+
+    __slots__ = ['collector', 'name', 'path', 'start']
+
+    def __init__(self, collector, name):
+        self.collector = collector
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        self.path = (
+            '{}/{}'.format(stack[-1].path, self.name) if stack else self.name
+        )
+        stack.append(self)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.collector.add(self.path, time.time() - self.start)
+        _local.stack.pop()
+        return False
+
+
+def span(name):
+    """Time the enclosed block as a span nested within any open span.
+
+    :param name: The span name
+    :type name: str
+    :rtype: context manager
+    """
+    collector = current_collector
+    if collector is None:
+        return _NULL_SPAN
+    return _Span(collector, name)
+
+
+@contextlib.contextmanager
+def collect(collector=None, callback=None):
+    """Collect spans finished within this context.
+
+    :param collector: (Default is a new SpanCollector) The collector
+    :type collector: SpanCollector or None
+    :param callback: (Optional) Called with the collector when the context
+        exits
+    :type callback: callable or None
+    """
+    global current_collector
+    previous_collector = current_collector
+    current_collector = collector if collector else SpanCollector()
+    try:
+        yield current_collector
+    finally:
+        finished_collector = current_collector
+        current_collector = previous_collector
+        if callback:
+            callback(finished_collector)
@@ -5,6 +5,27 @@
     Miscellaneous utility methods
 
 """
+import collections
+import os
+
+
+#: The default number of concurrent calls made by bulk operations
+DEFAULT_MAX_WORKERS = 10
+
+
+class Outcome(collections.namedtuple('Outcome', ['item', 'result', 'error'])):
+    """The outcome of applying an operation to a single item of a bulk
+    operation. Exactly one of result or error is meaningful."""
+
+    __slots__ = ()
+
+    @property
+    def succeeded(self):
+        """Return whether the operation succeeded for this item.
+
+        :rtype: bool
+        """
+        return self.error is None
 
 
 def safe_getattr(obj, attr_name):
@@ -20,3 +41,48 @@ def safe_getattr(obj, attr_name):
         return getattr(obj, attr_name)
     except AttributeError:
         return None
+
+
+def replace_file(source, target):
+    """Atomically move a file over another, which may already exist.
+    os.rename only overwrites on POSIX so os.replace is used where
+    available.
+
+    :param source: The path of the new file
+    :type source: str or unicode
+    :param target: The path to replace
+    :type target: str or unicode
+    """
+    getattr(os, 'replace', os.rename)(source, target)
+
+
+def concurrent_map(func, items, max_workers=None):
+    """Apply a function to each item using a bounded pool of threads. A
+    failure for one item does not prevent the remaining items from being
+    processed.
+
+    :param func: A function taking a single item
+    :type func: callable
+    :param items: The items to process
+    :type items: iterable
+    :param max_workers: (Default is DEFAULT_MAX_WORKERS) The maximum number of
+        concurrent calls.
+    :type max_workers: int or None
+    :rtype: list of Outcome in the same order as items
+    """
+    from multiprocessing import pool
+
+    def call(item):
+        try:
+            return Outcome(item, func(item), None)
+        except Exception as e:
+            return Outcome(item, None, e)
+
+    thread_pool = pool.ThreadPool(
+        max_workers if max_workers else DEFAULT_MAX_WORKERS
+    )
+    try:
+        return thread_pool.map(call, items, chunksize=1)
+    finally:
+        thread_pool.close()
+        thread_pool.join()